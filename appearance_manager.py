@@ -1,9 +1,19 @@
 # appearance_manager.py - Gerenciador de Aparência
 import json
 import os
-from PyQt5.QtGui import QFont
+import hashlib
+from PyQt5.QtGui import QFont, QPalette, QColor
 from PyQt5.QtWidgets import QApplication
 
+class ThemeArtifacts:
+    """Tema compilado: stylesheet, paleta e fonte prontos para aplicar"""
+    
+    def __init__(self, key, stylesheet, palette=None, font=None):
+        self.key = key
+        self.stylesheet = stylesheet
+        self.palette = palette
+        self.font = font
+
 class AppearanceManager:
     """Gerencia configurações de aparência da aplicação"""
     
@@ -19,6 +29,35 @@ class AppearanceManager:
         'theme': 'Claro'
     }
     
+    # Tons usados pelos estilos nomeados (propriedade "tone" dos widgets)
+    TONES = {
+        'danger': '#dc3545',
+        'success': '#28a745',
+        'warning': '#ffc107',
+        'primary': '#007bff',
+        'info': '#17a2b8',
+        'secondary': '#6c757d',
+    }
+    
+    # Superfícies dos componentes por tema (Automático usa as do tema claro)
+    COMPONENT_COLORS = {
+        'Claro': {'muted': '#666666', 'card': '#ffffff', 'header': '#f8f9fa', 'border': '#dee2e6',
+                  'row_border': '#eeeeee', 'highlight': '#e8f4fd'},
+        'Escuro': {'muted': '#aaaaaa', 'card': '#404040', 'header': '#505050', 'border': '#606060',
+                   'row_border': '#555555', 'highlight': '#2f4a63'},
+    }
+    
+    # Cores base de cada tema aplicadas via QPalette (Claro usa as cores das configurações)
+    THEME_PALETTES = {
+        'Escuro': {'window': '#2b2b2b', 'text': '#ffffff', 'base': '#404040', 'alternate': '#4a4a4a',
+                   'button': '#505050'},
+    }
+    
+    _component_styles = {}  # Tema -> stylesheet dos componentes já compilado
+    _stylesheets = {}       # (tema, cor primária, alto contraste, cores base) -> stylesheet completa
+    _themes = {}            # Hash das configurações -> ThemeArtifacts
+    _applied = None         # Artefatos atualmente aplicados na aplicação
+    
     @classmethod
     def load_settings(cls):
         """Carrega configurações do arquivo"""
@@ -55,47 +94,216 @@ class AppearanceManager:
     def apply_to_application(cls, settings, main_window=None):
         """Aplica configurações na aplicação"""
         try:
-            app = QApplication.instance()
-            
-            # Aplica fonte global
-            font = QFont(settings['font_family'], settings['font_size'])
-            app.setFont(font)
-            
-            if main_window:
-                # Aplica tema
-                if settings['theme'] == 'Escuro':
-                    dark_style = cls.get_dark_theme_style(settings)
-                    main_window.setStyleSheet(dark_style)
-                elif settings['theme'] == 'Claro':
-                    light_style = cls.get_light_theme_style(settings)
-                    main_window.setStyleSheet(light_style)
-                
-                # Alto contraste
-                if settings['high_contrast']:
-                    contrast_style = cls.get_high_contrast_style(settings)
-                    main_window.setStyleSheet(main_window.styleSheet() + contrast_style)
-                
-                main_window.update()
-                main_window.repaint()
+            theme = cls.compile_theme(settings)
+            if main_window and main_window.styleSheet():
+                # Stylesheet na janela teria precedência sobre os estilos nomeados da aplicação
+                main_window.setStyleSheet("")
             
+            cls.install_theme(theme)
             return True
             
         except Exception as e:
             print(f"❌ Erro ao aplicar configurações: {e}")
             return False
     
+    @classmethod
+    def install_theme(cls, theme):
+        """Aplica só o que mudou em relação ao tema atual
+        
+        Trocar a stylesheet da aplicação re-polia todos os widgets; fonte e paleta apenas
+        propagam eventos de mudança. A fonte fica fora da stylesheet para que ajustar o
+        tamanho ou a família não precise trocá-la.
+        """
+        app = QApplication.instance()
+        applied = cls._applied
+        if applied is theme:
+            return
+        
+        if theme.font is not None and (applied is None or applied.font != theme.font):
+            app.setFont(theme.font)
+        if theme.palette is not None and (applied is None or applied.palette != theme.palette):
+            app.setPalette(theme.palette)
+        if applied is None or applied.stylesheet != theme.stylesheet:
+            app.setStyleSheet(theme.stylesheet)
+        
+        cls._applied = theme
+    
+    @classmethod
+    def apply_saved_settings(cls, main_window=None):
+        """Na inicialização: aplica a aparência salva ou, sem arquivo salvo, só os estilos nomeados"""
+        settings = cls.load_settings()
+        if os.path.exists(cls.CONFIG_FILE):
+            return cls.apply_to_application(settings, main_window)
+        
+        cls.install_theme(ThemeArtifacts(None, cls.get_component_style(settings['theme'])))
+        return True
+    
+    @classmethod
+    def settings_key(cls, settings):
+        """Hash das configurações de aparência (chave do cache de temas compilados)"""
+        relevant = {key: settings.get(key, default) for key, default in cls.DEFAULT_SETTINGS.items()}
+        payload = json.dumps(relevant, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def compile_theme(cls, settings):
+        """Stylesheet, paleta e fonte do tema, compilados uma vez por combinação de configurações"""
+        key = cls.settings_key(settings)
+        if key not in cls._themes:
+            cls._themes[key] = ThemeArtifacts(
+                key,
+                cls.build_stylesheet(settings),
+                cls.build_palette(settings),
+                QFont(settings['font_family'], settings['font_size'])
+            )
+        return cls._themes[key]
+    
+    @classmethod
+    def build_palette(cls, settings):
+        """Cores base do tema (fundo, texto, seleção) aplicadas via QPalette"""
+        palette = QApplication.style().standardPalette()
+        if settings['theme'] == 'Escuro':
+            colors = cls.THEME_PALETTES['Escuro']
+        elif settings['theme'] == 'Claro':
+            colors = {'window': settings['background_color'], 'text': settings['text_color'],
+                      'base': settings['background_color'], 'alternate': '#f5f5f5', 'button': '#f8f9fa'}
+        else:
+            colors = None
+        
+        if colors:
+            for roles, color in (((QPalette.Window,), colors['window']),
+                                 ((QPalette.WindowText, QPalette.Text, QPalette.ButtonText), colors['text']),
+                                 ((QPalette.Base,), colors['base']),
+                                 ((QPalette.AlternateBase,), colors['alternate']),
+                                 ((QPalette.Button,), colors['button'])):
+                for role in roles:
+                    palette.setColor(role, QColor(color))
+        
+        palette.setColor(QPalette.Highlight, QColor(settings['primary_color']))
+        palette.setColor(QPalette.HighlightedText, QColor('#ffffff'))
+        return palette
+    
+    @classmethod
+    def build_stylesheet(cls, settings):
+        """Stylesheet completa da aplicação: tema, alto contraste e estilos nomeados
+        
+        Depende do tema, da cor primária, do alto contraste e, no tema claro, das cores de
+        fundo e texto (no escuro elas são fixas).
+        """
+        base_colors = (settings['background_color'], settings['text_color']) if settings['theme'] == 'Claro' else None
+        key = (settings['theme'], settings['primary_color'], bool(settings['high_contrast']), base_colors)
+        if key in cls._stylesheets:
+            return cls._stylesheets[key]
+        
+        parts = []
+        if settings['theme'] == 'Escuro':
+            parts.append(cls.get_dark_theme_style(settings))
+        elif settings['theme'] == 'Claro':
+            parts.append(cls.get_light_theme_style(settings))
+        
+        if settings['high_contrast']:
+            parts.append(cls.get_high_contrast_style(settings))
+        
+        parts.append(cls.get_component_style(settings['theme']))
+        cls._stylesheets[key] = "".join(parts)
+        return cls._stylesheets[key]
+    
+    @classmethod
+    def get_component_style(cls, theme):
+        """Estilos nomeados (objectName/propriedades), compilados uma vez por tema"""
+        if theme not in cls._component_styles:
+            colors = cls.COMPONENT_COLORS.get(theme, cls.COMPONENT_COLORS['Claro'])
+            cls._component_styles[theme] = cls.build_component_style(colors)
+        return cls._component_styles[theme]
+    
+    @classmethod
+    def build_component_style(cls, colors):
+        """Monta os estilos nomeados usados pelas telas no lugar de setStyleSheet por widget"""
+        tone_rules = []
+        for tone, color in list(cls.TONES.items()) + [('muted', colors['muted'])]:
+            tone_rules.append(f"""
+        QLabel[tone="{tone}"] {{
+            color: {color};
+        }}
+        
+        QFrame#summaryCard[tone="{tone}"] {{
+            border-color: {color};
+        }}
+        """)
+        
+        button_rules = []
+        for variant, (color, hover) in {'primary': ('#007bff', '#0056b3'),
+                                        'success': ('#28a745', '#1e7e34'),
+                                        'secondary': ('#6c757d', '#545b62')}.items():
+            button_rules.append(f"""
+        QPushButton[variant="{variant}"] {{
+            background-color: {color};
+            color: white;
+            padding: 8px 15px;
+            border: none;
+            border-radius: 4px;
+        }}
+        
+        QPushButton[variant="{variant}"]:hover {{
+            background-color: {hover};
+        }}
+        """)
+        
+        return "".join(tone_rules) + "".join(button_rules) + f"""
+        QPushButton[compact="true"] {{
+            padding: 6px 12px;
+            font-weight: bold;
+        }}
+        
+        QLabel[padded="true"] {{
+            padding: 10px;
+        }}
+        
+        QFrame#summaryCard {{
+            background-color: {colors['card']};
+            border: 2px solid {colors['border']};
+            border-radius: 8px;
+            margin: 3px;
+        }}
+        
+        QLabel[stockCell="header"] {{
+            background-color: {colors['header']};
+            border: 1px solid {colors['border']};
+            padding: 12px;
+            font-size: 12px;
+        }}
+        
+        QLabel[stockCell="row"] {{
+            padding: 12px;
+            border-bottom: 1px solid {colors['row_border']};
+        }}
+        
+        QFrame#stockTotalFrame {{
+            background-color: {colors['highlight']};
+            border: 2px solid #007bff;
+            border-radius: 5px;
+            margin: 8px;
+        }}
+        """
+    
+    @staticmethod
+    def set_style_property(widget, name, value):
+        """Troca uma propriedade usada pelos estilos nomeados e re-polia só esse widget"""
+        if widget.property(name) == value:
+            return
+        widget.setProperty(name, value)
+        style = widget.style()
+        style.unpolish(widget)
+        style.polish(widget)
+    
     @classmethod
     def get_dark_theme_style(cls, settings):
         """Retorna stylesheet para tema escuro"""
+        # Fundo e texto gerais vêm da paleta (THEME_PALETTES)
         return f"""
-        QMainWindow {{
-            background-color: #2b2b2b;
-            color: #ffffff;
-        }}
-        
-        QWidget {{
-            background-color: #2b2b2b;
-            color: #ffffff;
+        QMainWindow, QWidget {{
+            background-color: palette(window);
+            color: palette(window-text);
         }}
         
         QTabWidget::pane {{
@@ -132,10 +340,6 @@ class AppearanceManager:
             background-color: #2b2b2b;
         }}
         
-        QLabel {{
-            color: #ffffff;
-        }}
-        
         QTableView {{
             background-color: #404040;
             color: #ffffff;
@@ -203,13 +407,9 @@ class AppearanceManager:
     @classmethod
     def get_light_theme_style(cls, settings):
         """Retorna stylesheet para tema claro"""
+        # **CORREÇÃO: Cores concretas; palette() só é resolvido ao polir o widget e setPalette não repinta**
         return f"""
-        QMainWindow {{
-            background-color: {settings['background_color']};
-            color: {settings['text_color']};
-        }}
-        
-        QWidget {{
+        QMainWindow, QWidget {{
             background-color: {settings['background_color']};
             color: {settings['text_color']};
         }}
@@ -0,0 +1,181 @@
+# benchmark.py - Compara representações de movimentos num replay de cálculo de estoque
+# Uso: python benchmark.py [--linhas 1000000] [--lojas 400]
+import sys
+import time
+import sqlite3
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from database import Database, Movement, INVENTORY_DATE, normalize_asset_name
+
+MOVEMENT_TYPES = ['Remessa', 'Regresso', 'Transferencia', 'Entrega', 'Retorno', 'Devolução de Entrega']
+
+def create_movements_db(rows, stores, seed=42):
+    """Banco em memória com movimentos sintéticos (mesmo esquema da tabela movimentos)"""
+    rng = np.random.default_rng(seed)
+    cds = ['CD HORTIFRUTI - Rio de Janeiro (RJ)', 'CD HORTIFRUTI - São Paulo (SP)', 'CD HORTIFRUTI - Viana (ES)']
+    store_names = [f'LOJA F{i:03d} - Bairro {i}' for i in range(stores)]
+    locations = np.array(cds + store_names, dtype=object)
+
+    days = pd.Timestamp('2025-06-01') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D')
+    frame = pd.DataFrame({
+        'guia': rng.integers(100000, 999999, rows).astype(str),
+        'transacao': 'T',
+        'local_origem': locations[rng.integers(0, len(locations), rows)],
+        'local_destino': locations[rng.integers(0, len(locations), rows)],
+        'tipo_movimento': np.array(MOVEMENT_TYPES, dtype=object)[rng.integers(0, len(MOVEMENT_TYPES), rows)],
+        'rti': np.array(['HB 618', 'HB618', 'HB 623', 'hb623'], dtype=object)[rng.integers(0, 4, rows)],
+        'nota_fiscal': '',
+        'quantidade': rng.integers(1, 200, rows),
+        'data_movimento': days.strftime('%Y-%m-%d'),
+    })
+
+    conn = sqlite3.connect(':memory:')
+    frame.to_sql('movimentos', conn, index=False)
+    return conn, set(store_names)
+
+def replay_rows(movimentos, inventory_date, lojas):
+    """Replay no formato anterior: sqlite3.Row indexado por nome de coluna a cada acesso"""
+    estoque = defaultdict(lambda: defaultdict(int))
+    for mov in movimentos:
+        qtde = mov['quantidade']
+        rti = mov['rti'].strip().upper().replace(' ', '') if mov['rti'] else 'N/A'
+        origem = mov['local_origem']
+        destino = mov['local_destino']
+        tipo = mov['tipo_movimento']
+        try:
+            data_mov = datetime.strptime(mov['data_movimento'], '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            continue
+
+        origem_loja = origem in lojas
+        destino_loja = destino in lojas
+        if not origem_loja and not destino_loja:
+            if tipo in ('Regresso', 'Entrega', 'Transferencia'):
+                estoque[destino][rti] += qtde
+            if tipo in ('Remessa', 'Retorno', 'Transferencia', 'Devolução de Entrega'):
+                estoque[origem][rti] -= qtde
+        elif data_mov >= inventory_date:
+            if destino_loja and tipo == 'Remessa':
+                estoque[destino][rti] += qtde
+            if origem_loja and tipo == 'Regresso':
+                estoque[origem][rti] -= qtde
+    return estoque
+
+def measure(label, load, replay, rows):
+    """Mede memória retida pela representação carregada e tempo de carga/replay"""
+    # Memória numa carga rastreada; tempos numa carga sem tracemalloc (que distorce o relógio)
+    tracemalloc.start()
+    data = load()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+
+    start = time.perf_counter()
+    data = load()
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = replay(data)
+    replay_time = time.perf_counter() - start
+
+    print(f"{label:<22} {retained / rows:>8.1f} B/linha   carga {load_time:>6.2f}s   replay {replay_time:>6.2f}s")
+    return result
+
+def run(rows, stores):
+    print(f"📊 Gerando {rows:,} movimentos sintéticos ({stores} lojas)...".replace(",", "."))
+    conn, lojas = create_movements_db(rows, stores)
+    inventory_date = datetime.strptime(INVENTORY_DATE, '%Y-%m-%d').date()
+    query = f"SELECT {', '.join(Movement.COLUMNS)} FROM movimentos"
+    db = Database(':memory:')
+
+    def load_rows():
+        conn.row_factory = sqlite3.Row
+        return conn.execute(query).fetchall()
+
+    def load_slotted():
+        conn.row_factory = None
+        return Movement.from_tuples(conn.execute(query))
+
+    def load_arrays():
+        conn.row_factory = None
+        frame = pd.read_sql_query(query, conn)
+        rows_count = len(frame)
+
+        # Origem e destino no mesmo espaço de códigos; ativos normalizados sobre os valores distintos
+        location_codes, location_names = pd.factorize(pd.concat([frame['local_origem'], frame['local_destino']]))
+        raw_assets, raw_names = pd.factorize(frame['rti'])
+        asset_codes, asset_names = pd.factorize(pd.Series([normalize_asset_name(name) for name in raw_names], dtype=object))
+        type_codes, type_names = pd.factorize(frame['tipo_movimento'])
+
+        return {
+            'origem': location_codes[:rows_count].astype(np.int32),
+            'destino': location_codes[rows_count:].astype(np.int32),
+            'locais': np.asarray(location_names, dtype=object),
+            'ativo': asset_codes[raw_assets].astype(np.int16),
+            'ativos': np.asarray(asset_names, dtype=object),
+            'tipo': type_codes.astype(np.int8),
+            'tipos': np.asarray(type_names, dtype=object),
+            'quantidade': frame['quantidade'].to_numpy(np.int32),
+            'data': pd.to_datetime(frame['data_movimento']).to_numpy('datetime64[D]'),
+        }
+
+    def replay_arrays(data):
+        """Mesmas regras de Database._apply_movements, vetorizadas com np.add.at"""
+        is_store = np.isin(data['locais'], list(lojas))
+        origem_loja = is_store[data['origem']]
+        destino_loja = is_store[data['destino']]
+
+        def type_mask(names):
+            return np.isin(data['tipos'], names)[data['tipo']]
+
+        cd_rows = ~origem_loja & ~destino_loja
+        store_rows = ~cd_rows & (data['data'] >= np.datetime64(INVENTORY_DATE))
+        entrada = np.where(cd_rows, type_mask(['Regresso', 'Entrega', 'Transferencia']),
+                           store_rows & destino_loja & type_mask(['Remessa']))
+        saida = np.where(cd_rows, type_mask(['Remessa', 'Retorno', 'Transferencia', 'Devolução de Entrega']),
+                         store_rows & origem_loja & type_mask(['Regresso']))
+
+        balances = np.zeros((len(data['locais']), len(data['ativos'])), dtype=np.int64)
+        np.add.at(balances, (data['destino'][entrada], data['ativo'][entrada]), data['quantidade'][entrada])
+        np.subtract.at(balances, (data['origem'][saida], data['ativo'][saida]), data['quantidade'][saida])
+
+        estoque = defaultdict(lambda: defaultdict(int))
+        touched = np.zeros_like(balances, dtype=bool)
+        touched[data['destino'][entrada], data['ativo'][entrada]] = True
+        touched[data['origem'][saida], data['ativo'][saida]] = True
+        for location, asset in zip(*np.nonzero(touched)):
+            estoque[data['locais'][location]][data['ativos'][asset]] = int(balances[location, asset])
+        return estoque
+
+    def replay_slotted(movements):
+        estoque = defaultdict(lambda: defaultdict(int))
+        db._apply_movements(estoque, movements, inventory_date, lojas)
+        return estoque
+
+    print(f"{'Representação':<22} {'Memória':>10}   {'Carga':>12}   {'Replay':>13}")
+    by_rows = measure('sqlite3.Row', load_rows, lambda data: replay_rows(data, inventory_date, lojas), rows)
+    by_slots = measure('Movement (__slots__)', load_slotted, replay_slotted, rows)
+    by_arrays = measure('Arrays tipados', load_arrays, replay_arrays, rows)
+
+    def as_dict(estoque):
+        return {location: dict(assets) for location, assets in estoque.items()}
+
+    same = as_dict(by_rows) == as_dict(by_slots) == as_dict(by_arrays)
+    print(f"{'✅' if same else '❌'} Resultados idênticos entre as três representações")
+
+    db.close()
+    conn.close()
+    return same
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark de memória/tempo das representações de movimentos")
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--lojas', type=int, default=400)
+    args = parser.parse_args()
+
+    sys.exit(0 if run(args.linhas, args.lojas) else 1)
@@ -3,11 +3,155 @@ import os
 import sys
 import subprocess
 import shutil
+import json
+import time
 import zipfile
+import tempfile
 from datetime import datetime
 
-def create_release():
-    """Cria release da aplicação com PyInstaller"""
+APP_NAME = "ControleEstoque_v0.0.4"
+
+# Rastreio de imports de sessões reais (python main.py --trace-imports) usado pelo modo rápido
+IMPORT_TRACE_FILE = "import_trace.json"
+
+# Histórico de tamanho e tempo de abertura de cada build (pasta releases)
+BUILD_METRICS_FILE = "build_metrics.json"
+
+# Pacotes cujos submódulos são podados no modo rápido quando nenhuma sessão rastreada os carregou
+PRUNABLE_PACKAGES = ('pandas', 'numpy', 'PyQt5', 'openpyxl')
+
+# Dependências opcionais que o PyInstaller arrastaria pelos imports condicionais do pandas
+OPTIONAL_PACKAGES = ('matplotlib', 'scipy', 'IPython', 'tkinter', 'pytest', 'jinja2', 'sqlalchemy',
+                     'pyarrow', 'numexpr', 'bottleneck', 'tables', 'lxml', 'bs4', 'html5lib',
+                     'xlrd', 'pyxlsb', 'odf', 'fsspec', 'zstandard')
+
+# Mantidos mesmo fora do rastreio: leitura de planilhas roda em processos filhos na importação
+# em lote (o rastreio só enxerga o processo principal), exportação Excel/CSV é caminho raro e o
+# cache parquet da importação só é lido depois da abertura (sem pyarrow cairia no pickle)
+ALWAYS_KEEP = ('openpyxl', 'pandas.io.excel', 'pandas.io.formats', 'pandas.io.parsers',
+               'pyarrow', 'pandas.io.parquet')
+
+def check_startup_budget(project_dir):
+    """Abre a aplicação com --startup-check (banco vazio em pasta temporária) e confere a meta de inicialização"""
+    print("⏱️ Verificando tempo de inicialização...")
+    work_dir = tempfile.mkdtemp()
+    try:
+        result = subprocess.run(
+            [sys.executable, os.path.join(project_dir, "main.py"), "--startup-check"],
+            cwd=work_dir, capture_output=True, text=True, timeout=120
+        )
+        print(result.stdout)
+        return result.returncode == 0
+    except subprocess.TimeoutExpired:
+        print("❌ A aplicação não abriu em 120 s")
+        return False
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def load_import_trace(project_dir):
+    """Módulos carregados nas sessões rastreadas (None se ainda não houver rastreio)"""
+    trace_path = os.path.join(project_dir, IMPORT_TRACE_FILE)
+    if not os.path.exists(trace_path):
+        return None
+    
+    with open(trace_path, 'r', encoding='utf-8') as f:
+        trace = json.load(f)
+    print(f"📝 Rastreio de imports: {len(trace['modulos'])} módulos em {trace['sessoes']} sessões")
+    return set(trace['modulos'])
+
+def find_excluded_modules(traced_modules, max_depth=2):
+    """Submódulos dos PRUNABLE_PACKAGES e pacotes opcionais que nenhuma sessão rastreada carregou
+    
+    Percorre os pacotes pelo sistema de arquivos (sem importá-los); só desce em subpacotes usados
+    e para em max_depth: módulos internos carregados sob demanda (ex: pandas.core.reshape pelo
+    unstack da análise de CD) ficam dentro de subpacotes mantidos inteiros.
+    """
+    import pkgutil
+    import importlib.util
+    
+    def is_kept(name):
+        if name in traced_modules:
+            return True
+        # Mantém o próprio módulo, seus submódulos e os pacotes que levam até ele
+        return any(name == keep or name.startswith(keep + '.') or keep.startswith(name + '.')
+                   for keep in ALWAYS_KEEP)
+    
+    excluded = [package for package in OPTIONAL_PACKAGES if not is_kept(package)]
+    
+    pending = []
+    for package in PRUNABLE_PACKAGES:
+        spec = importlib.util.find_spec(package)
+        if package in traced_modules and spec and spec.submodule_search_locations:
+            pending.append((package, list(spec.submodule_search_locations), 1))
+    
+    while pending:
+        package, paths, depth = pending.pop()
+        for info in pkgutil.iter_modules(paths):
+            name = f"{package}.{info.name}"
+            if not is_kept(name):
+                excluded.append(name)
+            elif info.ispkg and depth < max_depth:
+                pending.append((name, [os.path.join(path, info.name) for path in paths], depth + 1))
+    
+    return sorted(excluded)
+
+def bundle_size(path):
+    """Tamanho em bytes do executável (arquivo único) ou da pasta do pacote"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+def measure_build(executable, bundle_path, runs=3):
+    """Tamanho do pacote e tempo de abertura do executável (--startup-check: da partida do processo à primeira pintura)"""
+    times = []
+    within_budget = False
+    work_dir = tempfile.mkdtemp()
+    try:
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = subprocess.run([executable, "--startup-check"], cwd=work_dir, capture_output=True, timeout=120)
+            times.append((time.perf_counter() - start) * 1000)
+            within_budget = result.returncode == 0
+    except subprocess.TimeoutExpired:
+        print("❌ O executável não abriu em 120 s")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    return {
+        'tamanho_mb': round(bundle_size(bundle_path) / 1024 / 1024, 1),
+        'abertura_fria_ms': round(times[0]) if times else None,
+        'abertura_mediana_ms': round(sorted(times)[len(times) // 2]) if times else None,
+        'dentro_da_meta': within_budget
+    }
+
+def report_build_metrics(release_dir, metrics):
+    """Mostra as medidas do build (com o anterior do outro modo para comparação) e guarda no histórico"""
+    metrics_path = os.path.join(release_dir, BUILD_METRICS_FILE)
+    history = []
+    if os.path.exists(metrics_path):
+        with open(metrics_path, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+    
+    def describe(entry):
+        mode = "pasta (rápido)" if entry['modo'] == 'rapido' else "arquivo único"
+        return (f"{mode}: {entry['tamanho_mb']:.1f} MB | abertura fria {entry['abertura_fria_ms']} ms"
+                f" | mediana {entry['abertura_mediana_ms']} ms | {entry['modulos_excluidos']} módulos excluídos")
+    
+    print(f"📊 Build {describe(metrics)}")
+    previous = [entry for entry in history if entry['modo'] != metrics['modo']]
+    if previous:
+        print(f"   Último build {describe(previous[-1])}")
+    
+    history.append(metrics)
+    with open(metrics_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=2, ensure_ascii=False)
+
+def create_release(fast=False):
+    """Cria release da aplicação com PyInstaller
+    
+    fast=True gera um pacote em pasta (sem extrair tudo para um diretório temporário a cada
+    abertura), sem os fontes duplicados e sem os módulos que as sessões rastreadas não usaram.
+    """
     
     print("🚀 Iniciando criação do release v0.0.4...")
     
@@ -23,26 +167,53 @@ def create_release():
     if not os.path.exists(release_dir):
         os.makedirs(release_dir)
     
+    # **NOVO: Meta de inicialização verificada antes de empacotar**
+    if not check_startup_budget(project_dir):
+        print("❌ Inicialização acima da meta (veja o perfil acima)")
+        return False
+    
     print("📦 Executando PyInstaller...")
     
-    # **CORREÇÃO: Comando PyInstaller melhorado**
-    pyinstaller_cmd = [
-        "pyinstaller",
-        "--onefile",
-        "--windowed",
-        "--name", "ControleEstoque_v0.0.4",
-        "--add-data", "*.py;.",
-        "--add-data", "*.json;.",
+    hidden_imports = [
         "--hidden-import", "PyQt5.QtWidgets",
         "--hidden-import", "PyQt5.QtCore", 
         "--hidden-import", "PyQt5.QtGui",
         "--hidden-import", "pandas",
         "--hidden-import", "requests",
-        "--clean",
-        "--noconfirm",
-        "main.py"
     ]
     
+    excluded_modules = []
+    if fast:
+        traced_modules = load_import_trace(project_dir)
+        if traced_modules is None:
+            print(f"❌ {IMPORT_TRACE_FILE} não encontrado")
+            print("💡 Execute 'python main.py --trace-imports', use importação, fluxos e exportações e feche a aplicação")
+            return False
+        
+        excluded_modules = find_excluded_modules(traced_modules)
+        print(f"✂️ {len(excluded_modules)} módulos não usados nas sessões rastreadas serão excluídos")
+        
+        # **OTIMIZAÇÃO: Pasta em vez de arquivo único (nada é extraído a cada abertura)**
+        # Os fontes já vão compilados no pacote; --add-data *.py os duplicava
+        pyinstaller_cmd = ["pyinstaller", "--onedir", "--windowed", "--name", APP_NAME] + hidden_imports
+        for module in excluded_modules:
+            pyinstaller_cmd += ["--exclude-module", module]
+        pyinstaller_cmd += ["--clean", "--noconfirm", "main.py"]
+    else:
+        # **CORREÇÃO: Comando PyInstaller melhorado**
+        pyinstaller_cmd = [
+            "pyinstaller",
+            "--onefile",
+            "--windowed",
+            "--name", APP_NAME,
+            "--add-data", "*.py;.",
+            "--add-data", "*.json;.",
+        ] + hidden_imports + [
+            "--clean",
+            "--noconfirm",
+            "main.py"
+        ]
+    
     try:
         result = subprocess.run(pyinstaller_cmd, check=True, capture_output=True, text=True)
         print("✅ PyInstaller executado com sucesso!")
@@ -52,8 +223,24 @@ def create_release():
         print(f"Output: {e.output}")
         return False
     
-    # **CORREÇÃO: Cria arquivo ZIP para distribuição**
+    # Arquivo único em dist/ ou, no modo rápido, pasta dist/<nome>/ com o executável dentro
     version = "0.0.4"
+    bundle_path = os.path.join(dist_dir, APP_NAME) if fast else os.path.join(dist_dir, f"{APP_NAME}.exe")
+    exe_path = os.path.join(bundle_path, f"{APP_NAME}.exe") if fast else bundle_path
+    if not os.path.exists(exe_path):
+        print(f"❌ Executável não encontrado: {exe_path}")
+        return False
+    
+    # **NOVO: Tamanho e tempo de abertura medidos e registrados a cada build**
+    metrics = measure_build(exe_path, bundle_path)
+    metrics.update({
+        'data': datetime.now().strftime("%d/%m/%Y %H:%M"),
+        'modo': 'rapido' if fast else 'arquivo_unico',
+        'modulos_excluidos': len(excluded_modules)
+    })
+    report_build_metrics(release_dir, metrics)
+    
+    # **CORREÇÃO: Cria arquivo ZIP para distribuição**
     timestamp = datetime.now().strftime("%Y%m%d_%H%M")
     zip_filename = f"ControleEstoque_v{version}_{timestamp}.zip"
     zip_path = os.path.join(release_dir, zip_filename)
@@ -61,14 +248,17 @@ def create_release():
     print(f"📁 Criando arquivo de distribuição: {zip_filename}")
     
     with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        # Adiciona executável
-        exe_path = os.path.join(dist_dir, f"ControleEstoque_v{version}.exe")
-        if os.path.exists(exe_path):
-            zipf.write(exe_path, f"ControleEstoque_v{version}.exe")
-            print(f"✅ Executável adicionado: {exe_path}")
+        # Adiciona executável (ou a pasta inteira no modo rápido)
+        if fast:
+            for root, _, files in os.walk(bundle_path):
+                for name in files:
+                    file_path = os.path.join(root, name)
+                    zipf.write(file_path, os.path.relpath(file_path, dist_dir))
+            run_instructions = f"Abra a pasta {APP_NAME} e execute {APP_NAME}.exe"
         else:
-            print(f"❌ Executável não encontrado: {exe_path}")
-            return False
+            zipf.write(exe_path, f"ControleEstoque_v{version}.exe")
+            run_instructions = f"Execute o arquivo ControleEstoque_v{version}.exe"
+        print(f"✅ Executável adicionado: {exe_path}")
         
         # **CORREÇÃO: README melhorado**
         readme_content = f"""
@@ -88,7 +278,7 @@ Sistema de Controle de Caixas v{version}
 
 📥 INSTALAÇÃO:
 1. Extraia este arquivo em uma pasta de sua escolha
-2. Execute o arquivo ControleEstoque_v{version}.exe
+2. {run_instructions}
 3. Na primeira execução, configure o inventário inicial
 
 💻 REQUISITOS:
@@ -122,9 +312,24 @@ Data de Build: {datetime.now().strftime("%d/%m/%Y %H:%M")}
     return True
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Cria o release do Sistema de Controle de Caixas")
+    parser.add_argument('--fast', action='store_true',
+                        help="pacote em pasta, sem módulos fora do rastreio de imports (abertura mais rápida)")
+    parser.add_argument('--startup-check', action='store_true',
+                        help="só confere a meta de inicialização, sem empacotar (usado no workflow de release)")
+    args = parser.parse_args()
+    
+    if args.startup_check:
+        if not check_startup_budget(os.path.dirname(os.path.abspath(__file__))):
+            print("❌ Inicialização acima da meta (veja o perfil acima)")
+            sys.exit(1)
+        sys.exit(0)
+    
     print("🔨 Criando release para Sistema de Controle de Caixas v0.0.4")
     
-    if create_release():
+    if create_release(fast=args.fast):
         print("\n🎉 Release criado com sucesso!")
         print("\n📋 Próximos passos:")
         print("1. Teste o executável na pasta 'dist'")
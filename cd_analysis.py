@@ -0,0 +1,174 @@
+# cd_analysis.py - Análise de fluxo de um CD em pandas (sem dependência de Qt)
+import numpy as np
+import pandas as pd
+
+# **REGRAS DE FLUXO: categoria -> (lado do CD, tipo da contraparte, tipos de movimento)**
+# A ordem importa: cada linha do cubo cai na primeira regra cujo lado/contraparte combina
+FLOW_RULES = {
+    'saidas': ('origem', 'loja', ('Remessa',)),
+    'entradas': ('destino', 'loja', ('Regresso',)),
+    'transferencias_out': ('origem', 'cd', ('Transferencia', 'Remessa')),
+    'transferencias_in': ('destino', 'cd', ('Transferencia', 'Entrega', 'Retorno')),
+}
+
+FLOW_COLUMNS = ['dia', 'categoria', 'local', 'ativo', 'quantidade']
+
+class _Codes:
+    """Coluna fatorada uma vez: testes de pertencimento comparam só os valores distintos"""
+
+    def __init__(self, series):
+        self.codes, uniques = pd.factorize(series)
+        self.uniques = np.asarray(uniques, dtype=object)
+
+    def isin(self, values):
+        allowed = np.append(np.isin(self.uniques, list(values)), False)  # Código -1 = nulo
+        return allowed[self.codes]
+
+def classify_flows(cube, cd_name):
+    """Classifica as linhas do cubo do CD em categorias de fluxo numa única passada vetorizada
+
+    Retorna DataFrame com dia, categoria, local (contraparte), ativo e quantidade.
+    """
+    if cube.empty:
+        return pd.DataFrame({column: pd.Series(dtype='datetime64[ns]' if column == 'dia' else object)
+                             for column in FLOW_COLUMNS})
+
+    columns = {column: _Codes(cube[column])
+               for column in ('origem', 'destino', 'tipo', 'tipo_origem', 'tipo_destino')}
+
+    is_out = columns['origem'].isin([cd_name])
+    is_in = columns['destino'].isin([cd_name])
+    on_side = {'origem': is_out, 'destino': is_in}
+    counterpart = {'origem': 'tipo_destino', 'destino': 'tipo_origem'}  # CD na origem: contraparte é o destino
+
+    conditions = []
+    categories = []
+    for category, (side, kind, _) in FLOW_RULES.items():
+        conditions.append(on_side[side] & columns[counterpart[side]].isin([kind]))
+        categories.append(category)
+
+    # np.select usa a primeira condição verdadeira (mesma precedência do if/elif original)
+    branch = np.select(conditions, range(len(categories)), default=-1)
+
+    keep = np.zeros(len(cube), dtype=bool)
+    for index, (_, _, movement_types) in enumerate(FLOW_RULES.values()):
+        keep |= (branch == index) & columns['tipo'].isin(movement_types)
+
+    branch = branch[keep]
+    flows = pd.DataFrame({
+        'dia': cube['dia'].to_numpy()[keep],
+        'categoria': np.array(categories, dtype=object)[branch],
+        'local': np.where(is_out[keep], cube['destino'].to_numpy()[keep], cube['origem'].to_numpy()[keep]),
+        'ativo': cube['ativo'].to_numpy()[keep],
+        'quantidade': cube['quantidade'].to_numpy()[keep],
+    })
+    # datetime64 mantém max/nunique nos caminhos nativos do pandas; linhas sem data viram NaT
+    flows['dia'] = pd.to_datetime(flows['dia'], format='%Y-%m-%d', errors='coerce')
+    return flows
+
+class CDAnalysis:
+    """Análise de um CD: quantidades por contraparte/ativo, datas e série diária"""
+
+    def __init__(self, cd_name, cube):
+        self.cd_name = cd_name
+        self.flows = classify_flows(cube, cd_name)
+
+        # Agregações base (uma groupby cada), fatiadas por categoria sob demanda
+        self.quantities = self.flows.groupby(['categoria', 'local', 'ativo'])['quantidade'].sum()
+        self.activity = self.flows.groupby(['categoria', 'local'])['dia'].agg(['max', 'nunique'])
+
+    def by_location(self, category, asset_codes=None):
+        """Tabela contraparte x ativo (colunas do catálogo quando informadas)"""
+        if category not in self.quantities.index.get_level_values(0):
+            table = pd.DataFrame(dtype='int64')
+        else:
+            table = self.quantities.loc[category].unstack('ativo', fill_value=0)
+
+        if asset_codes is not None:
+            table = table.reindex(columns=asset_codes, fill_value=0)
+        return table
+
+    def asset_totals(self, category):
+        """Total por ativo da categoria"""
+        if category not in self.quantities.index.get_level_values(0):
+            return pd.Series(dtype='int64')
+        return self.quantities.loc[category].groupby(level='ativo').sum()
+
+    def total(self, category):
+        return int(self.asset_totals(category).sum())
+
+    def last_dates(self, *categories):
+        """Data mais recente por contraparte (considerando todas as categorias informadas)"""
+        selected = self.activity[self.activity.index.get_level_values(0).isin(categories)]
+        return selected['max'].groupby(level='local').max().dropna().dt.strftime('%Y-%m-%d')
+
+    def frequency(self, category):
+        """Número de dias com movimento por contraparte"""
+        if category not in self.activity.index.get_level_values(0):
+            return pd.Series(dtype='int64')
+        return self.activity.loc[category, 'nunique']
+
+    def daily_series(self):
+        """Série diária: dia x categoria com as quantidades"""
+        dated = self.flows.dropna(subset=['dia'])
+        series = dated.pivot_table(index='dia', columns='categoria', values='quantidade',
+                                   aggfunc='sum', fill_value=0)
+        series = series.reindex(columns=list(FLOW_RULES), fill_value=0).sort_index()
+        series.index = series.index.strftime('%Y-%m-%d')
+        return series
+
+    def export_sheets(self, asset_codes):
+        """Planilhas da exportação da análise (nome da aba -> DataFrame)"""
+        sheets = {}
+
+        sheets['Resumo'] = pd.DataFrame([
+            {'Métrica': 'Total de Saídas', 'Valor': self.total('saidas'), 'Descrição': 'Remessas para lojas'},
+            {'Métrica': 'Total de Retornos', 'Valor': self.total('entradas'), 'Descrição': 'Regressos das lojas'},
+            {'Métrica': 'Transferências',
+             'Valor': self.total('transferencias_out') + self.total('transferencias_in'),
+             'Descrição': 'Entre CDs'},
+        ])
+
+        for category, sheet_name, first_column, date_column in (
+                ('saidas', 'Saídas_Detalhadas', 'Loja', 'Última_Remessa'),
+                ('entradas', 'Retornos_Detalhados', 'Loja', 'Último_Regresso')):
+            table = self.by_location(category, asset_codes)
+            if table.empty:
+                continue
+            table['Total'] = table.sum(axis=1)
+            table[date_column] = self.last_dates(category).reindex(table.index).fillna('N/A')
+            sheets[sheet_name] = table.rename_axis(first_column).reset_index()
+
+        transfers = []
+        for category, label in (('transferencias_out', 'Saída'), ('transferencias_in', 'Entrada')):
+            table = self.by_location(category, asset_codes)
+            if table.empty:
+                continue
+            table['Total'] = table.sum(axis=1)
+            table = table.rename_axis('CD_Relacionado').reset_index()
+            table.insert(0, 'Tipo', label)
+            transfers.append(table)
+        if transfers:
+            sheets['Transferências'] = pd.concat(transfers, ignore_index=True)
+
+        daily = self.daily_series()
+        if not daily.empty:
+            sheets['Série_Diária'] = daily.rename_axis('Data').reset_index()
+
+        return sheets
+
+def analyze_cd(db, cd_name):
+    """Carrega o cubo do CD e monta a análise"""
+    return CDAnalysis(cd_name, db.get_cube_dataframe(cd_name))
+
+def export_cd_analysis(db, cd_name, file_path, asset_codes=None):
+    """Gera a planilha da análise do CD (usada pela tela e por rotinas sem interface)"""
+    analysis = analyze_cd(db, cd_name)
+    if asset_codes is None:
+        asset_codes = db.get_asset_codes()
+
+    with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
+        for sheet_name, frame in analysis.export_sheets(asset_codes).items():
+            frame.to_excel(writer, sheet_name=sheet_name, index=False)
+
+    return analysis
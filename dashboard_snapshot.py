@@ -0,0 +1,90 @@
+# dashboard_snapshot.py - Último estado do painel salvo em disco para abrir a janela sem esperar o banco
+import os
+import json
+from datetime import datetime
+from PyQt5.QtCore import QThread, pyqtSignal
+from database import Database
+
+class DashboardSnapshot:
+    """Saldos por CD/região/ativo, lista de locais e contagens do último cálculo do painel"""
+
+    SNAPSHOT_FILE = "dashboard_snapshot.json"
+    FORMAT_VERSION = 1  # Incrementar quando o conteúdo do arquivo mudar de formato
+
+    @classmethod
+    def build(cls, db, data_version=None):
+        """Monta o snapshot a partir do banco (saldos já consolidados, consultas rápidas)"""
+        overview = db.get_stock_overview()
+        return {
+            'formato': cls.FORMAT_VERSION,
+            'banco': os.path.abspath(db.db_name),
+            'versao_dados': data_version if data_version is not None else db.get_data_version(),
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'overview': {
+                'cds': {cd_name: dict(balances) for cd_name, balances in overview['cds'].items()},
+                'regioes': {regiao: dict(balances) for regiao, balances in overview['regioes'].items()},
+                'total_lojas': dict(overview['total_lojas'])
+            },
+            'ativos': db.get_assets(),
+            'locais': {'cd': db.get_all_locations('cd'), 'loja': db.get_all_locations('loja')},
+            'contagens': db.get_status_counts()
+        }
+
+    @classmethod
+    def load(cls, db_name):
+        """Snapshot salvo para este banco (None se não existir, for de outro banco ou de outro formato)"""
+        try:
+            if not os.path.exists(cls.SNAPSHOT_FILE):
+                return None
+
+            with open(cls.SNAPSHOT_FILE, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+
+            if snapshot.get('formato') != cls.FORMAT_VERSION or snapshot.get('banco') != os.path.abspath(db_name):
+                return None
+            return snapshot
+
+        except Exception as e:
+            print(f"⚠️ Snapshot do painel ignorado: {e}")
+            return None
+
+    @classmethod
+    def save(cls, snapshot):
+        """Salva o snapshot (arquivo temporário + replace: leitura nunca vê um JSON pela metade)"""
+        try:
+            temp_file = cls.SNAPSHOT_FILE + ".tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(temp_file, cls.SNAPSHOT_FILE)
+            return True
+        except Exception as e:
+            print(f"❌ Erro ao salvar snapshot do painel: {e}")
+            return False
+
+class DashboardRefreshWorker(QThread):
+    """Confere o snapshot exibido com a versão atual dos dados e recalcula se estiver desatualizado"""
+    refreshed = pyqtSignal(object)  # Snapshot novo, ou None quando o exibido continua válido
+    failed = pyqtSignal(str)
+
+    def __init__(self, db_name, known_version):
+        super().__init__()
+        self.db_name = db_name
+        self.known_version = known_version
+
+    def run(self):
+        # **CORREÇÃO: Conexão própria, o cursor da janela principal não é compartilhado entre threads**
+        db = Database(self.db_name)
+        try:
+            data_version = db.get_data_version()
+            if data_version == self.known_version:
+                self.refreshed.emit(None)
+                return
+
+            snapshot = DashboardSnapshot.build(db, data_version)
+            DashboardSnapshot.save(snapshot)
+            self.refreshed.emit(snapshot)
+        except Exception as e:
+            print(f"❌ Falha ao atualizar o painel em segundo plano: {e}")
+            self.failed.emit(str(e))
+        finally:
+            db.close()
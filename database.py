@@ -1,8 +1,118 @@
 # database.py - Versão corrigida com cálculos adequados
+import re
 import sqlite3
-import pandas as pd
+from array import array
 from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+
+def normalize_asset_name(asset_name):
+    """Remove espaços e padroniza nome do ativo (HB 618 -> HB618)"""
+    if not asset_name:
+        return 'N/A'
+    return str(asset_name).strip().upper().replace(' ', '')
+
+class Movement:
+    """Movimento compacto para os laços de cálculo (__slots__: sem dicionário por instância)
+
+    Ativo normalizado e data convertida uma única vez na criação; os laços leem atributos
+    em vez de indexar sqlite3.Row/dicionários por nome de coluna.
+    """
+    __slots__ = ('origem', 'destino', 'tipo', 'ativo', 'quantidade', 'data')
+
+    # Ordem das colunas esperada por from_tuples (SELECT e DataFrame)
+    COLUMNS = ['local_origem', 'local_destino', 'tipo_movimento', 'rti', 'quantidade', 'data_movimento']
+
+    def __init__(self, origem, destino, tipo, ativo, quantidade, data):
+        self.origem = origem
+        self.destino = destino
+        self.tipo = tipo
+        self.ativo = ativo
+        self.quantidade = quantidade
+        self.data = data
+
+    @staticmethod
+    def parse_date(value):
+        """Data do movimento como date (None quando ausente ou inválida)"""
+        if isinstance(value, str):
+            try:
+                return date.fromisoformat(value)
+            except ValueError:
+                return None
+        if isinstance(value, datetime):
+            return value.date()
+        return value if isinstance(value, date) else None
+
+    @classmethod
+    def from_tuples(cls, rows):
+        """Converte tuplas na ordem de COLUMNS
+
+        Valores repetidos (locais, tipos, ativos, datas) são convertidos uma vez e compartilhados
+        entre os movimentos, em vez de um objeto novo por linha.
+        """
+        shared = {}
+        assets = {}
+        dates = {}
+        movements = []
+        for origem, destino, tipo, rti, quantidade, data_mov in rows:
+            ativo = assets.get(rti)
+            if ativo is None:
+                ativo = assets[rti] = normalize_asset_name(rti)
+            data = dates.get(data_mov)
+            if data is None:
+                data = dates[data_mov] = cls.parse_date(data_mov)
+            movements.append(cls(shared.setdefault(origem, origem), shared.setdefault(destino, destino),
+                                 shared.setdefault(tipo, tipo), ativo, quantidade, data))
+        return movements
+
+# Ativos cadastrados na criação do banco (novos ativos são adicionados pela tela de Ferramentas)
+DEFAULT_ASSETS = [
+    ('HB618', 'HB 618', 'Caixa plástica HB 618'),
+    ('HB623', 'HB 623', 'Caixa plástica HB 623'),
+]
+
+# Data do inventário inicial das lojas: movimentos de loja só contam a partir dela
+INVENTORY_DATE = '2025-06-08'
+
+STORE_CODE_PATTERN = re.compile(r'^LOJA\s+([A-Z]\d+)\b')
+REGION_PATTERN = re.compile(r'\(([A-Z]{2})\)\s*$')
+
+def extract_simple_name(loja_completa):
+    """Extrai nome simples da loja completa"""
+    # Exemplo: "LOJA F036 - Recreio A5" -> "RECREIO A5"
+    if ' - ' in loja_completa:
+        return loja_completa.split(' - ')[1].strip().upper()
+    elif loja_completa.startswith('LOJA '):
+        # Remove "LOJA " e possíveis códigos como "F036 - "
+        resto = loja_completa.replace('LOJA ', '').strip()
+        return re.sub(r'^[A-Z]\d+\s*-?\s*', '', resto).strip().upper()
+    return loja_completa.upper()
+
+def classify_location(location_name):
+    """Deriva tipo, código da loja, nome simples e região do nome completo do local"""
+    name = str(location_name).strip()
+    upper_name = name.upper()
+    first_word = upper_name.split()[0] if upper_name.split() else ''
+
+    # **CORREÇÃO: Compara a primeira palavra (substring 'CD' classificava lojas como CD)**
+    if first_word == 'LOJA':
+        code_match = STORE_CODE_PATTERN.match(upper_name)
+        return {
+            'tipo': 'loja',
+            'codigo_loja': code_match.group(1) if code_match else None,
+            'nome_simples': extract_simple_name(name),
+            'regiao': None  # Herdada do CD que abastece a loja
+        }
+
+    if first_word == 'CD':
+        region_match = REGION_PATTERN.search(upper_name)
+        return {
+            'tipo': 'cd',
+            'codigo_loja': None,
+            'nome_simples': upper_name,
+            'regiao': region_match.group(1) if region_match else None
+        }
+
+    return {'tipo': 'outro', 'codigo_loja': None, 'nome_simples': upper_name, 'regiao': None}
 
 class Database:
     def __init__(self, db_name="estoque.db"):
@@ -33,9 +143,112 @@ class Database:
             UNIQUE(loja_nome_simples, ativo)
         )
         """)
+        
+        # Arquivos já importados pela pasta monitorada (chave = hash do conteúdo)
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS arquivos_importados (
+            hash TEXT PRIMARY KEY,
+            nome_arquivo TEXT,
+            tipo TEXT,
+            linhas INTEGER,
+            importado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        
+        # Catálogo de locais: atributos derivados uma única vez na importação
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS locais (
+            nome TEXT PRIMARY KEY,
+            tipo TEXT NOT NULL,
+            codigo_loja TEXT,
+            nome_simples TEXT,
+            cd_pai TEXT,
+            regiao TEXT,
+            inventario_match TEXT
+        )
+        """)
+        # Catálogo de ativos retornáveis (define abas, validação e colunas das análises)
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ativos (
+            codigo TEXT PRIMARY KEY,
+            nome TEXT NOT NULL,
+            descricao TEXT,
+            ordem INTEGER DEFAULT 0,
+            habilitado INTEGER DEFAULT 1
+        )
+        """)
+        if not self._execute_query("SELECT 1 FROM ativos LIMIT 1"):
+            self.cursor.executemany(
+                "INSERT INTO ativos (codigo, nome, descricao, ordem) VALUES (?, ?, ?, ?)",
+                [(codigo, nome, descricao, ordem) for ordem, (codigo, nome, descricao) in enumerate(DEFAULT_ASSETS)]
+            )
+        
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_locais_tipo ON locais(tipo)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_locais_cd_pai ON locais(cd_pai)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_locais_regiao ON locais(regiao)")
+        # **OTIMIZAÇÃO: Local + data no mesmo índice; o histórico filtra o local e ordena/recorta o período por ele**
+        self.cursor.execute("DROP INDEX IF EXISTS idx_movimentos_origem")
+        self.cursor.execute("DROP INDEX IF EXISTS idx_movimentos_destino")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_movimentos_origem_data ON movimentos(local_origem, data_movimento)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_movimentos_destino_data ON movimentos(local_destino, data_movimento)")
+        
+        # Cubo de movimentos (dia x origem x destino x ativo x tipo) para as telas de análise
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS movimentos_cubo (
+            dia TEXT NOT NULL,
+            origem TEXT NOT NULL,
+            destino TEXT NOT NULL,
+            ativo TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            n INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, origem, destino, ativo, tipo)
+        )
+        """)
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_cubo_origem ON movimentos_cubo(origem, dia)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_cubo_destino ON movimentos_cubo(destino, dia)")
+        
+        # Saldos por local/ativo, mantidos incrementalmente a cada importação
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS saldos (
+            local TEXT,
+            ativo TEXT,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (local, ativo)
+        )
+        """)
+        
+        # Agregados da hierarquia região -> CD -> loja (nivel: 'lojas', 'regiao' ou 'cd')
+        # e total de cada ativo na rede inteira (nivel 'ativo')
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS saldos_resumo (
+            nivel TEXT,
+            chave TEXT,
+            ativo TEXT,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (nivel, chave, ativo)
+        )
+        """)
         self.conn.commit()
+        
+        # Bancos criados antes do catálogo: preenche a partir dos movimentos existentes
+        has_movements = bool(self._execute_query("SELECT 1 FROM movimentos LIMIT 1"))
+        if has_movements and not self._execute_query("SELECT 1 FROM locais LIMIT 1"):
+            print("🔄 Preenchendo catálogo de locais a partir dos movimentos existentes...")
+            self.update_locations_catalog()
+        
+        if has_movements and not self._execute_query("SELECT 1 FROM saldos LIMIT 1"):
+            print("🔄 Calculando saldos iniciais...")
+            self.rebuild_balances()
+        elif has_movements and not self._execute_query("SELECT 1 FROM saldos_resumo WHERE nivel = 'ativo' LIMIT 1"):
+            self._rebuild_rollups()  # Bancos anteriores ao total por ativo
+            self.conn.commit()
+        
+        if has_movements and not self._execute_query("SELECT 1 FROM movimentos_cubo LIMIT 1"):
+            print("🔄 Montando cubo de movimentos...")
+            self.rebuild_movements_cube()
 
-    def insert_inventory_data(self, df: pd.DataFrame, inventory_date='2025-06-08'):
+    def insert_inventory_data(self, df: 'pd.DataFrame', inventory_date=INVENTORY_DATE):
         """Insere dados do inventário inicial DIRETAMENTE (sem mapeamento)"""
         print("=== INSERINDO INVENTÁRIO DIRETAMENTE ===")
         print(f"DataFrame recebido: {len(df)} linhas")
@@ -103,47 +316,413 @@ class Database:
 
     def extract_simple_name(self, loja_completa):
         """Extrai nome simples da loja completa"""
-        # Exemplo: "LOJA F036 - Recreio A5" -> "RECREIO A5"
-        if ' - ' in loja_completa:
-            return loja_completa.split(' - ')[1].strip().upper()
-        elif loja_completa.startswith('LOJA '):
-            # Remove "LOJA " e possíveis códigos
-            resto = loja_completa.replace('LOJA ', '').strip()
-            # Remove padrões como "F036 - " 
-            import re
-            resto = re.sub(r'^[A-Z]\d+\s*-?\s*', '', resto).strip().upper()
-            return resto
-        return loja_completa.upper()
-
-    def find_best_inventory_match(self, loja_completa):
+        return extract_simple_name(loja_completa)
+
+    def find_best_inventory_match(self, loja_completa, inventory_names=None):
         """Encontra melhor match entre loja completa e inventário usando Levenshtein"""
         loja_simples_extraida = self.extract_simple_name(loja_completa)
         
-        # Busca todas as lojas do inventário
-        inventory_lojas = self._execute_query("SELECT DISTINCT loja_nome_simples FROM inventario_inicial")
+        # Busca todas as lojas do inventário (ou usa a lista já carregada)
+        if inventory_names is None:
+            inventory_names = [row['loja_nome_simples'] for row in
+                               self._execute_query("SELECT DISTINCT loja_nome_simples FROM inventario_inicial")]
         
-        if not inventory_lojas:
+        if not inventory_names:
             return None
         
         best_match = None
         best_distance = float('inf')
         
-        print(f"Buscando match para '{loja_completa}' -> '{loja_simples_extraida}'")
-        
-        for row in inventory_lojas:
-            loja_inventario = row['loja_nome_simples']
+        for loja_inventario in inventory_names:
             distance = self.levenshtein_distance(loja_simples_extraida, loja_inventario)
             
-            print(f"  Comparando com '{loja_inventario}': distância = {distance}")
-            
             # Considera match se distância for baixa (ajuste conforme necessário)
             if distance < best_distance and distance <= 3:  # Máximo 3 caracteres diferentes
                 best_distance = distance
                 best_match = loja_inventario
         
-        print(f"  Melhor match: '{best_match}' (distância: {best_distance})")
+        print(f"Match inventário: '{loja_completa}' -> '{best_match}' (distância: {best_distance})")
         return best_match
 
+    def get_inventory_match(self, loja_completa):
+        """Nome do inventário associado à loja (calculado na importação e guardado no catálogo)"""
+        result = self._execute_query("SELECT inventario_match FROM locais WHERE nome = ?", (loja_completa,))
+        if result:
+            return result[0]['inventario_match']
+        return self.find_best_inventory_match(loja_completa)
+
+    def update_locations_catalog(self, location_names=None, commit=True):
+        """Cadastra locais novos e recalcula CD pai/região das lojas afetadas
+
+        commit=False: deixa a gravação na transação de quem chamou (importação de movimentos).
+        """
+        if location_names is None:
+            location_names = [row[0] for row in self._execute_query("""
+                SELECT local_origem FROM movimentos WHERE local_origem IS NOT NULL
+                UNION
+                SELECT local_destino FROM movimentos WHERE local_destino IS NOT NULL
+            """)]
+        
+        names = {name for name in location_names if name}
+        if not names:
+            return [], False
+        
+        known = {row[0] for row in self._execute_query("SELECT nome FROM locais")}
+        new_names = sorted(names - known)
+        
+        new_rows = []
+        for name in new_names:
+            info = classify_location(name)
+            new_rows.append((name, info['tipo'], info['codigo_loja'], info['nome_simples'], info['regiao']))
+        
+        self.cursor.executemany("""
+        INSERT OR IGNORE INTO locais (nome, tipo, codigo_loja, nome_simples, regiao)
+        VALUES (?, ?, ?, ?, ?)
+        """, new_rows)
+        
+        stores = [name for name in names if classify_location(name)['tipo'] == 'loja']
+        hierarchy_changed = self._update_parent_cds(stores, new_names)
+        
+        new_stores = [row[0] for row in new_rows if row[1] == 'loja']
+        self._update_inventory_matches(new_stores)
+        if commit:
+            self.conn.commit()
+        
+        if new_rows:
+            print(f"📍 Catálogo de locais: {len(new_rows)} novo(s) local(is)")
+        
+        return new_stores, hierarchy_changed
+
+    def _update_parent_cds(self, stores=None, new_stores=()):
+        """Define o CD que mais abastece cada loja (e a região herdada dele)
+        
+        Retorna True se alguma loja já cadastrada mudou de CD, inclusive de nenhum (NULL) para um
+        CD (agregados precisam ser refeitos). new_stores: lojas cadastradas agora, ainda sem saldo.
+        """
+        query = """
+        SELECT m.local_destino AS loja, m.local_origem AS cd, SUM(m.quantidade) AS total
+        FROM movimentos m
+        JOIN locais c ON c.nome = m.local_origem AND c.tipo = 'cd'
+        {where}
+        GROUP BY m.local_destino, m.local_origem
+        """
+        
+        if stores is None:
+            rows = self._execute_query(query.format(where=""))
+        else:
+            rows = []
+            stores = list(stores)
+            for start in range(0, len(stores), 500):  # Limite de parâmetros do SQLite
+                chunk = stores[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows.extend(self._execute_query(
+                    query.format(where=f"WHERE m.local_destino IN ({placeholders})"), tuple(chunk)
+                ))
+        
+        best = {}
+        for row in rows:
+            if row['loja'] not in best or row['total'] > best[row['loja']][1]:
+                best[row['loja']] = (row['cd'], row['total'])
+        
+        # **CORREÇÃO: Inclui lojas sem CD (NULL); o saldo delas estava agregado em 'N/D'**
+        new_stores = set(new_stores)
+        current = {row['nome']: row['cd_pai'] for row in
+                   self._execute_query("SELECT nome, cd_pai FROM locais WHERE tipo = 'loja'")}
+        changed = any(store in current and store not in new_stores and current[store] != cd
+                      for store, (cd, total) in best.items())
+        
+        self.cursor.executemany("""
+        UPDATE locais SET cd_pai = ?, regiao = (SELECT regiao FROM locais WHERE nome = ?)
+        WHERE nome = ? AND tipo = 'loja'
+        """, [(cd, cd, store) for store, (cd, total) in best.items()])
+        
+        return changed
+
+    def _update_inventory_matches(self, stores=None):
+        """Associa lojas ao inventário inicial uma única vez (Levenshtein é caro)"""
+        inventory_names = [row['loja_nome_simples'] for row in
+                           self._execute_query("SELECT DISTINCT loja_nome_simples FROM inventario_inicial")]
+        
+        if stores is None:
+            stores = [row['nome'] for row in self._execute_query("SELECT nome FROM locais WHERE tipo = 'loja'")]
+        
+        matches = [(self.find_best_inventory_match(store, inventory_names) if inventory_names else None, store)
+                   for store in stores]
+        self.cursor.executemany("UPDATE locais SET inventario_match = ? WHERE nome = ?", matches)
+
+    def rebuild_balances(self):
+        """Recalcula todos os saldos e agregados (usado após inventário ou limpeza)"""
+        estoque = self.calculate_stock_by_asset_with_inventory()
+        
+        self.cursor.execute("DELETE FROM saldos")
+        self.cursor.executemany(
+            "INSERT INTO saldos (local, ativo, quantidade) VALUES (?, ?, ?)",
+            [(local, ativo, qtde) for local, assets in estoque.items() if local for ativo, qtde in assets.items()]
+        )
+        self._rebuild_rollups()
+        self.conn.commit()
+
+    def _rebuild_rollups(self):
+        """Refaz os agregados da hierarquia a partir da tabela de saldos (pequena)"""
+        self.cursor.execute("DELETE FROM saldos_resumo")
+        self.cursor.execute("""
+        INSERT INTO saldos_resumo (nivel, chave, ativo, quantidade)
+        SELECT 'lojas', 'TOTAL', s.ativo, SUM(s.quantidade)
+        FROM saldos s JOIN locais l ON l.nome = s.local AND l.tipo = 'loja'
+        GROUP BY s.ativo
+        UNION ALL
+        SELECT 'regiao', COALESCE(l.regiao, 'N/D'), s.ativo, SUM(s.quantidade)
+        FROM saldos s JOIN locais l ON l.nome = s.local AND l.tipo = 'loja'
+        GROUP BY COALESCE(l.regiao, 'N/D'), s.ativo
+        UNION ALL
+        SELECT 'cd', COALESCE(l.cd_pai, 'N/D'), s.ativo, SUM(s.quantidade)
+        FROM saldos s JOIN locais l ON l.nome = s.local AND l.tipo = 'loja'
+        GROUP BY COALESCE(l.cd_pai, 'N/D'), s.ativo
+        UNION ALL
+        SELECT 'ativo', 'TOTAL', s.ativo, SUM(s.quantidade)
+        FROM saldos s
+        GROUP BY s.ativo
+        """)
+
+    def _apply_balance_delta(self, delta):
+        """Soma a variação nos saldos e nos agregados de cada nível da hierarquia"""
+        rows = [(local, ativo, qtde) for local, assets in delta.items() if local
+                for ativo, qtde in assets.items() if qtde]
+        if not rows:
+            return
+        
+        self.cursor.executemany("""
+        INSERT INTO saldos (local, ativo, quantidade) VALUES (?, ?, ?)
+        ON CONFLICT(local, ativo) DO UPDATE SET quantidade = quantidade + excluded.quantidade
+        """, rows)
+        
+        hierarchy = {row['nome']: (row['regiao'], row['cd_pai']) for row in
+                     self._execute_query("SELECT nome, regiao, cd_pai FROM locais WHERE tipo = 'loja'")}
+        
+        rollup = defaultdict(int)
+        for local, ativo, qtde in rows:
+            rollup[('ativo', 'TOTAL', ativo)] += qtde
+            if local not in hierarchy:
+                continue
+            regiao, cd_pai = hierarchy[local]
+            rollup[('lojas', 'TOTAL', ativo)] += qtde
+            rollup[('regiao', regiao or 'N/D', ativo)] += qtde
+            rollup[('cd', cd_pai or 'N/D', ativo)] += qtde
+        
+        self.cursor.executemany("""
+        INSERT INTO saldos_resumo (nivel, chave, ativo, quantidade) VALUES (?, ?, ?, ?)
+        ON CONFLICT(nivel, chave, ativo) DO UPDATE SET quantidade = quantidade + excluded.quantidade
+        """, [(nivel, chave, ativo, qtde) for (nivel, chave, ativo), qtde in rollup.items()])
+
+    def _add_initial_inventory(self, delta, stores):
+        """Inclui o inventário inicial de lojas que acabaram de aparecer nos movimentos"""
+        for store in stores:
+            inventory_match = self.get_inventory_match(store)
+            if not inventory_match:
+                continue
+            for row in self._execute_query(
+                "SELECT ativo, quantidade FROM inventario_inicial WHERE loja_nome_simples = ?", (inventory_match,)
+            ):
+                delta[store][row['ativo'] if row['ativo'] else 'N/A'] += row['quantidade']
+
+    def get_balances(self):
+        """Saldos atuais por local e ativo (mesmo formato do cálculo completo)"""
+        balances = defaultdict(lambda: defaultdict(int))
+        for row in self._execute_query("SELECT local, ativo, quantidade FROM saldos"):
+            balances[row['local']][row['ativo']] = row['quantidade']
+        return balances
+
+    def get_stock_overview(self):
+        """Saldos prontos para as abas: cada CD, lojas por região e total das lojas"""
+        overview = {
+            'cds': {},
+            'regioes': {},
+            'total_lojas': defaultdict(int)
+        }
+        
+        for row in self._execute_query("""
+            SELECT l.nome, s.ativo, s.quantidade
+            FROM locais l LEFT JOIN saldos s ON s.local = l.nome
+            WHERE l.tipo = 'cd'
+            ORDER BY l.regiao, l.nome
+        """):
+            assets = overview['cds'].setdefault(row['nome'], defaultdict(int))
+            if row['ativo'] is not None:
+                assets[row['ativo']] += row['quantidade']
+        
+        for row in self._execute_query(
+            "SELECT nivel, chave, ativo, quantidade FROM saldos_resumo WHERE nivel IN ('regiao', 'lojas') ORDER BY chave"
+        ):
+            if row['nivel'] == 'lojas':
+                overview['total_lojas'][row['ativo']] += row['quantidade']
+            else:
+                overview['regioes'].setdefault(row['chave'], defaultdict(int))[row['ativo']] += row['quantidade']
+        
+        return overview
+
+    def get_status_counts(self):
+        """Quantidade de movimentos e de linhas do inventário inicial (barra de status)"""
+        row = self._execute_query("""
+            SELECT (SELECT COUNT(*) FROM movimentos) AS movimentos,
+                   (SELECT COUNT(*) FROM inventario_inicial) AS inventario
+        """)[0]
+        return {'movimentos': row['movimentos'], 'inventario': row['inventario']}
+
+    def get_data_version(self):
+        """Impressão digital dos dados que alimentam o painel
+
+        Muda a cada importação, inventário, limpeza ou alteração do catálogo de ativos
+        (ids AUTOINCREMENT nunca são reaproveitados, então reimportar após limpar também muda).
+        """
+        row = self._execute_query("""
+            SELECT (SELECT COUNT(*) FROM movimentos), (SELECT MAX(id) FROM movimentos),
+                   (SELECT COUNT(*) FROM inventario_inicial), (SELECT MAX(id) FROM inventario_inicial),
+                   (SELECT COALESCE(SUM(quantidade), 0) FROM inventario_inicial),
+                   (SELECT COUNT(*) FROM locais),
+                   (SELECT COUNT(*) FROM saldos), (SELECT COALESCE(SUM(quantidade), 0) FROM saldos),
+                   (SELECT GROUP_CONCAT(codigo || ':' || nome || ':' || habilitado || ':' || ordem) FROM ativos)
+        """)[0]
+        return "|".join('' if value is None else str(value) for value in row)
+
+    def rebuild_movements_cube(self):
+        """Recria o cubo agregado a partir de todos os movimentos"""
+        self.cursor.execute("DELETE FROM movimentos_cubo")
+        self.cursor.execute("""
+        INSERT INTO movimentos_cubo (dia, origem, destino, ativo, tipo, quantidade, n)
+        SELECT COALESCE(data_movimento, ''), COALESCE(local_origem, ''), COALESCE(local_destino, ''),
+               CASE WHEN rti IS NULL OR TRIM(rti) = '' THEN 'N/A' ELSE UPPER(REPLACE(TRIM(rti), ' ', '')) END,
+               COALESCE(tipo_movimento, ''), SUM(quantidade), COUNT(*)
+        FROM movimentos
+        GROUP BY 1, 2, 3, 4, 5
+        """)
+        self.conn.commit()
+
+    def _update_movements_cube(self, df):
+        """Soma os movimentos importados no cubo (agregados no pandas antes do upsert)"""
+        if df.empty:
+            return
+        
+        import pandas as pd  # Import local: pandas só é carregado ao importar/analisar (abertura mais rápida)
+        cube = pd.DataFrame({
+            'dia': df['data_movimento'].map(lambda d: d.isoformat() if pd.notna(d) else ''),
+            'origem': df['local_origem'].fillna('') if 'local_origem' in df.columns else '',
+            'destino': df['local_destino'].fillna('') if 'local_destino' in df.columns else '',
+            'ativo': df['rti'].map(lambda r: normalize_asset_name(r) if pd.notna(r) else 'N/A'),
+            'tipo': df['tipo_movimento'].fillna('') if 'tipo_movimento' in df.columns else '',
+            'quantidade': df['quantidade'],
+        })
+        grouped = cube.groupby(['dia', 'origem', 'destino', 'ativo', 'tipo'], sort=False)['quantidade'].agg(['sum', 'count'])
+        
+        self.cursor.executemany("""
+        INSERT INTO movimentos_cubo (dia, origem, destino, ativo, tipo, quantidade, n)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(dia, origem, destino, ativo, tipo) DO UPDATE SET
+            quantidade = quantidade + excluded.quantidade,
+            n = n + excluded.n
+        """, [(*key, int(total), int(count)) for key, total, count in
+              zip(grouped.index, grouped['sum'], grouped['count'])])
+
+    def get_cube_dataframe(self, location_name):
+        """Linhas do cubo envolvendo o local, com o tipo de origem/destino (DataFrame)"""
+        query = """
+        SELECT c.dia, c.origem, c.destino, c.ativo, c.tipo, c.quantidade, c.n,
+               lo.tipo AS tipo_origem, ld.tipo AS tipo_destino
+        FROM movimentos_cubo c
+        LEFT JOIN locais lo ON lo.nome = c.origem
+        LEFT JOIN locais ld ON ld.nome = c.destino
+        WHERE c.origem = ? OR c.destino = ?
+        ORDER BY c.dia
+        """
+        import pandas as pd
+        return pd.read_sql_query(query, self.conn, params=(location_name, location_name))
+
+    # Expressões de agrupamento por período sobre a coluna ISO "dia" do cubo
+    PERIOD_EXPRESSIONS = {
+        'dia': "dia",
+        'semana': "date(dia, 'weekday 0', '-6 days')",  # Segunda-feira da semana
+        'mes': "substr(dia, 1, 7) || '-01'"
+    }
+
+    # Somas por categoria de fluxo do CD (mesmas regras de cd_analysis.FLOW_RULES)
+    CD_FLOW_SUMS = """
+               SUM(CASE WHEN c.origem = :cd AND ld.tipo = 'loja' AND c.tipo = 'Remessa'
+                        THEN c.quantidade ELSE 0 END) AS saidas,
+               SUM(CASE WHEN c.destino = :cd AND lo.tipo = 'loja' AND c.tipo = 'Regresso'
+                        THEN c.quantidade ELSE 0 END) AS entradas,
+               SUM(CASE WHEN c.origem = :cd AND ld.tipo = 'cd' AND c.tipo IN ('Transferencia', 'Remessa')
+                        THEN c.quantidade ELSE 0 END) AS transferencias_out,
+               SUM(CASE WHEN c.destino = :cd AND c.origem <> :cd AND lo.tipo = 'cd'
+                             AND c.tipo IN ('Transferencia', 'Entrega', 'Retorno')
+                        THEN c.quantidade ELSE 0 END) AS transferencias_in
+        FROM movimentos_cubo c
+        LEFT JOIN locais lo ON lo.nome = c.origem
+        LEFT JOIN locais ld ON ld.nome = c.destino
+    """
+
+    def get_cd_period_totals(self, cd_name, period='dia'):
+        """Totais do CD agrupados por dia, semana ou mês (mesmas regras da análise do CD)"""
+        period_expr = self.PERIOD_EXPRESSIONS[period]
+        query = f"""
+        SELECT {period_expr} AS periodo, {self.CD_FLOW_SUMS}
+        WHERE (c.origem = :cd OR c.destino = :cd) AND c.dia <> ''
+        GROUP BY periodo
+        HAVING saidas + entradas + transferencias_out + transferencias_in > 0
+        ORDER BY periodo
+        """
+        return self._execute_query(query, {'cd': cd_name})
+
+    def get_cd_flow_totals(self, cd_name):
+        """Totais do CD por ativo (cards e tabela do resumo, sem carregar o cubo do CD)"""
+        query = f"""
+        SELECT c.ativo AS ativo, {self.CD_FLOW_SUMS}
+        WHERE c.origem = :cd OR c.destino = :cd
+        GROUP BY c.ativo
+        HAVING saidas + entradas + transferencias_out + transferencias_in > 0
+        ORDER BY c.ativo
+        """
+        return self._execute_query(query, {'cd': cd_name})
+
+    def get_assets(self):
+        """Ativos retornáveis cadastrados, na ordem de exibição"""
+        query = "SELECT codigo, nome, descricao FROM ativos WHERE habilitado = 1 ORDER BY ordem, codigo"
+        return [dict(row) for row in self._execute_query(query)]
+
+    def get_asset_codes(self):
+        """Códigos normalizados dos ativos cadastrados (ex: HB618)"""
+        return [asset['codigo'] for asset in self.get_assets()]
+
+    def add_asset(self, nome, descricao=''):
+        """Cadastra novo ativo retornável; retorna o código normalizado"""
+        codigo = normalize_asset_name(nome)
+        if codigo == 'N/A':
+            raise ValueError("Nome do ativo não informado")
+        
+        if self._execute_query("SELECT 1 FROM ativos WHERE codigo = ?", (codigo,)):
+            raise ValueError(f"Ativo {codigo} já cadastrado")
+        
+        self.cursor.execute("""
+        INSERT INTO ativos (codigo, nome, descricao, ordem)
+        VALUES (?, ?, ?, (SELECT COALESCE(MAX(ordem), -1) + 1 FROM ativos))
+        """, (codigo, str(nome).strip().upper(), descricao))
+        self.conn.commit()
+        return codigo
+
+    def get_asset_totals(self):
+        """Saldo de cada ativo somando toda a rede (agregado mantido no ledger)"""
+        query = "SELECT ativo, quantidade FROM saldos_resumo WHERE nivel = 'ativo'"
+        return {row['ativo']: row['quantidade'] for row in self._execute_query(query)}
+
+    def get_location_kind(self, location_name):
+        """Tipo do local ('loja', 'cd' ou 'outro') pelo catálogo"""
+        result = self._execute_query("SELECT tipo FROM locais WHERE nome = ?", (location_name,))
+        if result:
+            return result[0]['tipo']
+        return classify_location(location_name)['tipo']
+
+    def get_location_kinds(self):
+        """Dicionário nome -> tipo de todos os locais"""
+        return {row['nome']: row['tipo'] for row in self._execute_query("SELECT nome, tipo FROM locais")}
+
     def calculate_stock_by_asset_with_inventory(self):
         """Calcula estoque com inventário inicial e matching inteligente"""
         estoque = defaultdict(lambda: defaultdict(int))
@@ -154,57 +733,64 @@ class Database:
         inventory_query = "SELECT loja_nome_simples, ativo, quantidade FROM inventario_inicial"
         inventory_data = self._execute_query(inventory_query)
         
-        # Cria mapeamento de lojas completas para inventário
-        loja_complete_to_inventory = {}
-        
-        # Busca todas as lojas dos movimentos
-        lojas_movimentos = self.get_all_locations('loja')
-        
-        for loja_completa in lojas_movimentos:
-            best_match = self.find_best_inventory_match(loja_completa)
-            if best_match:
-                loja_complete_to_inventory[loja_completa] = best_match
-                print(f"Mapeamento: '{loja_completa}' -> '{best_match}'")
+        # Mapeamento inventário -> lojas completas vem do catálogo (calculado na importação)
+        inventory_to_stores = defaultdict(list)
+        for row in self._execute_query(
+            "SELECT nome, inventario_match FROM locais WHERE tipo = 'loja' AND inventario_match IS NOT NULL"
+        ):
+            inventory_to_stores[row['inventario_match']].append(row['nome'])
         
         # Carrega inventário inicial usando o mapeamento
         for inv in inventory_data:
-            loja_simples = inv['loja_nome_simples']
             ativo = inv['ativo'] if inv['ativo'] else 'N/A'
-            qtde = inv['quantidade']
-            
-            # Encontra loja completa correspondente
-            for loja_completa, loja_inventario in loja_complete_to_inventory.items():
-                if loja_inventario == loja_simples:
-                    estoque[loja_completa][ativo] = qtde
-                    print(f"Inventário inicial: {loja_completa} -> {ativo}: {qtde}")
+            for loja_completa in inventory_to_stores.get(inv['loja_nome_simples'], []):
+                estoque[loja_completa][ativo] = inv['quantidade']
 
-        # 2. Processa movimentos
-        query = """
-        SELECT local_origem, local_destino, tipo_movimento, rti, quantidade, data_movimento 
+        # 2. Processa movimentos (tuplas simples -> Movement, sem sqlite3.Row)
+        query = f"""
+        SELECT {', '.join(Movement.COLUMNS)}
         FROM movimentos 
         ORDER BY data_movimento ASC, id ASC
         """
-        movimentos = self._execute_query(query)
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        movimentos = Movement.from_tuples(cursor.execute(query))
+
+        inventory_date = datetime.strptime(INVENTORY_DATE, '%Y-%m-%d').date()
+        self._apply_movements(estoque, movimentos, inventory_date, set(self.get_all_locations('loja')))
+
+        return estoque
 
-        inventory_date = datetime.strptime('2025-06-08', '%Y-%m-%d').date()
+    def calculate_stock_delta(self, movements_df):
+        """Variação de estoque causada apenas pelos movimentos informados (importação incremental)"""
+        estoque = defaultdict(lambda: defaultdict(int))
+        inventory_date = datetime.strptime(INVENTORY_DATE, '%Y-%m-%d').date()
         
+        movements = movements_df.reindex(columns=Movement.COLUMNS).astype(object)
+        movements = movements.where(movements.notna(), None)
+        self._apply_movements(estoque, Movement.from_tuples(movements.itertuples(index=False, name=None)),
+                              inventory_date, set(self.get_all_locations('loja')))
+        return estoque
+
+    def _apply_movements(self, estoque, movimentos, inventory_date, lojas):
+        """Aplica movimentos (Movement) ao estoque (regras de CDs e lojas)"""
         for mov in movimentos:
-            qtde = mov['quantidade']
-            rti = mov['rti'] if mov['rti'] else 'N/A'
-            origem = mov['local_origem']
-            destino = mov['local_destino']
-            tipo = mov['tipo_movimento']
-            data_mov = mov['data_movimento']
+            qtde = mov.quantidade
+            rti = mov.ativo  # Já normalizado, mesmo formato do inventário (HB618)
+            origem = mov.origem
+            destino = mov.destino
+            tipo = mov.tipo
+            data_mov = mov.data
             
-            # Converte data se necessário
-            if isinstance(data_mov, str):
-                try:
-                    data_mov = datetime.strptime(data_mov, '%Y-%m-%d').date()
-                except:
-                    continue
+            # Movimentos sem data válida não entram no cálculo
+            if data_mov is None:
+                continue
+
+            origem_loja = origem in lojas
+            destino_loja = destino in lojas
 
             # Lógica para CDs (mantém original)
-            if not (origem and origem.startswith('LOJA')) and not (destino and destino.startswith('LOJA')):
+            if not origem_loja and not destino_loja:
                 if tipo in ('Regresso', 'Entrega', 'Transferencia'):
                     estoque[destino][rti] += qtde
                 if tipo in ('Remessa', 'Retorno', 'Transferencia', 'Devolução de Entrega'):
@@ -213,123 +799,23 @@ class Database:
                 # Lógica para lojas com inventário
                 # Só processa movimentos após a data do inventário
                 if data_mov >= inventory_date:
-                    if destino and destino.startswith('LOJA') and tipo == 'Remessa':
+                    if destino_loja and tipo == 'Remessa':
                         estoque[destino][rti] += qtde
-                        print(f"Movimento: +{qtde} {rti} para {destino}")
                     
-                    if origem and origem.startswith('LOJA') and tipo == 'Regresso':
+                    if origem_loja and tipo == 'Regresso':
                         estoque[origem][rti] -= qtde
-                        print(f"Movimento: -{qtde} {rti} de {origem}")
-
-        return estoque
 
     def get_daily_stock_evolution(self, location_name):
-        """CORRIGIDO: Retorna evolução diária considerando inventário e matching com normalização de ativos"""
-        if not location_name.startswith('LOJA'):
-            return []
-
-        print(f"=== EVOLUÇÃO DIÁRIA PARA {location_name} ===")
+        """Evolução diária da loja (saldo de abertura do inventário + variações por dia)"""
+        from stock_engine import store_evolution  # Import local: stock_engine importa este módulo
         
-        # Encontra match no inventário
-        inventory_match = self.find_best_inventory_match(location_name)
-        if not inventory_match:
-            print(f"Nenhum inventário encontrado para {location_name}")
-            return []
-
-        # **FUNÇÃO AUXILIAR: Normaliza nomes de ativos**
-        def normalize_asset_name(asset_name):
-            """Remove espaços extras e padroniza formato"""
-            if not asset_name:
-                return 'N/A'
-            
-            # Remove espaços extras e converte para maiúscula
-            normalized = str(asset_name).strip().upper()
-            
-            # Remove espaços internos (HB 618 -> HB618)
-            normalized = normalized.replace(' ', '')
-            
-            return normalized
-
-        # Busca inventário inicial e normaliza nomes
-        inventory_query = "SELECT ativo, quantidade FROM inventario_inicial WHERE loja_nome_simples = ?"
-        initial_stock = {}
-        for row in self._execute_query(inventory_query, (inventory_match,)):
-            normalized_asset = normalize_asset_name(row['ativo'])
-            initial_stock[normalized_asset] = row['quantidade']
-        
-        print(f"Inventário inicial normalizado: {initial_stock}")
-
-        # Busca movimentos ordenados por data
-        movements_query = """
-        SELECT data_movimento, tipo_movimento, rti, quantidade, local_origem, local_destino
-        FROM movimentos 
-        WHERE (local_origem = ? OR local_destino = ?) AND data_movimento >= '2025-06-08'
-        ORDER BY data_movimento ASC, id ASC
-        """
-        movements = self._execute_query(movements_query, (location_name, location_name))
-
-        # **CORREÇÃO PRINCIPAL: Calcula evolução dia a dia CUMULATIVA com normalização**
-        daily_evolution = []
-        current_stock = initial_stock.copy()  # Começa com inventário inicial
+        if self.get_location_kind(location_name) != 'loja':
+            return None
         
-        # Agrupa movimentos por data
-        from collections import defaultdict
-        movements_by_date = defaultdict(list)
-        for mov in movements:
-            movements_by_date[mov['data_movimento']].append(mov)
-
-        print(f"Datas com movimentos: {sorted(movements_by_date.keys())}")
+        print(f"=== EVOLUÇÃO DIÁRIA PARA {location_name} ===")
+        return store_evolution(self, location_name)
 
-        # Processa cada data em ordem
-        for date in sorted(movements_by_date.keys()):
-            day_movements = movements_by_date[date]
-            
-            print(f"\n--- Processando data: {date} ---")
-            print(f"Estoque no início do dia: {current_stock}")
-            
-            # **CRÍTICO: Aplica todos os movimentos do dia NO ESTOQUE ATUAL**
-            for mov in day_movements:
-                raw_rti = mov['rti'] if mov['rti'] else 'N/A'
-                # **NORMALIZAÇÃO: Remove espaços e padroniza**
-                rti = normalize_asset_name(raw_rti)
-                qtde = mov['quantidade']
-                tipo = mov['tipo_movimento']
-                
-                print(f"Movimento original: {tipo} {qtde} '{raw_rti}' -> normalizado: '{rti}'")
-                
-                # Garante que o ativo existe no estoque
-                if rti not in current_stock:
-                    current_stock[rti] = 0
-                    print(f"Criando novo ativo {rti} com quantidade 0")
-                
-                # **CORREÇÃO: Aplica movimento CUMULATIVO no estoque atual**
-                old_qty = current_stock[rti]
-                
-                if mov['local_destino'] == location_name and tipo == 'Remessa':
-                    current_stock[rti] += qtde
-                    print(f"  ✅ Remessa: {rti} {old_qty} + {qtde} = {current_stock[rti]}")
-                elif mov['local_origem'] == location_name and tipo == 'Regresso':
-                    current_stock[rti] -= qtde
-                    print(f"  ❌ Regresso: {rti} {old_qty} - {qtde} = {current_stock[rti]}")
-                else:
-                    print(f"  ⚠️ Movimento ignorado: {tipo} (origem: {mov['local_origem']}, destino: {mov['local_destino']})")
-
-            print(f"Estoque final do dia {date}: {current_stock}")
-
-            # **CRÍTICO: Salva estado do dia com CÓPIA do estoque final calculado**
-            daily_evolution.append({
-                'date': date,
-                'stock': current_stock.copy(),  # **IMPORTANTE: Fazer cópia do estado final**
-                'movements': day_movements.copy()
-            })
-
-        print(f"\nEvolução final calculada:")
-        for i, day in enumerate(daily_evolution):
-            print(f"Dia {i+1} ({day['date']}): {day['stock']}")
-
-        return daily_evolution
-
-    def insert_inventory_data(self, df: pd.DataFrame, inventory_date='2025-06-08'):
+    def insert_inventory_data(self, df: 'pd.DataFrame', inventory_date=INVENTORY_DATE):
         """Insere dados do inventário inicial com normalização de ativos"""
         print("=== INSERINDO INVENTÁRIO COM NORMALIZAÇÃO ===")
         print(f"DataFrame recebido: {len(df)} linhas")
@@ -386,6 +872,11 @@ class Database:
         self.conn.commit()
         print(f"✅ {successful_inserts} registros inseridos com sucesso")
         
+        # Reassocia todas as lojas do catálogo ao novo inventário
+        self._update_inventory_matches()
+        self.conn.commit()
+        self.rebuild_balances()
+        
         # Verifica o que foi inserido
         verification_query = "SELECT loja_nome_simples, ativo, quantidade FROM inventario_inicial ORDER BY loja_nome_simples"
         inserted_data = self._execute_query(verification_query)
@@ -402,25 +893,20 @@ class Database:
 
     def get_flow_data(self, location_name):
         query = """
-        SELECT tipo_movimento, local_origem, local_destino, rti, SUM(quantidade) as total_qtde
-        FROM movimentos
-        WHERE local_origem = ? OR local_destino = ?
-        GROUP BY tipo_movimento, local_origem, local_destino, rti
-        ORDER BY tipo_movimento
+        SELECT tipo AS tipo_movimento, origem AS local_origem, destino AS local_destino,
+               ativo AS rti, SUM(quantidade) as total_qtde
+        FROM movimentos_cubo
+        WHERE origem = ? OR destino = ?
+        GROUP BY tipo, origem, destino, ativo
+        ORDER BY tipo
         """
         params = (location_name, location_name)
         return self._execute_query(query, params)
 
     def get_all_locations(self, type='loja'):
-        like_pattern = 'LOJA %' if type == 'loja' else 'CD %'
-        query = f"""
-        SELECT DISTINCT local FROM (
-            SELECT local_origem as local FROM movimentos WHERE local_origem LIKE '{like_pattern}'
-            UNION
-            SELECT local_destino as local FROM movimentos WHERE local_destino LIKE '{like_pattern}'
-        ) ORDER BY local
-        """
-        return [row[0] for row in self._execute_query(query)]
+        """Locais do catálogo por tipo ('loja' ou 'cd')"""
+        query = "SELECT nome FROM locais WHERE tipo = ? ORDER BY nome"
+        return [row[0] for row in self._execute_query(query, (type,))]
         
     def get_location_history(self, location_name):
         query = """
@@ -431,23 +917,128 @@ class Database:
         """
         return self._execute_query(query, (location_name, location_name))
 
+    # Colunas do histórico na ordem da tabela (ordenação pelo cabeçalho = ORDER BY na coluna)
+    HISTORY_COLUMNS = ('data_movimento', 'tipo_movimento', 'rti', 'local_origem', 'local_destino', 'quantidade')
+
+    def _history_filter(self, location_name, filters):
+        """WHERE do histórico de um local com os filtros da barra (período, tipo, ativo e contraparte)"""
+        clauses = ["(local_origem = ? OR local_destino = ?)"]
+        params = [location_name, location_name]
+
+        if filters.get('data_inicio'):
+            clauses.append("data_movimento >= ?")
+            params.append(filters['data_inicio'])
+        if filters.get('data_fim'):
+            clauses.append("data_movimento <= ?")
+            params.append(filters['data_fim'])
+        if filters.get('tipo'):
+            clauses.append("tipo_movimento = ?")
+            params.append(filters['tipo'])
+        if filters.get('ativo'):
+            # Mesma normalização de normalize_asset_name (HB 618 -> HB618, vazio -> N/A)
+            clauses.append("COALESCE(NULLIF(UPPER(REPLACE(TRIM(rti), ' ', '')), ''), 'N/A') = ?")
+            params.append(filters['ativo'])
+        if filters.get('contraparte'):
+            # Contraparte = o outro lado do movimento (destino nas saídas, origem nas entradas)
+            # **CORREÇÃO: % e _ digitados são texto, não curingas do LIKE**
+            text = filters['contraparte'].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            clauses.append("(CASE WHEN local_origem = ? THEN local_destino ELSE local_origem END) LIKE ? ESCAPE '\\'")
+            params.extend([location_name, f"%{text}%"])
+
+        return " AND ".join(clauses), params
+
+    def get_history_ids(self, location_name, filters=None, sort_column='data_movimento', descending=True):
+        """Ids dos movimentos do local, já filtrados e ordenados pelo SQLite
+
+        Só os ids são lidos aqui; as linhas visíveis são buscadas depois por get_movements_by_ids.
+        """
+        if sort_column not in self.HISTORY_COLUMNS:
+            raise ValueError(f"Coluna de ordenação inválida: {sort_column}")
+
+        where, params = self._history_filter(location_name, filters or {})
+        direction = "DESC" if descending else "ASC"
+        query = f"SELECT id FROM movimentos WHERE {where} ORDER BY {sort_column} {direction}, id {direction}"
+        return array('q', (row[0] for row in self.conn.execute(query, params)))
+
+    def get_movements_by_ids(self, ids):
+        """Linhas do histórico por id ({id: (data, tipo, rti, origem, destino, quantidade)})"""
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        query = f"SELECT id, {', '.join(self.HISTORY_COLUMNS)} FROM movimentos WHERE id IN ({placeholders})"
+        return {row[0]: tuple(row[1:]) for row in self._execute_query(query, list(ids))}
+
+    def get_history_options(self, location_name):
+        """Tipos, ativos e período existentes no histórico do local (opções da barra de filtros, via cubo)"""
+        where = "origem = ? OR destino = ?"
+        params = (location_name, location_name)
+        types = [row[0] for row in self._execute_query(
+            f"SELECT DISTINCT tipo FROM movimentos_cubo WHERE {where} ORDER BY tipo", params)]
+        assets = [row[0] for row in self._execute_query(
+            f"SELECT DISTINCT ativo FROM movimentos_cubo WHERE {where} ORDER BY ativo", params)]
+        first_day, last_day = self._execute_query(
+            f"SELECT MIN(NULLIF(dia, '')), MAX(NULLIF(dia, '')) FROM movimentos_cubo WHERE {where}", params)[0]
+        return {'tipos': types, 'ativos': assets, 'periodo': (first_day, last_day)}
+
     def clear_inventory_data(self):
         """Limpa apenas dados de inventário"""
         self.cursor.execute("DELETE FROM inventario_inicial")
+        self.cursor.execute("DELETE FROM arquivos_importados WHERE tipo = 'inventario'")
+        self.cursor.execute("UPDATE locais SET inventario_match = NULL")
         self.conn.commit()
+        self.rebuild_balances()
 
-    def insert_data(self, df: pd.DataFrame):
+    def clear_movements_data(self):
+        """Limpa movimentos e tudo que é derivado deles (mantém inventário)"""
+        self.cursor.execute("DELETE FROM movimentos")
+        self.cursor.execute("DELETE FROM arquivos_importados WHERE tipo = 'movimentos'")
+        self.cursor.execute("DELETE FROM locais")
+        self.cursor.execute("DELETE FROM saldos")
+        self.cursor.execute("DELETE FROM saldos_resumo")
+        self.cursor.execute("DELETE FROM movimentos_cubo")
+        self.conn.commit()
+
+    def insert_data(self, df: 'pd.DataFrame'):
         column_mapping = {
             'Guia': 'guia', 'Transação': 'transacao', 'LOCAL Origem': 'local_origem',
             'LOCAL Destino': 'local_destino', 'Tipo Movimento': 'tipo_movimento',
             'RTI': 'rti', 'Nota Fiscal': 'nota_fiscal', 'Quant.': 'quantidade', 'Data': 'data_movimento'
         }
         df.rename(columns=column_mapping, inplace=True)
+        dayfirst = df.attrs.get('dayfirst', True)  # Detectado pelo FileReader em arquivos CSV
+        import pandas as pd
         df['quantidade'] = pd.to_numeric(df['quantidade'], errors='coerce').fillna(0).astype(int)
-        df['data_movimento'] = pd.to_datetime(df['data_movimento'], dayfirst=True, errors='coerce').dt.date
+        df['data_movimento'] = pd.to_datetime(df['data_movimento'], dayfirst=dayfirst, errors='coerce').dt.date
         df_to_insert = df[[col for col in column_mapping.values() if col in df.columns]]
-        df_to_insert.to_sql('movimentos', self.conn, if_exists='append', index=False)
-        self.conn.commit()
+        
+        # **CORREÇÃO: Movimentos, catálogo, cubo e saldos gravados numa única transação**
+        # (to_sql faz commit próprio; uma falha no meio deixava os agregados desatualizados)
+        rows = df_to_insert.astype(object)
+        if 'data_movimento' in rows.columns:
+            rows['data_movimento'] = rows['data_movimento'].map(lambda d: d.isoformat() if pd.notna(d) else None)
+        rows = rows.where(rows.notna(), None)
+        columns = ', '.join(rows.columns)
+        placeholders = ', '.join('?' * len(rows.columns))
+        
+        with self.conn:  # Commit no fim, rollback de tudo se algo falhar
+            self.cursor.executemany(f"INSERT INTO movimentos ({columns}) VALUES ({placeholders})",
+                                    rows.itertuples(index=False, name=None))
+            
+            # Atualiza catálogo apenas com os locais presentes no arquivo
+            locations = set()
+            for col in ('local_origem', 'local_destino'):
+                if col in df_to_insert.columns:
+                    locations.update(df_to_insert[col].dropna().unique())
+            new_stores, hierarchy_changed = self.update_locations_catalog(locations, commit=False)
+            
+            self._update_movements_cube(df_to_insert)
+            
+            # Saldos: aplica só a variação do arquivo (+ inventário inicial de lojas novas)
+            delta = self.calculate_stock_delta(df_to_insert)
+            self._add_initial_inventory(delta, new_stores)
+            self._apply_balance_delta(delta)
+            if hierarchy_changed:
+                self._rebuild_rollups()
 
     def clear_all_data(self):
         from PyQt5.QtWidgets import QMessageBox
@@ -456,10 +1047,28 @@ class Database:
                              QMessageBox.Yes | QMessageBox.No, QMessageBox.No) == QMessageBox.Yes:
             self._execute_query("DELETE FROM movimentos")
             self._execute_query("DELETE FROM inventario_inicial")
+            self._execute_query("DELETE FROM arquivos_importados")
+            self._execute_query("DELETE FROM locais")
+            self._execute_query("DELETE FROM saldos")
+            self._execute_query("DELETE FROM saldos_resumo")
+            self._execute_query("DELETE FROM movimentos_cubo")
             self.conn.commit()
             QMessageBox.information(None, "Sucesso", "Todos os dados foram apagados.")
             return True
         return False
         
+    def is_file_imported(self, file_hash):
+        """Verifica se um arquivo (pelo hash do conteúdo) já foi importado"""
+        result = self._execute_query("SELECT 1 FROM arquivos_importados WHERE hash = ?", (file_hash,))
+        return bool(result)
+
+    def register_imported_file(self, file_hash, file_name, kind, rows):
+        """Registra arquivo importado para não ser processado novamente"""
+        self.cursor.execute("""
+        INSERT OR REPLACE INTO arquivos_importados (hash, nome_arquivo, tipo, linhas)
+        VALUES (?, ?, ?, ?)
+        """, (file_hash, file_name, kind, rows))
+        self.conn.commit()
+
     def close(self):
         self.conn.close()
\ No newline at end of file
@@ -0,0 +1,293 @@
+# file_reader.py - Leitura rápida de arquivos de movimentos/inventário
+import os
+import io
+import re
+import csv
+import codecs
+import hashlib
+import pandas as pd
+
+class FileReader:
+    """Lê arquivos .xlsx/.csv com streaming e cache de arquivos já processados
+
+    O índice dos DataFrames lidos é o número da linha no arquivo original (1 = cabeçalho).
+    """
+
+    CACHE_DIR = "import_cache"
+    CACHE_VERSION = 2  # Incrementar quando o formato do DataFrame lido mudar (2: índice = linha do arquivo)
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    SNIFF_SIZE = 64 * 1024  # Bytes analisados para detectar o dialeto do CSV
+    SNIFF_MAX_LINES = 50
+    CSV_DELIMITERS = [';', '\t', ',', '|']  # Ordem de preferência em caso de empate
+
+    DECIMAL_COMMA_PATTERN = re.compile(r'(?<![\d.,])\d{1,3}(?:\.\d{3})*,\d+(?![\d,])')
+    THOUSANDS_DOT_PATTERN = re.compile(r'(?<![\d.])\d{1,3}(?:\.\d{3})+(?:,\d+)?(?![\d.])')
+    DATE_PATTERN = re.compile(r'\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{2,4})\b')
+    ISO_DATE_PATTERN = re.compile(r'\b\d{4}-\d{2}-\d{2}\b')
+
+    @classmethod
+    def read(cls, file_path):
+        """Lê arquivo de dados conforme a extensão"""
+        if file_path.lower().endswith('.csv'):
+            return cls.read_csv(file_path)
+        return cls.read_excel(file_path)
+
+    @classmethod
+    def read_csv(cls, file_path):
+        """Detecta o dialeto pelos primeiros KB e lê o CSV uma única vez"""
+        dialect = cls.sniff_csv(file_path)
+        print(f"🔎 Dialeto detectado para {os.path.basename(file_path)}: {dialect}")
+
+        df = pd.read_csv(
+            file_path,
+            sep=dialect['sep'],
+            encoding=dialect['encoding'],
+            decimal=dialect['decimal'],
+            thousands=dialect['thousands'],
+            skip_blank_lines=False,
+        )
+
+        # Índice = linha no arquivo (1 = cabeçalho); linhas vazias só saem depois de numeradas
+        df.index = range(2, len(df) + 2)
+        df = df.dropna(how='all')
+
+        # **VALIDAÇÃO: Uma única coluna contendo outro separador indica detecção errada**
+        if len(df.columns) == 1:
+            header = str(df.columns[0])
+            if any(delim in header for delim in cls.CSV_DELIMITERS if delim != dialect['sep']):
+                raise ValueError(
+                    f"Não foi possível detectar o separador do arquivo.\n"
+                    f"Cabeçalho lido: {header[:100]}"
+                )
+
+        df.attrs['dayfirst'] = dialect['dayfirst']
+        return df
+
+    @classmethod
+    def sniff_csv(cls, file_path):
+        """Retorna separador, encoding e convenções de decimal/data do CSV"""
+        with open(file_path, 'rb') as f:
+            raw = f.read(cls.SNIFF_SIZE)
+            truncated = bool(f.read(1))
+
+        encoding = cls._detect_encoding(raw, truncated)
+        text = raw.decode(encoding, errors='ignore')
+
+        lines = text.splitlines()
+        if truncated and len(lines) > 1:
+            lines = lines[:-1]  # Última linha pode estar cortada
+        lines = [line for line in lines if line.strip()][:cls.SNIFF_MAX_LINES]
+
+        sep = cls._detect_delimiter(lines)
+
+        # Analisa apenas os campos (sem o separador) para decimal e datas
+        fields = []
+        for row in csv.reader(io.StringIO('\n'.join(lines[1:])), delimiter=sep):
+            fields.extend(field.strip() for field in row)
+        values_text = '\n'.join(fields)
+
+        decimal = '.'
+        thousands = None
+        if sep != ',' and cls.DECIMAL_COMMA_PATTERN.search(values_text):
+            decimal = ','
+            if cls.THOUSANDS_DOT_PATTERN.search(values_text):
+                thousands = '.'
+
+        return {
+            'sep': sep,
+            'encoding': encoding,
+            'decimal': decimal,
+            'thousands': thousands,
+            'dayfirst': cls._detect_dayfirst(values_text),
+        }
+
+    @staticmethod
+    def _detect_encoding(raw, truncated=False):
+        """Detecta encoding pelo BOM ou por tentativa de decodificação"""
+        if raw.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        if raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return 'utf-16'
+
+        try:
+            raw.decode('utf-8')
+            return 'utf-8'
+        except UnicodeDecodeError as e:
+            # Caractere multibyte cortado no fim da amostra ainda é UTF-8
+            if truncated and e.start >= len(raw) - 3:
+                return 'utf-8'
+
+        try:
+            raw.decode('cp1252')
+            return 'cp1252'  # Padrão das exportações do Excel em português
+        except UnicodeDecodeError:
+            return 'latin-1'
+
+    @classmethod
+    def _detect_delimiter(cls, lines):
+        """Escolhe o separador com número de campos mais consistente entre as linhas"""
+        if not lines:
+            return ';'
+
+        best_delim = ';'
+        best_score = (0, 0)
+
+        for delim in cls.CSV_DELIMITERS:
+            field_counts = [len(row) for row in csv.reader(io.StringIO('\n'.join(lines)), delimiter=delim)]
+            header_count = field_counts[0] if field_counts else 0
+            if header_count < 2:
+                continue
+
+            consistency = sum(1 for count in field_counts if count == header_count) / len(field_counts)
+            score = (consistency, header_count)
+
+            # Empates mantêm o separador de maior preferência (ordem da lista)
+            if score > best_score:
+                best_delim = delim
+                best_score = score
+
+        return best_delim
+
+    @classmethod
+    def _detect_dayfirst(cls, values_text):
+        """Detecta se as datas estão no formato dia/mês (padrão brasileiro)"""
+        month_first = False
+        for match in cls.DATE_PATTERN.finditer(values_text):
+            first, second = int(match.group(1)), int(match.group(2))
+            if first > 12:
+                return True
+            if second > 12:
+                month_first = True
+
+        if month_first:
+            return False
+        if cls.ISO_DATE_PATTERN.search(values_text) and not cls.DATE_PATTERN.search(values_text):
+            return False
+        return True
+
+    @staticmethod
+    def file_hash(file_path):
+        """Retorna o SHA-256 do conteúdo do arquivo"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(FileReader.HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @classmethod
+    def read_excel(cls, file_path, use_cache=True):
+        """Lê planilha em modo read-only, reaproveitando o cache pelo hash do conteúdo"""
+        content_hash = cls.file_hash(file_path) if use_cache else None
+
+        if content_hash:
+            cached_df = cls.load_cached(content_hash)
+            if cached_df is not None:
+                print(f"⚡ Cache reaproveitado para {os.path.basename(file_path)} ({len(cached_df)} linhas)")
+                return cached_df
+
+        df = cls.stream_excel(file_path)
+
+        if content_hash:
+            cls.save_cached(content_hash, df)
+
+        return df
+
+    @staticmethod
+    def stream_excel(file_path):
+        """Lê a primeira aba linha a linha com openpyxl em modo read-only"""
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            rows = sheet.iter_rows(values_only=True)
+
+            header = next(rows, None)
+            if header is None:
+                return pd.DataFrame()
+
+            # Cabeçalhos vazios recebem nome posicional (mesmo padrão do pandas)
+            columns = [str(col).strip() if col is not None else f"Unnamed: {i}"
+                       for i, col in enumerate(header)]
+
+            # **OTIMIZAÇÃO: Ignora linhas totalmente vazias (comuns no fim das exportações)**
+            # **CORREÇÃO: Índice = linha na planilha (1 = cabeçalho), mesmo depois de pular as vazias**
+            data = []
+            row_numbers = []
+            for row_number, row in enumerate(rows, start=2):
+                if any(value is not None for value in row):
+                    data.append(row)
+                    row_numbers.append(row_number)
+        finally:
+            workbook.close()
+
+        df = pd.DataFrame(data, columns=columns, index=row_numbers)
+        return FileReader._normalize_mixed_columns(df)
+
+    @staticmethod
+    def _normalize_mixed_columns(df):
+        """Converte colunas com tipos misturados (ex: Guia numérica e texto) para texto"""
+        for col in df.columns:
+            if df[col].dtype != object:
+                continue
+
+            non_null = df[col].dropna()
+            if non_null.map(type).nunique() > 1:
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+
+        return df
+
+    @classmethod
+    def _cache_path(cls, content_hash, extension):
+        return os.path.join(cls.CACHE_DIR, f"v{cls.CACHE_VERSION}_{content_hash}.{extension}")
+
+    @classmethod
+    def load_cached(cls, content_hash):
+        """Carrega DataFrame do cache (parquet ou pickle), se existir"""
+        parquet_path = cls._cache_path(content_hash, 'parquet')
+        pickle_path = cls._cache_path(content_hash, 'pkl')
+
+        try:
+            if os.path.exists(parquet_path):
+                return pd.read_parquet(parquet_path)
+            if os.path.exists(pickle_path):
+                return pd.read_pickle(pickle_path)
+        except Exception as e:
+            print(f"⚠️ Cache inválido, arquivo será relido: {e}")
+
+        return None
+
+    @classmethod
+    def save_cached(cls, content_hash, df):
+        """Salva DataFrame lido como arquivo colunar ao lado dos dados"""
+        try:
+            os.makedirs(cls.CACHE_DIR, exist_ok=True)
+
+            parquet_path = cls._cache_path(content_hash, 'parquet')
+            try:
+                df.to_parquet(parquet_path)  # Índice salvo: é o número da linha no arquivo
+            except Exception as e:
+                # **FALLBACK: Sem pyarrow (ou tipos não suportados), usa pickle**
+                print(f"⚠️ Parquet indisponível ({e}), usando pickle no cache")
+                if os.path.exists(parquet_path):
+                    os.remove(parquet_path)
+                df.to_pickle(cls._cache_path(content_hash, 'pkl'))
+
+            return True
+        except Exception as e:
+            print(f"⚠️ Não foi possível salvar cache de importação: {e}")
+            return False
+
+    @classmethod
+    def clear_cache(cls):
+        """Remove todos os arquivos de cache de importação"""
+        if not os.path.isdir(cls.CACHE_DIR):
+            return 0
+
+        removed = 0
+        for name in os.listdir(cls.CACHE_DIR):
+            if name.endswith(('.parquet', '.pkl')):
+                os.remove(os.path.join(cls.CACHE_DIR, name))
+                removed += 1
+        return removed
@@ -1,22 +1,29 @@
 # flow_dialog.py - VERSÃO CORRIGIDA COM CARDS RESPONSIVOS E MÉTODO FALTANTE
 import sys
-from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QScrollArea, 
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                             QWidget, QFrame, QGridLayout, QPushButton, QComboBox,
-                            QTableWidget, QTableWidgetItem, QHeaderView, QTabWidget,
+                            QTableWidget, QTableWidgetItem, QTableView, QHeaderView, QTabWidget,
                             QGroupBox, QSplitter, QSizePolicy)
-from PyQt5.QtGui import QFont, QPainter, QPen, QColor
+from PyQt5.QtGui import QFont, QColor
 from PyQt5.QtCore import Qt, QRect
 from datetime import datetime, timedelta
 from collections import defaultdict
 from screen_utils import ScreenManager, ResponsiveDialog
+from appearance_manager import AppearanceManager
+from database import INVENTORY_DATE
 import json
+import pandas as pd
+import cd_analysis
+import stock_engine
+from history_table import MovementHistoryModel, HistoryFilterBar
+from flow_timeline import FlowTimelineView, FlowTimelineModel, FlowPeriodModel, DayRangeModel, ZOOM_LEVELS
 
 class FlowDialog(QDialog, ResponsiveDialog):
     """Diálogo para exibir fluxo clássico de movimentos - VERSÃO RESPONSIVA"""
-    def __init__(self, location_name, flow_data, parent=None):
+    def __init__(self, location_name, db_instance, parent=None):
         super().__init__(parent)
         self.location_name = location_name
-        self.flow_data = flow_data
+        self.db = db_instance
         self.setWindowTitle(f"Fluxo de Movimentos - {location_name}")
         
         # **CORREÇÃO: Usa sistema responsivo**
@@ -36,13 +43,15 @@ class FlowDialog(QDialog, ResponsiveDialog):
         title.setFont(title_font)
         layout.addWidget(title)
         
-        # Tabela responsiva
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels([
-            '📅 Data', '🔄 Movimento', '📦 Ativo (RTI)', 
-            '📤 Origem', '📥 Destino', '🔢 Quantidade'
-        ])
+        # **NOVO: Mesmos filtros do histórico da janela principal (WHERE no SQLite)**
+        self.filter_bar = HistoryFilterBar()
+        self.filter_bar.filtersChanged.connect(self.on_filters_changed)
+        layout.addWidget(self.filter_bar)
+        
+        # **OTIMIZAÇÃO: Tabela sobre modelo que lê só as linhas visíveis (antes: uma célula por vez, tudo de uma vez)**
+        self.table = QTableView()
+        self.model = MovementHistoryModel(self.db, self)
+        self.table.setModel(self.model)
         
         # **CORREÇÃO: Fonte ajustada para responsividade**
         table_font = QFont()
@@ -56,19 +65,23 @@ class FlowDialog(QDialog, ResponsiveDialog):
         header.setFont(header_font)
         
         # **CORREÇÃO: Headers responsivos**
+        header.setResizeContentsPrecision(0)
         header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
         header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
         header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
         header.setSectionResizeMode(3, QHeaderView.Stretch)
         header.setSectionResizeMode(4, QHeaderView.Stretch)
         header.setSectionResizeMode(5, QHeaderView.ResizeToContents)
+        header.setSortIndicator(0, Qt.DescendingOrder)
         
         self.table.setAlternatingRowColors(True)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
         layout.addWidget(self.table)
         
         # Botões responsivos
         button_layout = QHBoxLayout()
+        self.count_label = QLabel()
+        button_layout.addWidget(self.count_label)
         button_layout.addStretch()
         
         close_btn = QPushButton("❌ Fechar")
@@ -79,46 +92,18 @@ class FlowDialog(QDialog, ResponsiveDialog):
         layout.addLayout(button_layout)
 
     def load_data(self):
-        """Carrega dados na tabela"""
-        if not self.flow_data:
-            self.table.setRowCount(1)
-            self.table.setItem(0, 0, QTableWidgetItem("❌ Nenhum dado encontrado"))
-            return
-        
-        self.table.setRowCount(len(self.flow_data))
-        
-        for row, data in enumerate(self.flow_data):
-            # Data
-            if data.get('data_movimento'):
-                try:
-                    date_obj = datetime.strptime(str(data['data_movimento']), '%Y-%m-%d')
-                    formatted_date = date_obj.strftime('%d/%m/%Y')
-                    self.table.setItem(row, 0, QTableWidgetItem(formatted_date))
-                except:
-                    self.table.setItem(row, 0, QTableWidgetItem(str(data['data_movimento'])))
-            else:
-                self.table.setItem(row, 0, QTableWidgetItem(""))
-            
-            # Movimento
-            movement = data.get('tipo_movimento', '')
-            movement_icons = {
-                'Remessa': '📤', 'Regresso': '📥', 'Entrega': '🚚',
-                'Devolução de Entrega': '↩️', 'Transferencia': '🔄', 'Retorno': '🔙'
-            }
-            icon = movement_icons.get(movement, '📋')
-            self.table.setItem(row, 1, QTableWidgetItem(f"{icon} {movement}"))
-            
-            # RTI
-            self.table.setItem(row, 2, QTableWidgetItem(str(data.get('rti', ''))))
-            
-            # Origem
-            self.table.setItem(row, 3, QTableWidgetItem(str(data.get('local_origem', ''))))
-            
-            # Destino
-            self.table.setItem(row, 4, QTableWidgetItem(str(data.get('local_destino', ''))))
-            
-            # Quantidade
-            self.table.setItem(row, 5, QTableWidgetItem(str(data.get('quantidade', ''))))
+        """Carrega o histórico do local (ordenado pelo cabeçalho, mais recentes primeiro)"""
+        self.filter_bar.set_options(self.db.get_history_options(self.location_name))
+        self.model.modelReset.connect(self.update_count)
+        self.table.setSortingEnabled(True)  # Antes do local: a ordenação inicial não consulta o banco à toa
+        self.model.set_location(self.location_name, self.filter_bar.filters())
+
+    def on_filters_changed(self, filters):
+        self.model.set_filters(filters)
+
+    def update_count(self):
+        count = self.model.rowCount()
+        self.count_label.setText("❌ Nenhum dado encontrado" if count == 0 else f"{count:,} movimentos".replace(",", "."))
 
 class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
     """Diálogo específico para análise completa de fluxo de CDs - VERSÃO CORRIGIDA"""
@@ -127,6 +112,7 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
         super().__init__(parent)
         self.cd_name = cd_name
         self.db = db_instance
+        self.asset_codes = self.db.get_asset_codes()  # Colunas por ativo vêm do catálogo
         self.setWindowTitle(f"Análise Completa de Fluxo - {cd_name}")
         
         # **CORREÇÃO: Usa sistema responsivo para diálogos grandes**
@@ -154,7 +140,7 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
         # Período de análise
         period_label = QLabel("📅 Período: Todos os registros")
         period_label.setFont(QFont("Arial", 10))
-        period_label.setStyleSheet("color: #666;")
+        period_label.setProperty("tone", "muted")
         header_layout.addWidget(period_label)
         
         main_layout.addLayout(header_layout)
@@ -178,6 +164,16 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
         # Aba 5: Análise Temporal
         self.create_temporal_tab()
         
+        # **OTIMIZAÇÃO: Cada aba é calculada só quando exibida pela primeira vez (na ordem de criação)**
+        self.tab_loaders = [
+            self.update_summary_tab,
+            self.update_outbound_tab,
+            self.update_inbound_tab,
+            self.update_transfers_tab,
+            self.update_temporal_analysis,
+        ]
+        self.tabs.currentChanged.connect(self.load_tab)
+        
         main_layout.addWidget(self.tabs)
         
         # Botões de ação responsivos
@@ -185,7 +181,8 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
         
         export_btn = QPushButton("💾 Exportar Análise Completa")
         export_btn.setFont(QFont("Arial", 10))
-        export_btn.setStyleSheet("background-color: #28a745; color: white; padding: 6px 12px;")
+        export_btn.setProperty("variant", "success")
+        export_btn.setProperty("compact", True)
         export_btn.clicked.connect(self.export_analysis)
         button_layout.addWidget(export_btn)
         
@@ -208,22 +205,22 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
         
         # **CORREÇÃO: Cards de resumo responsivos**
         self.outbound_card = self.create_summary_card(
-            "📤 Saídas Totais", "0", "Remessas para lojas", "#dc3545"
+            "📤 Saídas Totais", "0", "Remessas para lojas", "danger"
         )
         cards_layout.addWidget(self.outbound_card, 0, 0)
         
         self.inbound_card = self.create_summary_card(
-            "📥 Retornos Totais", "0", "Regressos das lojas", "#28a745"
+            "📥 Retornos Totais", "0", "Regressos das lojas", "success"
         )
         cards_layout.addWidget(self.inbound_card, 0, 1)
         
         self.transfers_card = self.create_summary_card(
-            "🔄 Transferências", "0", "Entre CDs", "#007bff"
+            "🔄 Transferências", "0", "Entre CDs", "primary"
         )
         cards_layout.addWidget(self.transfers_card, 1, 0)
         
         self.balance_card = self.create_summary_card(
-            "⚖️ Saldo Líquido", "0", "Entradas - Saídas", "#6c757d"
+            "⚖️ Saldo Líquido", "0", "Entradas - Saídas", "secondary"
         )
         cards_layout.addWidget(self.balance_card, 1, 1)
         
@@ -256,19 +253,14 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
         
         self.tabs.addTab(tab, "📊 Resumo")
 
-    def create_summary_card(self, title, value, subtitle, color):
+    def create_summary_card(self, title, value, subtitle, tone):
         """Cria um card de resumo RESPONSIVO E CORRIGIDO"""
         card = QFrame()
         card.setFrameStyle(QFrame.Box)
         card.setLineWidth(2)
-        card.setStyleSheet(f"""
-            QFrame {{
-                background-color: white;
-                border: 2px solid {color};
-                border-radius: 8px;
-                margin: 3px;
-            }}
-        """)
+        # **OTIMIZAÇÃO: Estilo nomeado da stylesheet da aplicação (sem CSS por widget)**
+        card.setObjectName("summaryCard")
+        card.setProperty("tone", tone)
         
         # **CORREÇÃO CRÍTICA: Define política de tamanho responsiva**
         card.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.MinimumExpanding)
@@ -286,7 +278,7 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
         title_font.setPointSize(9)
         title_font.setBold(True)
         title_label.setFont(title_font)
-        title_label.setStyleSheet(f"color: {color};")
+        title_label.setProperty("tone", tone)
         layout.addWidget(title_label)
         
         # Valor principal
@@ -296,14 +288,14 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
         value_font.setPointSize(16)  # Tamanho adequado
         value_font.setBold(True)
         value_label.setFont(value_font)
-        value_label.setStyleSheet(f"color: {color};")
+        value_label.setProperty("tone", tone)
         layout.addWidget(value_label)
         
         # Subtítulo
         subtitle_label = QLabel(subtitle)
         subtitle_label.setAlignment(Qt.AlignCenter)
         subtitle_label.setFont(QFont("Arial", 8))
-        subtitle_label.setStyleSheet("color: #666;")
+        subtitle_label.setProperty("tone", "muted")
         layout.addWidget(subtitle_label)
         
         # **CORREÇÃO: Permite redimensionamento dinâmico**
@@ -324,14 +316,16 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
         
         total_outbound_label = QLabel("📤 Total de Saídas: Calculando...")
         total_outbound_label.setFont(QFont("Arial", 14, QFont.Bold))
-        total_outbound_label.setStyleSheet("color: #dc3545; padding: 10px;")
+        total_outbound_label.setProperty("tone", "danger")
+        total_outbound_label.setProperty("padded", True)
         info_layout.addWidget(total_outbound_label)
         
         info_layout.addStretch()
         
         unique_stores_label = QLabel("🏪 Lojas Atendidas: Calculando...")
         unique_stores_label.setFont(QFont("Arial", 12))
-        unique_stores_label.setStyleSheet("color: #666; padding: 10px;")
+        unique_stores_label.setProperty("tone", "muted")
+        unique_stores_label.setProperty("padded", True)
         info_layout.addWidget(unique_stores_label)
         
         layout.addLayout(info_layout)
@@ -341,19 +335,13 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
         outbound_layout = QVBoxLayout()
         
         self.outbound_table = QTableWidget()
-        self.outbound_table.setColumnCount(6)
-        self.outbound_table.setHorizontalHeaderLabels([
-            '🏪 Loja Destino', '📦 HB618', '📦 HB623', '📦 Total', '📅 Última Remessa', '📈 Frequência'
-        ])
+        self.setup_asset_table(self.outbound_table, '🏪 Loja Destino', ['📅 Última Remessa', '📈 Frequência'])
         
         # Configurar tabela
         header = self.outbound_table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.Stretch)
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(4, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)
+        for column in range(1, self.outbound_table.columnCount()):
+            header.setSectionResizeMode(column, QHeaderView.ResizeToContents)
         
         self.outbound_table.setAlternatingRowColors(True)
         self.outbound_table.setSortingEnabled(True)
@@ -378,14 +366,16 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
         
         total_inbound_label = QLabel("📥 Total de Retornos: Calculando...")
         total_inbound_label.setFont(QFont("Arial", 14, QFont.Bold))
-        total_inbound_label.setStyleSheet("color: #28a745; padding: 10px;")
+        total_inbound_label.setProperty("tone", "success")
+        total_inbound_label.setProperty("padded", True)
         info_layout.addWidget(total_inbound_label)
         
         info_layout.addStretch()
         
         return_rate_label = QLabel("📊 Taxa de Retorno: Calculando...")
         return_rate_label.setFont(QFont("Arial", 12))
-        return_rate_label.setStyleSheet("color: #666; padding: 10px;")
+        return_rate_label.setProperty("tone", "muted")
+        return_rate_label.setProperty("padded", True)
         info_layout.addWidget(return_rate_label)
         
         layout.addLayout(info_layout)
@@ -395,19 +385,13 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
         inbound_layout = QVBoxLayout()
         
         self.inbound_table = QTableWidget()
-        self.inbound_table.setColumnCount(6)
-        self.inbound_table.setHorizontalHeaderLabels([
-            '🏪 Loja Origem', '📦 HB618', '📦 HB623', '📦 Total', '📅 Último Regresso', '📈 Frequência'
-        ])
+        self.setup_asset_table(self.inbound_table, '🏪 Loja Origem', ['📅 Último Regresso', '📈 Frequência'])
         
         # Configurar tabela
         header = self.inbound_table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.Stretch)
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(4, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)
+        for column in range(1, self.inbound_table.columnCount()):
+            header.setSectionResizeMode(column, QHeaderView.ResizeToContents)
         
         self.inbound_table.setAlternatingRowColors(True)
         self.inbound_table.setSortingEnabled(True)
@@ -435,10 +419,7 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
         outbound_transfers_layout = QVBoxLayout()
         
         self.transfers_out_table = QTableWidget()
-        self.transfers_out_table.setColumnCount(5)
-        self.transfers_out_table.setHorizontalHeaderLabels([
-            '🏢 CD Destino', '📦 HB618', '📦 HB623', '📦 Total', '📅 Última'
-        ])
+        self.setup_asset_table(self.transfers_out_table, '🏢 CD Destino', ['📅 Última'])
         
         outbound_transfers_layout.addWidget(self.transfers_out_table)
         outbound_transfers_group.setLayout(outbound_transfers_layout)
@@ -449,10 +430,7 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
         inbound_transfers_layout = QVBoxLayout()
         
         self.transfers_in_table = QTableWidget()
-        self.transfers_in_table.setColumnCount(5)
-        self.transfers_in_table.setHorizontalHeaderLabels([
-            '🏢 CD Origem', '📦 HB618', '📦 HB623', '📦 Total', '📅 Última'
-        ])
+        self.setup_asset_table(self.transfers_in_table, '🏢 CD Origem', ['📅 Última'])
         
         inbound_transfers_layout.addWidget(self.transfers_in_table)
         inbound_transfers_group.setLayout(inbound_transfers_layout)
@@ -462,6 +440,28 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
         
         self.tabs.addTab(tab, "🔄 Transferências")
 
+    def setup_asset_table(self, table, first_header, trailing_headers):
+        """Configura colunas: local, uma por ativo do catálogo, total e colunas finais"""
+        headers = [first_header] + [f'📦 {code}' for code in self.asset_codes] + ['📦 Total'] + trailing_headers
+        table.setColumnCount(len(headers))
+        table.setHorizontalHeaderLabels(headers)
+
+    def fill_asset_row(self, table, row, location, assets, trailing_values):
+        """Preenche uma linha com quantidades por ativo, total e colunas finais"""
+        table.setItem(row, 0, QTableWidgetItem(location))
+        
+        column = 1
+        for code in self.asset_codes:
+            table.setItem(row, column, QTableWidgetItem(f"{assets.get(code, 0):,}".replace(",", ".")))
+            column += 1
+        
+        total = sum(assets.get(code, 0) for code in self.asset_codes)
+        table.setItem(row, column, QTableWidgetItem(f"{total:,}".replace(",", ".")))
+        
+        for value in trailing_values:
+            column += 1
+            table.setItem(row, column, QTableWidgetItem(value))
+
     def create_temporal_tab(self):
         """Aba de análise temporal"""
         tab = QWidget()
@@ -500,107 +500,48 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
         self.tabs.addTab(tab, "📈 Temporal")
 
     def load_cd_analysis(self):
-        """Carrega análise completa do CD"""
+        """Carrega análise do CD (apenas a aba visível; as demais ao serem abertas)"""
         print(f"=== CARREGANDO ANÁLISE COMPLETA PARA {self.cd_name} ===")
         
-        # Busca todos os movimentos relacionados ao CD
-        movements_query = """
-        SELECT data_movimento, tipo_movimento, rti, quantidade, 
-                local_origem, local_destino, guia, nota_fiscal
-        FROM movimentos 
-        WHERE local_origem = ? OR local_destino = ?
-        ORDER BY data_movimento DESC, id DESC
-        """
-        movements = self.db._execute_query(movements_query, (self.cd_name, self.cd_name))
-        
-        # Processar dados
-        self.process_movements_data(movements)
-        
-        # Atualizar todas as abas
-        self.update_summary_tab()
-        self.update_outbound_tab()
-        self.update_inbound_tab()
-        self.update_transfers_tab()
-        self.update_temporal_analysis()
+        self.analysis = None
+        self.flow_totals = None
+        self.temporal_cache = {}
+        self.loaded_tabs = set()
+        
+        self.load_tab(self.tabs.currentIndex())
 
-    def process_movements_data(self, movements):
-        """Processa dados de movimentos para análise"""
-        self.outbound_data = defaultdict(lambda: defaultdict(int))  # Por loja
-        self.inbound_data = defaultdict(lambda: defaultdict(int))   # Por loja
-        self.transfers_out_data = defaultdict(lambda: defaultdict(int))  # Para outros CDs
-        self.transfers_in_data = defaultdict(lambda: defaultdict(int))   # De outros CDs
-        self.temporal_data = defaultdict(lambda: defaultdict(int))  # Por data
-        
-        # Contadores totais
-        self.total_outbound = defaultdict(int)
-        self.total_inbound = defaultdict(int)
-        self.total_transfers_out = defaultdict(int)
-        self.total_transfers_in = defaultdict(int)
-        
-        # Últimas datas
-        self.last_outbound_dates = {}
-        self.last_inbound_dates = {}
-        self.last_transfer_dates = {}
-        
-        def normalize_asset(asset):
-            """Normaliza nome do ativo"""
-            if not asset:
-                return 'N/A'
-            return str(asset).strip().upper().replace(' ', '')
-        
-        for mov in movements:
-            rti = normalize_asset(mov['rti'])
-            qty = mov['quantidade']
-            tipo = mov['tipo_movimento']
-            origem = mov['local_origem']
-            destino = mov['local_destino']
-            data = mov['data_movimento']
-            
-            # **SAÍDAS DO CD (Remessas para lojas)**
-            if origem == self.cd_name and destino and destino.startswith('LOJA'):
-                if tipo == 'Remessa':
-                    self.outbound_data[destino][rti] += qty
-                    self.total_outbound[rti] += qty
-                    self.last_outbound_dates[destino] = data
-                    
-                    # Dados temporais
-                    self.temporal_data[data]['saidas'] += qty
-            
-            # **ENTRADAS NO CD (Regressos de lojas)**
-            elif destino == self.cd_name and origem and origem.startswith('LOJA'):
-                if tipo == 'Regresso':
-                    self.inbound_data[origem][rti] += qty
-                    self.total_inbound[rti] += qty
-                    self.last_inbound_dates[origem] = data
-                    
-                    # Dados temporais
-                    self.temporal_data[data]['entradas'] += qty
-            
-            # **TRANSFERÊNCIAS ENTRE CDs**
-            elif origem == self.cd_name and destino and 'CD' in destino:
-                if tipo in ('Transferencia', 'Remessa'):
-                    self.transfers_out_data[destino][rti] += qty
-                    self.total_transfers_out[rti] += qty
-                    self.last_transfer_dates[destino] = data
-                    
-                    # Dados temporais
-                    self.temporal_data[data]['transferencias_out'] += qty
-                    
-            elif destino == self.cd_name and origem and 'CD' in origem:
-                if tipo in ('Transferencia', 'Entrega', 'Retorno'):
-                    self.transfers_in_data[origem][rti] += qty
-                    self.total_transfers_in[rti] += qty
-                    self.last_transfer_dates[origem] = data
-                    
-                    # Dados temporais
-                    self.temporal_data[data]['transferencias_in'] += qty
+    def load_tab(self, index):
+        """Preenche a aba na primeira exibição; depois fica em cache durante a vida do diálogo"""
+        if index < 0 or index in self.loaded_tabs:
+            return
+        
+        self.loaded_tabs.add(index)
+        self.tab_loaders[index]()
+
+    def get_analysis(self):
+        """Análise vetorizada do cubo do CD (montada na primeira aba que precisar do detalhe)"""
+        if self.analysis is None:
+            self.analysis = cd_analysis.analyze_cd(self.db, self.cd_name)
+        return self.analysis
+
+    def get_flow_totals(self):
+        """Totais por ativo e categoria (consulta agregada pequena, suficiente para o resumo)"""
+        if self.flow_totals is None:
+            rows = self.db.get_cd_flow_totals(self.cd_name)
+            self.flow_totals = pd.DataFrame(
+                [dict(row) for row in rows],
+                columns=['ativo'] + list(cd_analysis.FLOW_RULES)
+            ).set_index('ativo')
+        return self.flow_totals
 
     def update_summary_tab(self):
         """Atualiza aba de resumo"""
+        totals = self.get_flow_totals()
+        
         # Calcular totais
-        total_out = sum(self.total_outbound.values())
-        total_in = sum(self.total_inbound.values())
-        total_transfers = sum(self.total_transfers_out.values()) + sum(self.total_transfers_in.values())
+        total_out = int(totals['saidas'].sum())
+        total_in = int(totals['entradas'].sum())
+        total_transfers = int(totals['transferencias_out'].sum() + totals['transferencias_in'].sum())
         saldo_liquido = total_in - total_out
         
         # Atualizar cards
@@ -610,28 +551,25 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
         
         # Saldo com cor baseada no valor
         if saldo_liquido > 0:
-            color = "#28a745"
+            tone = "success"
             signal = "+"
         elif saldo_liquido < 0:
-            color = "#dc3545" 
+            tone = "danger"
             signal = ""
         else:
-            color = "#6c757d"
+            tone = "secondary"
             signal = ""
             
         self.balance_card.value_label.setText(f"{signal}{saldo_liquido:,}".replace(",", "."))
-        self.balance_card.value_label.setStyleSheet(f"color: {color};")
+        AppearanceManager.set_style_property(self.balance_card.value_label, "tone", tone)
         
         # Atualizar tabela de ativos
-        assets = set(list(self.total_outbound.keys()) + list(self.total_inbound.keys()) + 
-                    list(self.total_transfers_out.keys()) + list(self.total_transfers_in.keys()))
+        self.assets_table.setRowCount(len(totals))
         
-        self.assets_table.setRowCount(len(assets))
-        
-        for i, asset in enumerate(sorted(assets)):
-            saidas = self.total_outbound.get(asset, 0)
-            entradas = self.total_inbound.get(asset, 0)
-            transf = self.total_transfers_out.get(asset, 0) + self.total_transfers_in.get(asset, 0)
+        for i, (asset, row) in enumerate(totals.iterrows()):
+            saidas = int(row['saidas'])
+            entradas = int(row['entradas'])
+            transf = int(row['transferencias_out'] + row['transferencias_in'])
             saldo = entradas - saidas
             
             self.assets_table.setItem(i, 0, QTableWidgetItem(asset))
@@ -648,42 +586,35 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
             
             self.assets_table.setItem(i, 4, saldo_item)
 
+    def fill_location_table(self, table, category, trailing_columns):
+        """Preenche tabela contraparte x ativo de uma categoria; trailing_columns recebe (local) -> valores finais"""
+        locations = self.get_analysis().by_location(category, self.asset_codes)
+        table.setRowCount(len(locations))
+        
+        for i, (location, assets) in enumerate(locations.iterrows()):
+            self.fill_asset_row(table, i, location, assets, trailing_columns(location))
+        
+        return len(locations)
+
     def update_outbound_tab(self):
         """Atualiza aba de saídas"""
-        total_saidas = sum(self.total_outbound.values())
-        lojas_atendidas = len(self.outbound_data)
+        analysis = self.get_analysis()
+        total_saidas = analysis.total('saidas')
+        last_dates = analysis.last_dates('saidas')
+        frequency = analysis.frequency('saidas')
+        
+        lojas_atendidas = self.fill_location_table(
+            self.outbound_table, 'saidas',
+            lambda loja: [last_dates.get(loja, "N/A"), f"{frequency.get(loja, 0)} remessas"])
         
         self.total_outbound_label.setText(f"📤 Total de Saídas: {total_saidas:,}".replace(",", "."))
         self.unique_stores_label.setText(f"🏪 Lojas Atendidas: {lojas_atendidas}")
-        
-        # Preencher tabela
-        self.outbound_table.setRowCount(len(self.outbound_data))
-        
-        for i, (loja, assets) in enumerate(self.outbound_data.items()):
-            hb618 = assets.get('HB618', 0)
-            hb623 = assets.get('HB623', 0)
-            total = hb618 + hb623
-            
-            # Calcular frequência (número de remessas diferentes)
-            freq_query = """
-            SELECT COUNT(DISTINCT data_movimento) as freq
-            FROM movimentos 
-            WHERE local_origem = ? AND local_destino = ? AND tipo_movimento = 'Remessa'
-            """
-            freq_result = self.db._execute_query(freq_query, (self.cd_name, loja))
-            frequencia = freq_result[0]['freq'] if freq_result else 0
-            
-            self.outbound_table.setItem(i, 0, QTableWidgetItem(loja))
-            self.outbound_table.setItem(i, 1, QTableWidgetItem(f"{hb618:,}".replace(",", ".")))
-            self.outbound_table.setItem(i, 2, QTableWidgetItem(f"{hb623:,}".replace(",", ".")))
-            self.outbound_table.setItem(i, 3, QTableWidgetItem(f"{total:,}".replace(",", ".")))
-            self.outbound_table.setItem(i, 4, QTableWidgetItem(self.last_outbound_dates.get(loja, "N/A")))
-            self.outbound_table.setItem(i, 5, QTableWidgetItem(f"{frequencia} remessas"))
 
     def update_inbound_tab(self):
         """Atualiza aba de retornos"""
-        total_retornos = sum(self.total_inbound.values())
-        total_saidas = sum(self.total_outbound.values())
+        analysis = self.get_analysis()
+        total_retornos = analysis.total('entradas')
+        total_saidas = analysis.total('saidas')
         
         # Taxa de retorno
         taxa_retorno = (total_retornos / total_saidas * 100) if total_saidas > 0 else 0
@@ -691,108 +622,82 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
         self.total_inbound_label.setText(f"📥 Total de Retornos: {total_retornos:,}".replace(",", "."))
         self.return_rate_label.setText(f"📊 Taxa de Retorno: {taxa_retorno:.1f}%")
         
-        # Preencher tabela
-        self.inbound_table.setRowCount(len(self.inbound_data))
+        last_dates = analysis.last_dates('entradas')
+        frequency = analysis.frequency('entradas')
         
-        for i, (loja, assets) in enumerate(self.inbound_data.items()):
-            hb618 = assets.get('HB618', 0)
-            hb623 = assets.get('HB623', 0)
-            total = hb618 + hb623
-            
-            # Calcular frequência
-            freq_query = """
-            SELECT COUNT(DISTINCT data_movimento) as freq
-            FROM movimentos 
-            WHERE local_destino = ? AND local_origem = ? AND tipo_movimento = 'Regresso'
-            """
-            freq_result = self.db._execute_query(freq_query, (self.cd_name, loja))
-            frequencia = freq_result[0]['freq'] if freq_result else 0
-            
-            self.inbound_table.setItem(i, 0, QTableWidgetItem(loja))
-            self.inbound_table.setItem(i, 1, QTableWidgetItem(f"{hb618:,}".replace(",", ".")))
-            self.inbound_table.setItem(i, 2, QTableWidgetItem(f"{hb623:,}".replace(",", ".")))
-            self.inbound_table.setItem(i, 3, QTableWidgetItem(f"{total:,}".replace(",", ".")))
-            self.inbound_table.setItem(i, 4, QTableWidgetItem(self.last_inbound_dates.get(loja, "N/A")))
-            self.inbound_table.setItem(i, 5, QTableWidgetItem(f"{frequencia} regressos"))
+        self.fill_location_table(
+            self.inbound_table, 'entradas',
+            lambda loja: [last_dates.get(loja, "N/A"), f"{frequency.get(loja, 0)} regressos"])
 
     def update_transfers_tab(self):
         """Atualiza aba de transferências"""
-        # Transferências de saída
-        self.transfers_out_table.setRowCount(len(self.transfers_out_data))
+        # Última transferência com cada CD, em qualquer sentido
+        last_dates = self.get_analysis().last_dates('transferencias_out', 'transferencias_in')
         
-        for i, (cd_destino, assets) in enumerate(self.transfers_out_data.items()):
-            hb618 = assets.get('HB618', 0)
-            hb623 = assets.get('HB623', 0)
-            total = hb618 + hb623
+        self.fill_location_table(self.transfers_out_table, 'transferencias_out',
+                                 lambda cd: [last_dates.get(cd, "N/A")])
+        self.fill_location_table(self.transfers_in_table, 'transferencias_in',
+                                 lambda cd: [last_dates.get(cd, "N/A")])
+
+    # Opções do combo -> agrupamento calculado no SQL
+    PERIOD_TYPES = {'Diário': 'dia', 'Semanal': 'semana', 'Mensal': 'mes'}
+
+    def get_temporal_rows(self, period_type):
+        """Linhas da análise temporal por período (cache por tipo de agrupamento)"""
+        if period_type not in self.temporal_cache:
+            period = self.PERIOD_TYPES[period_type]
+            totals = self.db.get_cd_period_totals(self.cd_name, period)
             
-            self.transfers_out_table.setItem(i, 0, QTableWidgetItem(cd_destino))
-            self.transfers_out_table.setItem(i, 1, QTableWidgetItem(f"{hb618:,}".replace(",", ".")))
-            self.transfers_out_table.setItem(i, 2, QTableWidgetItem(f"{hb623:,}".replace(",", ".")))
-            self.transfers_out_table.setItem(i, 3, QTableWidgetItem(f"{total:,}".replace(",", ".")))
-            self.transfers_out_table.setItem(i, 4, QTableWidgetItem(self.last_transfer_dates.get(cd_destino, "N/A")))
-        
-        # Transferências de entrada
-        self.transfers_in_table.setRowCount(len(self.transfers_in_data))
-        
-        for i, (cd_origem, assets) in enumerate(self.transfers_in_data.items()):
-            hb618 = assets.get('HB618', 0)
-            hb623 = assets.get('HB623', 0)
-            total = hb618 + hb623
+            rows = []
+            previous_volume = None
+            for row in totals:
+                saidas = row['saidas']
+                entradas = row['entradas']
+                transferencias = row['transferencias_out'] + row['transferencias_in']
+                volume = saidas + entradas + transferencias
+                
+                # Variação do volume movimentado em relação ao período anterior
+                if previous_volume is None:
+                    variacao = "N/A"
+                elif previous_volume == 0:
+                    variacao = "🆕 Novo"
+                else:
+                    change = (volume - previous_volume) / previous_volume * 100
+                    if change > 0:
+                        variacao = f"📈 +{change:.1f}%"
+                    elif change < 0:
+                        variacao = f"📉 {change:.1f}%"
+                    else:
+                        variacao = "➡️ 0%"
+                previous_volume = volume
+                
+                rows.append((self.format_period(row['periodo'], period), saidas, entradas,
+                             transferencias, entradas - saidas, variacao))
             
-            self.transfers_in_table.setItem(i, 0, QTableWidgetItem(cd_origem))
-            self.transfers_in_table.setItem(i, 1, QTableWidgetItem(f"{hb618:,}".replace(",", ".")))
-            self.transfers_in_table.setItem(i, 2, QTableWidgetItem(f"{hb623:,}".replace(",", ".")))
-            self.transfers_in_table.setItem(i, 3, QTableWidgetItem(f"{total:,}".replace(",", ".")))
-            self.transfers_in_table.setItem(i, 4, QTableWidgetItem(self.last_transfer_dates.get(cd_origem, "N/A")))
+            rows.reverse()  # Períodos mais recentes primeiro
+            self.temporal_cache[period_type] = rows
+        
+        return self.temporal_cache[period_type]
+
+    @staticmethod
+    def format_period(period_start, period):
+        """Formata o início do período (AAAA-MM-DD) para exibição"""
+        date_obj = datetime.strptime(period_start, '%Y-%m-%d')
+        if period == 'semana':
+            return f"Semana {date_obj.strftime('%d/%m/%Y')}"
+        if period == 'mes':
+            return date_obj.strftime('%m/%Y')
+        return date_obj.strftime('%d/%m/%Y')
 
     def update_temporal_analysis(self):
         """Atualiza análise temporal"""
-        period_type = self.period_combo.currentText()
-        
-        # Agrupar dados por período
-        grouped_data = defaultdict(lambda: defaultdict(int))
-        
-        for date_str, movements in self.temporal_data.items():
-            try:
-                date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                
-                if period_type == 'Diário':
-                    period_key = date_obj.strftime('%d/%m/%Y')
-                elif period_type == 'Semanal':
-                    # Início da semana (segunda-feira)
-                    start_week = date_obj - timedelta(days=date_obj.weekday())
-                    period_key = f"Semana {start_week.strftime('%d/%m/%Y')}"
-                else:  # Mensal
-                    period_key = date_obj.strftime('%m/%Y')
-                
-                for mov_type, qty in movements.items():
-                    grouped_data[period_key][mov_type] += qty
-                    
-            except ValueError:
-                continue
+        # **OTIMIZAÇÃO: Agrupamento no SQL sobre o cubo, recalculado só na primeira vez de cada período**
+        rows = self.get_temporal_rows(self.period_combo.currentText())
         
         # Preencher tabela temporal
-        self.temporal_table.setRowCount(len(grouped_data))
-        
-        for i, (period, data) in enumerate(sorted(grouped_data.items(), reverse=True)):
-            saidas = data.get('saidas', 0)
-            entradas = data.get('entradas', 0)
-            transf_out = data.get('transferencias_out', 0)
-            transf_in = data.get('transferencias_in', 0)
-            transferencias = transf_out + transf_in
-            saldo = entradas - saidas
-            
-            # Calcular variação (simulada)
-            variacao = "N/A"
-            if i < len(grouped_data) - 1:
-                # Comparar com período anterior (lógica simplificada)
-                if saldo > 0:
-                    variacao = "📈 +X%"
-                elif saldo < 0:
-                    variacao = "📉 -X%"
-                else:
-                    variacao = "➡️ 0%"
-            
+        self.temporal_table.setRowCount(len(rows))
+        
+        for i, (period, saidas, entradas, transferencias, saldo, variacao) in enumerate(rows):
             self.temporal_table.setItem(i, 0, QTableWidgetItem(period))
             self.temporal_table.setItem(i, 1, QTableWidgetItem(f"{saidas:,}".replace(",", ".")))
             self.temporal_table.setItem(i, 2, QTableWidgetItem(f"{entradas:,}".replace(",", ".")))
@@ -811,7 +716,6 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
     def export_analysis(self):
         """Exporta análise completa"""
         try:
-            import pandas as pd
             from PyQt5.QtWidgets import QFileDialog, QMessageBox
             import datetime
             
@@ -822,84 +726,10 @@ class CDFlowAnalysisDialog(QDialog, ResponsiveDialog):
             )
             
             if file_path:
+                # Mesmo motor da tela: as planilhas saem da análise já carregada
                 with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                    # Aba 1: Resumo
-                    summary_data = []
-                    summary_data.append({
-                        'Métrica': 'Total de Saídas',
-                        'Valor': sum(self.total_outbound.values()),
-                        'Descrição': 'Remessas para lojas'
-                    })
-                    summary_data.append({
-                        'Métrica': 'Total de Retornos',
-                        'Valor': sum(self.total_inbound.values()),
-                        'Descrição': 'Regressos das lojas'
-                    })
-                    summary_data.append({
-                        'Métrica': 'Transferências',
-                        'Valor': sum(self.total_transfers_out.values()) + sum(self.total_transfers_in.values()),
-                        'Descrição': 'Entre CDs'
-                    })
-                    
-                    summary_df = pd.DataFrame(summary_data)
-                    summary_df.to_excel(writer, sheet_name='Resumo', index=False)
-                    
-                    # Aba 2: Saídas detalhadas
-                    outbound_data = []
-                    for loja, assets in self.outbound_data.items():
-                        outbound_data.append({
-                            'Loja': loja,
-                            'HB618': assets.get('HB618', 0),
-                            'HB623': assets.get('HB623', 0),
-                            'Total': sum(assets.values()),
-                            'Última_Remessa': self.last_outbound_dates.get(loja, 'N/A')
-                        })
-                    
-                    if outbound_data:
-                        outbound_df = pd.DataFrame(outbound_data)
-                        outbound_df.to_excel(writer, sheet_name='Saídas_Detalhadas', index=False)
-                    
-                    # Aba 3: Retornos detalhados
-                    inbound_data = []
-                    for loja, assets in self.inbound_data.items():
-                        inbound_data.append({
-                            'Loja': loja,
-                            'HB618': assets.get('HB618', 0),
-                            'HB623': assets.get('HB623', 0),
-                            'Total': sum(assets.values()),
-                            'Último_Regresso': self.last_inbound_dates.get(loja, 'N/A')
-                        })
-                    
-                    if inbound_data:
-                        inbound_df = pd.DataFrame(inbound_data)
-                        inbound_df.to_excel(writer, sheet_name='Retornos_Detalhados', index=False)
-                    
-                    # Aba 4: Transferências
-                    transfers_data = []
-                    
-                    # Transferências de saída
-                    for cd, assets in self.transfers_out_data.items():
-                        transfers_data.append({
-                            'Tipo': 'Saída',
-                            'CD_Relacionado': cd,
-                            'HB618': assets.get('HB618', 0),
-                            'HB623': assets.get('HB623', 0),
-                            'Total': sum(assets.values())
-                        })
-                    
-                    # Transferências de entrada
-                    for cd, assets in self.transfers_in_data.items():
-                        transfers_data.append({
-                            'Tipo': 'Entrada',
-                            'CD_Relacionado': cd,
-                            'HB618': assets.get('HB618', 0),
-                            'HB623': assets.get('HB623', 0),
-                            'Total': sum(assets.values())
-                        })
-                    
-                    if transfers_data:
-                        transfers_df = pd.DataFrame(transfers_data)
-                        transfers_df.to_excel(writer, sheet_name='Transferências', index=False)
+                    for sheet_name, frame in self.get_analysis().export_sheets(self.asset_codes).items():
+                        frame.to_excel(writer, sheet_name=sheet_name, index=False)
                 
                 QMessageBox.information(self, "✅ Sucesso", f"Análise completa exportada para:\n{file_path}")
                 
@@ -918,14 +748,19 @@ class FlowVisualDialog(QDialog, ResponsiveDialog):
         self.make_responsive("large", center=True)
         
         # Detecta se é CD e oferece análise completa
-        self.is_cd = not location_name.startswith('LOJA')
+        self.is_cd = self.db.get_location_kind(location_name) != 'loja'
         
+        # **OTIMIZAÇÃO: Evolução compacta (abertura + variações por dia), saldos montados sob demanda**
         if self.is_cd:
-            self.daily_data = self.get_cd_daily_evolution(location_name)
+            self.daily_data = stock_engine.cd_evolution(self.db, location_name)
         else:
             self.daily_data = self.db.get_daily_stock_evolution(location_name)
         
         self.asset_filter = "Todos"
+        self.initial_inventory = self.get_initial_inventory()
+        self.zoom = 'dia'
+        self.day_model = None
+        self.period_models = {}
         
         self.init_ui()
         self.update_flow_display()
@@ -955,19 +790,8 @@ class FlowVisualDialog(QDialog, ResponsiveDialog):
         if self.is_cd:
             self.analysis_button = QPushButton("📊 Análise Completa")
             self.analysis_button.setFont(QFont("Arial", 10))
-            self.analysis_button.setStyleSheet("""
-                QPushButton {
-                    background-color: #007bff;
-                    color: white;
-                    padding: 6px 12px;
-                    border: none;
-                    border-radius: 4px;
-                    font-weight: bold;
-                }
-                QPushButton:hover {
-                    background-color: #0056b3;
-                }
-            """)
+            self.analysis_button.setProperty("variant", "primary")
+            self.analysis_button.setProperty("compact", True)
             self.analysis_button.clicked.connect(self.open_complete_analysis)
             header_layout.addWidget(self.analysis_button)
         
@@ -985,21 +809,10 @@ class FlowVisualDialog(QDialog, ResponsiveDialog):
             assets_found = set()
             
             if not self.is_cd:
-                initial_inventory = self.get_initial_inventory()
-                assets_found.update(initial_inventory.keys())
+                assets_found.update(self.initial_inventory.keys())
             
-            for day_data in self.daily_data:
-                movements = day_data.get('movements', [])
-                if isinstance(movements, list):
-                    for mov in movements:
-                        if hasattr(mov, 'keys'):
-                            rti = mov['rti'] if mov['rti'] else None
-                        else:
-                            rti = mov.get('rti')
-                        
-                        if rti:
-                            normalized_rti = str(rti).strip().upper().replace(' ', '')
-                            assets_found.add(normalized_rti)
+            # Ativos com movimento (linhas sem ativo ficam como N/A e não entram no filtro)
+            assets_found.update(asset for asset in self.daily_data.assets if asset != 'N/A')
             
             for asset in sorted(assets_found):
                 self.asset_combo.addItem(asset)
@@ -1007,24 +820,39 @@ class FlowVisualDialog(QDialog, ResponsiveDialog):
         self.asset_combo.currentTextChanged.connect(self.on_filter_changed)
         header_layout.addWidget(self.asset_combo)
         
-        main_layout.addLayout(header_layout)
-        
-        # **CORREÇÃO CRÍTICA: Área de scroll com configuração responsiva melhorada**
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        self.scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        # Zoom: um card por dia, semana ou mês
+        zoom_label = QLabel("Zoom:")
+        zoom_label.setFont(QFont("Arial", 10))
+        header_layout.addWidget(zoom_label)
         
-        # **CORREÇÃO: Widget de flow com configurações responsivas**
-        self.flow_widget = QWidget()
-        self.flow_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.MinimumExpanding)
+        self.zoom_combo = QComboBox()
+        self.zoom_combo.setFont(QFont("Arial", 10))
+        self.zoom_combo.addItems(list(ZOOM_LEVELS))
+        self.zoom_combo.currentTextChanged.connect(self.on_zoom_changed)
+        header_layout.addWidget(self.zoom_combo)
         
-        self.flow_layout = QHBoxLayout(self.flow_widget)
-        self.flow_layout.setSpacing(10)  # **CORREÇÃO: Espaçamento reduzido**
-        self.flow_layout.setContentsMargins(10, 10, 10, 10)
+        main_layout.addLayout(header_layout)
         
-        self.scroll_area.setWidget(self.flow_widget)
-        main_layout.addWidget(self.scroll_area)
+        # Barra do detalhamento de um período (dias da semana/mês escolhido)
+        drill_layout = QHBoxLayout()
+        self.back_button = QPushButton("⬅️ Voltar")
+        self.back_button.setFont(QFont("Arial", 10))
+        self.back_button.clicked.connect(self.update_flow_display)
+        drill_layout.addWidget(self.back_button)
+        
+        self.drill_label = QLabel()
+        self.drill_label.setFont(QFont("Arial", 10, QFont.Bold))
+        drill_layout.addWidget(self.drill_label)
+        drill_layout.addStretch()
+        main_layout.addLayout(drill_layout)
+        self.back_button.hide()
+        self.drill_label.hide()
+        
+        # **OTIMIZAÇÃO: Linha do tempo virtualizada - só os cards visíveis são montados e pintados**
+        self.timeline = FlowTimelineView()
+        self.timeline.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.timeline.cardActivated.connect(self.on_card_activated)
+        main_layout.addWidget(self.timeline)
         
         # Botões de ação responsivos
         button_layout = QHBoxLayout()
@@ -1048,483 +876,59 @@ class FlowVisualDialog(QDialog, ResponsiveDialog):
         analysis_dialog = CDFlowAnalysisDialog(self.location_name, self.db, self)
         analysis_dialog.exec_()
 
-    def get_cd_daily_evolution(self, cd_name):
-        """Calcula evolução diária para CDs"""
-        print(f"=== EVOLUÇÃO CD PARA {cd_name} ===")
-        
-        movements_query = """
-        SELECT data_movimento, tipo_movimento, rti, quantidade, local_origem, local_destino
-        FROM movimentos 
-        WHERE (local_origem = ? OR local_destino = ?)
-        ORDER BY data_movimento ASC, id ASC
-        """
-        movements = self.db._execute_query(movements_query, (cd_name, cd_name))
-
-        def normalize_asset_name(asset_name):
-            if not asset_name:
-                return 'N/A'
-            normalized = str(asset_name).strip().upper()
-            normalized = normalized.replace(' ', '')
-            return normalized
+    def on_filter_changed(self, asset_name):
+        self.asset_filter = asset_name
+        self.timeline.set_filter(asset_name)
 
-        from collections import defaultdict
-        movements_by_date = defaultdict(list)
-        for mov in movements:
-            movements_by_date[mov['data_movimento']].append(mov)
+    def on_zoom_changed(self, zoom_label):
+        self.zoom = ZOOM_LEVELS[zoom_label]
+        self.update_flow_display()
 
-        daily_evolution = []
-        current_stock = defaultdict(int)  # Começa com zero para CDs
+    def on_card_activated(self, index):
+        """Duplo clique num card de semana/mês: mostra os dias do período"""
+        model = self.timeline.model
+        if not isinstance(model, FlowPeriodModel):
+            return
         
-        # Processa cada data em ordem
-        for date in sorted(movements_by_date.keys()):
-            day_movements = movements_by_date[date]
-            
-            print(f"\n--- Processando data CD: {date} ---")
-            print(f"Estoque CD no início do dia: {dict(current_stock)}")
-            
-            # Aplica todos os movimentos do dia
-            for mov in day_movements:
-                raw_rti = mov['rti'] if mov['rti'] else 'N/A'
-                rti = normalize_asset_name(raw_rti)
-                qtde = mov['quantidade']
-                tipo = mov['tipo_movimento']
-                origem = mov['local_origem']
-                destino = mov['local_destino']
-                
-                print(f"Movimento CD: {tipo} {qtde} '{raw_rti}' -> '{rti}' (de {origem} para {destino})")
-                
-                old_qty = current_stock[rti]
-                
-                # Lógica para CDs
-                if destino == cd_name:
-                    if tipo in ('Regresso', 'Entrega', 'Transferencia', 'Retorno'):
-                        current_stock[rti] += qtde
-                        print(f"  ✅ Entrada CD: {rti} {old_qty} + {qtde} = {current_stock[rti]}")
-                        
-                elif origem == cd_name:
-                    if tipo in ('Remessa', 'Transferencia', 'Devolução de Entrega'):
-                        current_stock[rti] -= qtde
-                        print(f"  ❌ Saída CD: {rti} {old_qty} - {qtde} = {current_stock[rti]}")
-
-            print(f"Estoque CD final do dia {date}: {dict(current_stock)}")
+        start, end = model.day_range(index)
+        self.timeline.set_model(DayRangeModel(self.get_day_model(), start, end))
+        self.drill_label.setText(model.title(index))
+        self.back_button.show()
+        self.drill_label.show()
 
-            daily_evolution.append({
-                'date': date,
-                'stock': current_stock.copy(),
-                'movements': day_movements.copy()
-            })
+    def get_day_model(self):
+        """Modelo dos cards diários (montado na primeira vez que é preciso)"""
+        if self.day_model is None:
+            self.day_model = FlowTimelineModel(self.daily_data, self.is_cd, self.initial_inventory)
+        return self.day_model
 
-        return daily_evolution
-
-    def on_filter_changed(self, asset_name):
-        self.asset_filter = asset_name
-        self.update_flow_display()
+    def get_period_model(self, period):
+        """Modelo agregado por semana/mês, guardado por nível de zoom"""
+        if period not in self.period_models:
+            self.period_models[period] = FlowPeriodModel(self.get_day_model(), period)
+        return self.period_models[period]
 
     def update_flow_display(self):
-        # Limpa layout atual
-        for i in reversed(range(self.flow_layout.count())):
-            child = self.flow_layout.itemAt(i).widget()
-            if child:
-                child.setParent(None)
-        
         if not self.daily_data:
-            no_data_label = QLabel(f"❌ Nenhum dado encontrado para {self.location_name}.\n\n📦 {'Carregue o inventário inicial nas configurações.' if not self.is_cd else 'Verifique se há movimentos para este CD.'}")
-            no_data_label.setAlignment(Qt.AlignCenter)
-            no_data_label.setFont(QFont("Arial", 14))
-            no_data_label.setStyleSheet("""
-                QLabel {
-                    color: #666; 
-                    font-size: 16px; 
-                    padding: 50px;
-                    background-color: #f8f9fa;
-                    border: 2px dashed #dee2e6;
-                    border-radius: 10px;
-                }
-            """)
-            self.flow_layout.addWidget(no_data_label)
+            self.timeline.set_placeholder(f"❌ Nenhum dado encontrado para {self.location_name}.\n\n📦 {'Carregue o inventário inicial nas configurações.' if not self.is_cd else 'Verifique se há movimentos para este CD.'}")
             return
         
-        # Para lojas, adiciona inventário inicial
-        if not self.is_cd:
-            self.add_inventory_card()
-            if self.daily_data:
-                self.add_arrow()
-        
-        # Adiciona cards para cada dia
-        for i, day_data in enumerate(self.daily_data):
-            self.add_day_card(day_data, i)
-            
-            if i < len(self.daily_data) - 1:
-                self.add_arrow()
-        
-        self.flow_layout.addStretch()
-
-    def add_inventory_card(self):
-        """Adiciona card do inventário inicial (só para lojas)"""
-        card = QFrame()
-        card.setFrameStyle(QFrame.Box)
-        card.setLineWidth(2)
-        card.setStyleSheet("""
-            QFrame {
-                background-color: #e8f5e8;
-                border: 2px solid #5cb85c;
-                border-radius: 8px;
-                margin: 3px;
-            }
-        """)
-        
-        # **CORREÇÃO CRÍTICA: Define tamanho fixo e política de tamanho**
-        card.setFixedWidth(280)
-        card.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.MinimumExpanding)
-        card.setMinimumHeight(250)  # Altura mínima garantida
-        card.setMaximumHeight(400)  # Altura máxima para evitar cards gigantes
-        
-        layout = QVBoxLayout(card)
-        layout.setSpacing(8)
-        layout.setContentsMargins(12, 12, 12, 12)
-        
-        # Título
-        title = QLabel("📦 INVENTÁRIO INICIAL")
-        title.setAlignment(Qt.AlignCenter)
-        title_font = QFont()
-        title_font.setBold(True)
-        title_font.setPointSize(12)
-        title.setFont(title_font)
-        layout.addWidget(title)
-        
-        # Data
-        date_label = QLabel("📅 08/06/2025")
-        date_label.setAlignment(Qt.AlignCenter)
-        date_label.setFont(QFont("Arial", 10))
-        date_label.setStyleSheet("color: #666;")
-        layout.addWidget(date_label)
-        
-        # Separador
-        separator = QFrame()
-        separator.setFrameShape(QFrame.HLine)
-        separator.setStyleSheet("background-color: #5cb85c;")
-        layout.addWidget(separator)
-        
-        # Estoque inicial
-        stock_title = QLabel("📊 Estoque Base:")
-        stock_title.setFont(QFont("Arial", 10, QFont.Bold))
-        stock_title.setStyleSheet("color: #2d5a2d;")
-        layout.addWidget(stock_title)
-        
-        inventory_data = self.get_initial_inventory()
-        if inventory_data:
-            for asset, quantity in inventory_data.items():
-                if self.asset_filter == "Todos" or self.asset_filter == asset:
-                    asset_label = QLabel(f"• {asset}: {quantity:,}".replace(",", "."))
-                    asset_label.setFont(QFont("Arial", 11, QFont.Bold))
-                    asset_label.setStyleSheet("padding: 3px;")
-                    layout.addWidget(asset_label)
-        else:
-            no_stock_label = QLabel("⚠️ Sem dados")
-            no_stock_label.setFont(QFont("Arial", 10))
-            no_stock_label.setStyleSheet("color: #999; font-style: italic;")
-            layout.addWidget(no_stock_label)
-        
-        layout.addStretch()
-        self.flow_layout.addWidget(card)
-
-    def add_day_card(self, day_data, day_index):
-        """**CORREÇÃO CRÍTICA**: Adiciona card de um dia específico com altura corrigida"""
-        
-        def normalize_asset_name(asset_name):
-            if not asset_name:
-                return 'N/A'
-            normalized = str(asset_name).strip().upper()
-            normalized = normalized.replace(' ', '')
-            return normalized
-        
-        card = QFrame()
-        card.setFrameStyle(QFrame.Box)
-        card.setLineWidth(2)
-        card.setStyleSheet("""
-            QFrame {
-                background-color: #f8f9fa;
-                border: 2px solid #007bff;
-                border-radius: 8px;
-                margin: 3px;
-            }
-        """)
-        
-        # **CORREÇÃO CRÍTICA: Tamanho fixo responsivo**
-        card.setFixedWidth(280)  # Largura fixa para consistência
-        card.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.MinimumExpanding)
-        card.setMinimumHeight(300)  # **CORREÇÃO: Altura mínima suficiente**
-        card.setMaximumHeight(500)  # **CORREÇÃO: Altura máxima controlada**
-        
-        layout = QVBoxLayout(card)
-        layout.setSpacing(6)  # **CORREÇÃO: Espaçamento adequado**
-        layout.setContentsMargins(10, 10, 10, 10)
-        # Título com data
-        date_str = day_data['date']
-        if isinstance(date_str, str):
-            try:
-                date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                formatted_date = date_obj.strftime('%d/%m/%Y')
-                day_name = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom'][date_obj.weekday()]
-                title_text = f"📅 {formatted_date} ({day_name})"
-            except:
-                title_text = f"📅 {date_str}"
-        else:
-            title_text = f"📅 {date_str}"
-            
-        title = QLabel(title_text)
-        title.setAlignment(Qt.AlignCenter)
-        title_font = QFont()
-        title_font.setBold(True)
-        title_font.setPointSize(10)  # **CORREÇÃO: Fonte adequada**
-        title.setFont(title_font)
-        layout.addWidget(title)
+        self.back_button.hide()
+        self.drill_label.hide()
         
-        # **CORREÇÃO: Calcula saldo inicial corretamente**
-        if not self.is_cd and day_index == 0:
-            previous_stock = self.get_initial_inventory()
-        elif not self.is_cd and day_index > 0:
-            previous_day_data = self.daily_data[day_index - 1]
-            previous_stock = previous_day_data['stock']
-        else:
-            if day_index == 0:
-                previous_stock = {}
-            else:
-                previous_day_data = self.daily_data[day_index - 1]
-                previous_stock = previous_day_data['stock']
-        
-        # **CORREÇÃO: Seção de saldo inicial com altura controlada**
-        initial_frame = QFrame()
-        initial_frame.setStyleSheet("background-color: #e3f2fd; border-radius: 4px; margin: 2px;")
-        initial_frame.setMaximumHeight(80)  # **CORREÇÃO: Altura máxima**
-        initial_layout = QVBoxLayout(initial_frame)
-        initial_layout.setContentsMargins(8, 5, 8, 5)
-        initial_layout.setSpacing(2)  # **CORREÇÃO: Espaçamento menor**
-        
-        initial_title = QLabel("📊 Saldo Inicial:")
-        initial_title.setFont(QFont("Arial", 9, QFont.Bold))
-        initial_title.setStyleSheet("color: #1565c0;")
-        initial_layout.addWidget(initial_title)
-        
-        # **CORREÇÃO: Limita número de itens mostrados no saldo inicial**
-        shown_items = 0
-        max_items = 2  # Máximo 2 itens para economizar espaço
-        
-        if previous_stock:
-            for asset, quantity in list(previous_stock.items())[:max_items]:
-                if self.asset_filter == "Todos" or self.asset_filter == asset:
-                    initial_label = QLabel(f"• {asset}: {quantity:,}".replace(",", "."))
-                    initial_label.setFont(QFont("Arial", 8))  # **CORREÇÃO: Fonte menor**
-                    initial_label.setStyleSheet("padding: 1px;")
-                    initial_layout.addWidget(initial_label)
-                    shown_items += 1
-            
-            # Se há mais itens, mostra indicador
-            if len(previous_stock) > max_items:
-                more_label = QLabel(f"... e mais {len(previous_stock) - max_items} itens")
-                more_label.setFont(QFont("Arial", 8))
-                more_label.setStyleSheet("color: #666; font-style: italic; padding: 1px;")
-                initial_layout.addWidget(more_label)
+        # **OTIMIZAÇÃO: Modelos montados uma vez por nível de zoom; o filtro só escolhe as linhas**
+        if self.zoom == 'dia':
+            self.timeline.set_model(self.get_day_model())
         else:
-            zero_label = QLabel("• Saldo: 0")
-            zero_label.setFont(QFont("Arial", 8))
-            zero_label.setStyleSheet("padding: 1px; color: #666;")
-            initial_layout.addWidget(zero_label)
-        
-        layout.addWidget(initial_frame)
-        
-        # **CORREÇÃO: Seção de movimentos com altura controlada**
-        movements = day_data.get('movements', [])
-        if movements:
-            movements_frame = QFrame()
-            movements_frame.setStyleSheet("background-color: #fff3cd; border-radius: 4px; margin: 2px;")
-            movements_frame.setMaximumHeight(100)  # **CORREÇÃO: Altura máxima**
-            movements_layout = QVBoxLayout(movements_frame)
-            movements_layout.setContentsMargins(8, 5, 8, 5)
-            movements_layout.setSpacing(2)
-            
-            movements_title = QLabel("🔄 Movimentos:")
-            movements_title.setFont(QFont("Arial", 9, QFont.Bold))
-            movements_title.setStyleSheet("color: #856404;")
-            movements_layout.addWidget(movements_title)
-            
-            # **CORREÇÃO: Agrupa movimentos por ativo para economizar espaço**
-            movements_by_asset = defaultdict(list)
-            for mov in movements:
-                if hasattr(mov, 'keys'):
-                    raw_rti = mov['rti'] if mov['rti'] else 'N/A'
-                    rti = normalize_asset_name(raw_rti)
-                    tipo = mov['tipo_movimento']
-                    qtde = mov['quantidade']
-                    origem = mov['local_origem']
-                    destino = mov['local_destino']
-                else:
-                    raw_rti = mov.get('rti', 'N/A') or 'N/A'
-                    rti = normalize_asset_name(raw_rti)
-                    tipo = mov.get('tipo_movimento', '')
-                    qtde = mov.get('quantidade', 0)
-                    origem = mov.get('local_origem', '')
-                    destino = mov.get('local_destino', '')
-                
-                if self.asset_filter == "Todos" or normalize_asset_name(self.asset_filter) == rti:
-                    movements_by_asset[rti].append({
-                        'tipo': tipo, 'qtde': qtde, 'origem': origem, 'destino': destino
-                    })
-            
-            # **CORREÇÃO: Mostra movimentos agrupados (máximo 3 linhas)**
-            shown_movements = 0
-            max_movements = 3
-            
-            for rti, asset_movements in list(movements_by_asset.items())[:max_movements]:
-                total_qtde = sum(m['qtde'] for m in asset_movements)
-                
-                # Determina direção do movimento
-                if self.is_cd:
-                    entrada_count = sum(1 for m in asset_movements 
-                                     if m['destino'] == self.location_name)
-                    if entrada_count > len(asset_movements) / 2:
-                        color = "#28a745"
-                        icon = "📥"
-                        signal = "+"
-                    else:
-                        color = "#dc3545"
-                        icon = "📤"
-                        signal = "-"
-                else:
-                    remessa_count = sum(1 for m in asset_movements if m['tipo'] == 'Remessa')
-                    if remessa_count > len(asset_movements) / 2:
-                        color = "#28a745"
-                        icon = "📥"
-                        signal = "+"
-                    else:
-                        color = "#dc3545"
-                        icon = "📤"
-                        signal = "-"
-                
-                mov_label = QLabel(f"{icon} {signal}{total_qtde:,} {rti}".replace(",", "."))
-                mov_label.setFont(QFont("Arial", 8, QFont.Bold))  # **CORREÇÃO: Fonte menor**
-                mov_label.setStyleSheet(f"color: {color}; padding: 1px;")
-                movements_layout.addWidget(mov_label)
-                shown_movements += 1
-            
-            # Se há mais movimentos, mostra indicador
-            if len(movements_by_asset) > max_movements:
-                more_mov_label = QLabel(f"... e mais {len(movements_by_asset) - max_movements} ativos")
-                more_mov_label.setFont(QFont("Arial", 8))
-                more_mov_label.setStyleSheet("color: #666; font-style: italic; padding: 1px;")
-                movements_layout.addWidget(more_mov_label)
-            
-            layout.addWidget(movements_frame)
-        else:
-            # **CORREÇÃO: Frame de "sem movimentos" mais compacto**
-            no_mov_frame = QFrame()
-            no_mov_frame.setStyleSheet("background-color: #f8f9fa; border-radius: 4px; margin: 2px;")
-            no_mov_frame.setMaximumHeight(40)  # **CORREÇÃO: Altura mínima**
-            no_mov_layout = QVBoxLayout(no_mov_frame)
-            no_mov_layout.setContentsMargins(8, 5, 8, 5)
-            
-            no_mov_label = QLabel("💤 Sem movimentos")
-            no_mov_label.setFont(QFont("Arial", 8))
-            no_mov_label.setStyleSheet("color: #6c757d; font-style: italic;")
-            no_mov_layout.addWidget(no_mov_label)
-            layout.addWidget(no_mov_frame)
-        
-        # **CORREÇÃO: Seção de estoque final com altura controlada**
-        final_frame = QFrame()
-        final_frame.setStyleSheet("background-color: #d1ecf1; border-radius: 4px; margin: 2px;")
-        final_frame.setMaximumHeight(80)  # **CORREÇÃO: Altura máxima**
-        final_layout = QVBoxLayout(final_frame)
-        final_layout.setContentsMargins(8, 5, 8, 5)
-        final_layout.setSpacing(2)
-        
-        final_title = QLabel("📊 Saldo Final:")
-        final_title.setFont(QFont("Arial", 9, QFont.Bold))
-        final_title.setStyleSheet("color: #0c5460;")
-        final_layout.addWidget(final_title)
-        
-        final_stock = day_data['stock']
-        
-        # **CORREÇÃO: Limita itens mostrados no saldo final**
-        if final_stock:
-            shown_final = 0
-            max_final = 2  # Máximo 2 itens
-            
-            for asset, quantity in list(final_stock.items())[:max_final]:
-                normalized_filter = normalize_asset_name(self.asset_filter) if self.asset_filter != "Todos" else "Todos"
-                
-                if self.asset_filter == "Todos" or normalized_filter == asset:
-                    previous_qty = previous_stock.get(asset, 0) if previous_stock else 0
-                    
-                    if quantity != previous_qty:
-                        if quantity > previous_qty:
-                            change_icon = "📈"
-                            change_color = "#28a745"
-                        else:
-                            change_icon = "📉"
-                            change_color = "#dc3545"
-                        stock_text = f"• {asset}: {quantity:,} {change_icon}".replace(",", ".")
-                        stock_label = QLabel(stock_text)
-                        stock_label.setFont(QFont("Arial", 8, QFont.Bold))  # **CORREÇÃO: Fonte menor**
-                        stock_label.setStyleSheet(f"padding: 1px; color: {change_color};")
-                    else:
-                        stock_label = QLabel(f"• {asset}: {quantity:,}".replace(",", "."))
-                        stock_label.setFont(QFont("Arial", 8))
-                        stock_label.setStyleSheet("padding: 1px;")
-                    
-                    final_layout.addWidget(stock_label)
-                    shown_final += 1
-            
-            # Se há mais itens, mostra indicador
-            if len(final_stock) > max_final:
-                more_final_label = QLabel(f"... e mais {len(final_stock) - max_final} itens")
-                more_final_label.setFont(QFont("Arial", 8))
-                more_final_label.setStyleSheet("color: #666; font-style: italic; padding: 1px;")
-                final_layout.addWidget(more_final_label)
-        else:
-            zero_label = QLabel("• Saldo: 0")
-            zero_label.setFont(QFont("Arial", 8))
-            zero_label.setStyleSheet("padding: 1px; color: #666;")
-            final_layout.addWidget(zero_label)
-        
-        layout.addWidget(final_frame)
-        
-        # **CORREÇÃO: Remove stretch para manter altura compacta**
-        # layout.addStretch()  # REMOVIDO
-        
-        self.flow_layout.addWidget(card)
-
-    def add_arrow(self):
-        """Adiciona seta entre os cards"""
-        arrow_widget = QWidget()
-        arrow_widget.setFixedWidth(50)  # **CORREÇÃO: Largura menor**
-        arrow_widget.setMinimumHeight(100)
-        arrow_widget.setMaximumHeight(300)  # **CORREÇÃO: Altura máxima**
-        
-        def paint_arrow(event):
-            painter = QPainter(arrow_widget)
-            painter.setRenderHint(QPainter.Antialiasing)
-            
-            pen = QPen(QColor("#007bff"))
-            pen.setWidth(3)
-            painter.setPen(pen)
-            
-            start_x = 5
-            end_x = 45
-            y = arrow_widget.height() // 2
-            
-            painter.drawLine(start_x, y, end_x - 12, y)
-            painter.drawLine(end_x - 12, y, end_x - 20, y - 8)
-            painter.drawLine(end_x - 12, y, end_x - 20, y + 8)
-        
-        arrow_widget.paintEvent = paint_arrow
-        self.flow_layout.addWidget(arrow_widget)
+            self.timeline.set_model(self.get_period_model(self.zoom))
+        self.timeline.set_filter(self.asset_filter)
 
     def get_initial_inventory(self):
         """Obtém dados do inventário inicial (só para lojas)"""
         if self.is_cd:
             return {}
         
-        inventory_match = self.db.find_best_inventory_match(self.location_name)
+        inventory_match = self.db.get_inventory_match(self.location_name)
         if not inventory_match:
             return {}
         
@@ -1546,10 +950,11 @@ class FlowVisualDialog(QDialog, ResponsiveDialog):
                 export_data = []
                 
                 if not self.is_cd:
-                    initial_inventory = self.get_initial_inventory()
+                    initial_inventory = self.initial_inventory
+                    inventory_date = datetime.strptime(INVENTORY_DATE, '%Y-%m-%d').strftime('%d/%m/%Y')
                     for asset, qty in initial_inventory.items():
                         export_data.append({
-                            'Data': '08/06/2025',
+                            'Data': inventory_date,
                             'Tipo': 'Inventário Inicial',
                             'Ativo': asset,
                             'Saldo_Inicial': qty,
@@ -1561,10 +966,9 @@ class FlowVisualDialog(QDialog, ResponsiveDialog):
                 else:
                     previous_stock = {}
                 
-                for day_data in self.daily_data:
-                    date = day_data['date']
-                    movements = day_data.get('movements', [])
-                    final_stock = day_data['stock']
+                for day_index, date in enumerate(self.daily_data.dates):
+                    movements = self.daily_data.movements(day_index)
+                    final_stock = self.daily_data.stock(day_index)
                     
                     if not movements:
                         for asset in set(list(previous_stock.keys()) + list(final_stock.keys())):
@@ -1578,50 +982,29 @@ class FlowVisualDialog(QDialog, ResponsiveDialog):
                                 'Saldo_Final': final_stock.get(asset, 0)
                             })
                     else:
-                        movements_by_asset = {}
-                        for mov in movements:
-                            if hasattr(mov, 'keys'):
-                                rti = mov['rti'] if mov['rti'] else 'N/A'
-                            else:
-                                rti = mov.get('rti', 'N/A') or 'N/A'
-                            
-                            rti_normalized = str(rti).strip().upper().replace(' ', '')
-                            
-                            if rti_normalized not in movements_by_asset:
-                                movements_by_asset[rti_normalized] = []
-                            movements_by_asset[rti_normalized].append(mov)
+                        movements_by_asset = defaultdict(list)
+                        for rti, mov_type, mov_qty, fluxo in movements:
+                            movements_by_asset[rti].append((mov_type, mov_qty, fluxo))
                         
                         for asset in set(list(previous_stock.keys()) + list(final_stock.keys()) + list(movements_by_asset.keys())):
                             mov_details = []
                             mov_types = []
                             
-                            if asset in movements_by_asset:
-                                for mov in movements_by_asset[asset]:
-                                    if hasattr(mov, 'keys'):
-                                        mov_type = mov['tipo_movimento']
-                                        mov_qty = mov['quantidade']
-                                        origem = mov['local_origem']
-                                        destino = mov['local_destino']
+                            for mov_type, mov_qty, fluxo in movements_by_asset.get(asset, []):
+                                mov_types.append(mov_type)
+                                
+                                if self.is_cd:
+                                    if fluxo > 0:
+                                        mov_details.append(f"+{mov_qty}")
+                                    elif fluxo < 0:
+                                        mov_details.append(f"-{mov_qty}")
                                     else:
-                                        mov_type = mov.get('tipo_movimento', '')
-                                        mov_qty = mov.get('quantidade', 0)
-                                        origem = mov.get('local_origem', '')
-                                        destino = mov.get('local_destino', '')
-                                    
-                                    mov_types.append(mov_type)
-                                    
-                                    if self.is_cd:
-                                        if destino == self.location_name:
-                                            mov_details.append(f"+{mov_qty}")
-                                        elif origem == self.location_name:
-                                            mov_details.append(f"-{mov_qty}")
-                                        else:
-                                            mov_details.append(f"={mov_qty}")
+                                        mov_details.append(f"={mov_qty}")
+                                else:
+                                    if mov_type == 'Remessa':
+                                        mov_details.append(f"+{mov_qty}")
                                     else:
-                                        if mov_type == 'Remessa':
-                                            mov_details.append(f"+{mov_qty}")
-                                        else:
-                                            mov_details.append(f"-{mov_qty}")
+                                        mov_details.append(f"-{mov_qty}")
                             
                             export_data.append({
                                 'Data': date,
@@ -1641,9 +1024,3 @@ class FlowVisualDialog(QDialog, ResponsiveDialog):
                 
         except Exception as e:
             QMessageBox.critical(self, "❌ Erro", f"Erro ao exportar: {e}")
-
-    def resizeEvent(self, event):
-        """Garante que o scroll funcione corretamente ao redimensionar"""
-        super().resizeEvent(event)
-        if hasattr(self, 'flow_widget'):
-            self.flow_widget.updateGeometry()
\ No newline at end of file
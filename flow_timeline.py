@@ -0,0 +1,569 @@
+# flow_timeline.py - Linha do tempo virtualizada do fluxo visual (pinta só os cards visíveis)
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from PyQt5.QtWidgets import QAbstractScrollArea
+from PyQt5.QtGui import QPainter, QPen, QColor, QFont, QFontMetrics, QStaticText, QTransform
+from PyQt5.QtCore import Qt, QRectF, QPointF, pyqtSignal
+from database import INVENTORY_DATE, normalize_asset_name
+
+# Geometria dos cards (mesmas medidas dos cards em widgets usados antes)
+CARD_WIDTH = 280
+ARROW_WIDTH = 50
+SPACING = 10
+MARGIN = 10
+CARD_PITCH = CARD_WIDTH + SPACING + ARROW_WIDTH + SPACING
+CARD_PADDING = 10
+SECTION_PADDING = (8, 5)
+SECTION_SPACING = 6
+LINE_SPACING = 2
+MAX_CACHED_CARDS = 200
+
+CARD_STYLES = {
+    'day': {'background': '#f8f9fa', 'border': '#007bff', 'min_height': 300, 'max_height': 500},
+    'inventory': {'background': '#e8f5e8', 'border': '#5cb85c', 'min_height': 250, 'max_height': 400},
+    'period': {'background': '#f8f9fa', 'border': '#6f42c1', 'min_height': 300, 'max_height': 500},
+}
+
+# Níveis de zoom da linha do tempo (rótulo -> período)
+ZOOM_LEVELS = {'Dia': 'dia', 'Semana': 'semana', 'Mês': 'mes'}
+MONTH_NAMES = ['Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho', 'Julho', 'Agosto',
+               'Setembro', 'Outubro', 'Novembro', 'Dezembro']
+
+# Papel do texto -> (família, tamanho, negrito, itálico); família None = fonte padrão
+FONT_ROLES = {
+    'title': (None, 10, True, False),
+    'inventory_title': (None, 12, True, False),
+    'subtitle': ('Arial', 10, False, False),
+    'heading': ('Arial', 9, True, False),
+    'base_heading': ('Arial', 10, True, False),
+    'item': ('Arial', 8, False, False),
+    'item_bold': ('Arial', 8, True, False),
+    'inventory_item': ('Arial', 11, True, False),
+    'note': ('Arial', 8, False, True),
+    'empty': ('Arial', 10, False, True),
+}
+CENTERED_ROLES = {'title', 'inventory_title', 'subtitle'}
+
+def build_fonts():
+    """Fontes de cada papel (criadas uma vez por view, exigem QApplication)"""
+    fonts = {}
+    for role, (family, size, bold, italic) in FONT_ROLES.items():
+        font = QFont(family) if family else QFont()
+        font.setPointSize(size)
+        font.setBold(bold)
+        font.setItalic(italic)
+        fonts[role] = font
+    return fonts
+
+class TimelineCard:
+    """Card com os textos já preparados (QStaticText) e posições calculadas uma única vez
+
+    spec: dict com 'kind' ('day', 'inventory' ou 'period'), 'header' [(texto, papel, cor)],
+    'separator' (opcional) e 'sections' [(cor de fundo ou None, [(texto, papel, cor)])].
+    """
+
+    def __init__(self, spec, fonts):
+        style = CARD_STYLES[spec['kind']]
+        self.background = QColor(style['background'])
+        self.border = QColor(style['border'])
+        self.blocks = []      # (QRectF, QColor) fundos das seções
+        self.texts = []       # (QPointF, QStaticText, QFont, QColor)
+        self.separators = []  # Posições y das linhas separadoras
+        self.fonts = fonts
+
+        inner_width = CARD_WIDTH - 2 * CARD_PADDING
+        y = CARD_PADDING
+        for line in spec['header']:
+            y = self._add_line(line, CARD_PADDING, y, inner_width) + SECTION_SPACING
+
+        if spec.get('separator'):
+            self.separators.append(y)
+            y += SECTION_SPACING
+
+        for background, lines in spec['sections']:
+            pad_x, pad_y = SECTION_PADDING if background else (0, 0)
+            top = y
+            y += pad_y
+            for line in lines:
+                y = self._add_line(line, CARD_PADDING + pad_x, y, inner_width - 2 * pad_x) + LINE_SPACING
+            y += pad_y - LINE_SPACING
+            if background:
+                self.blocks.append((QRectF(CARD_PADDING, top, inner_width, y - top), QColor(background)))
+            y += SECTION_SPACING
+
+        self.height = min(max(y - SECTION_SPACING + CARD_PADDING, style['min_height']), style['max_height'])
+
+    def _add_line(self, line, x, y, width):
+        text, role, color = line
+        font = self.fonts[role]
+        static = QStaticText(text)
+        static.setTextFormat(Qt.PlainText)
+        static.prepare(QTransform(), font)  # **OTIMIZAÇÃO: Layout do texto calculado uma vez**
+
+        if role in CENTERED_ROLES:
+            x += max(0, (width - static.size().width()) / 2)
+        self.texts.append((QPointF(x, y), static, font, QColor(color)))
+        return y + QFontMetrics(font).height()
+
+    def paint(self, painter, x, y):
+        painter.save()
+        painter.translate(x, y)
+        card_rect = QRectF(1, 1, CARD_WIDTH - 2, self.height - 2)
+        painter.setClipRect(card_rect)
+
+        painter.setPen(QPen(self.border, 2))
+        painter.setBrush(self.background)
+        painter.drawRoundedRect(card_rect, 8, 8)
+
+        painter.setPen(Qt.NoPen)
+        for rect, color in self.blocks:
+            painter.setBrush(color)
+            painter.drawRoundedRect(rect, 4, 4)
+
+        painter.setPen(QPen(self.border, 1))
+        for separator_y in self.separators:
+            painter.drawLine(QPointF(CARD_PADDING, separator_y), QPointF(CARD_WIDTH - CARD_PADDING, separator_y))
+
+        for position, static, font, color in self.texts:
+            painter.setFont(font)
+            painter.setPen(color)
+            painter.drawStaticText(position, static)
+        painter.restore()
+
+class FlowTimelineModel:
+    """Conteúdo dos cards pré-montado por dia a partir da StockEvolution
+
+    Títulos e movimentos agrupados por ativo são calculados uma vez, numa passada vetorizada;
+    o filtro de ativo só seleciona linhas já prontas ao montar o spec de um card visível.
+    """
+
+    def __init__(self, evolution, is_cd, initial_inventory=None):
+        self.evolution = evolution
+        self.is_cd = is_cd
+        self.initial_inventory = initial_inventory or {}
+        self.titles = [self.format_title(date) for date in evolution.dates]
+        self.group_movements()
+
+    def __len__(self):
+        # Para lojas, o primeiro card é o inventário inicial
+        return len(self.evolution) + (0 if self.is_cd else 1)
+
+    @staticmethod
+    def format_title(date_str):
+        try:
+            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            return f"📅 {date_str}"
+        day_name = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom'][date_obj.weekday()]
+        return f"📅 {date_obj.strftime('%d/%m/%Y')} ({day_name})"
+
+    def group_movements(self):
+        """Agrupa os movimentos de cada dia por ativo (ordem de aparição), com total e direção"""
+        evolution = self.evolution
+        days = np.repeat(np.arange(len(evolution)), np.diff(evolution.day_offsets))
+        keys = days.astype(np.int64) * max(len(evolution.assets), 1) + evolution.mov_asset
+        _, first_rows, groups = np.unique(keys, return_index=True, return_inverse=True)
+        group_count = len(first_rows)
+
+        # Direção predominante: entradas no CD / remessas na loja
+        if self.is_cd:
+            inbound = evolution.mov_flow > 0
+        else:
+            inbound = np.asarray(evolution.movement_types, dtype=object)[evolution.mov_type] == 'Remessa'
+
+        totals = np.bincount(groups, weights=evolution.mov_qty, minlength=group_count).astype(np.int64)
+        counts = np.bincount(groups, minlength=group_count)
+        inbound_counts = np.bincount(groups, weights=inbound, minlength=group_count)
+
+        order = np.argsort(first_rows, kind='stable')
+        self.group_asset = evolution.mov_asset[first_rows[order]]
+        self.group_total = totals[order]
+        self.group_inbound = (inbound_counts > counts / 2)[order]
+        self.group_offsets = np.searchsorted(days[first_rows[order]], np.arange(len(evolution) + 1))
+
+    def card_spec(self, index, asset_filter="Todos"):
+        """Spec do card na posição da linha do tempo (ver TimelineCard)"""
+        if self.is_cd:
+            return self.day_card_spec(index, asset_filter)
+        if index == 0:
+            return self.inventory_card_spec(asset_filter)
+        return self.day_card_spec(index - 1, asset_filter)
+
+    @staticmethod
+    def matches(asset_filter, asset):
+        return asset_filter == "Todos" or normalize_asset_name(asset_filter) == asset
+
+    def inventory_card_spec(self, asset_filter):
+        """Card do inventário inicial (só para lojas)"""
+        lines = [("📊 Estoque Base:", 'base_heading', "#2d5a2d")]
+        if self.initial_inventory:
+            for asset, quantity in self.initial_inventory.items():
+                if self.matches(asset_filter, asset):
+                    lines.append((f"• {asset}: {quantity:,}".replace(",", "."), 'inventory_item', "#000000"))
+        else:
+            lines.append(("⚠️ Sem dados", 'empty', "#999999"))
+
+        return {
+            'kind': 'inventory',
+            'header': [("📦 INVENTÁRIO INICIAL", 'inventory_title', "#000000"),
+                       (f"📅 {datetime.strptime(INVENTORY_DATE, '%Y-%m-%d').strftime('%d/%m/%Y')}", 'subtitle', "#666666")],
+            'separator': True,
+            'sections': [(None, lines)],
+        }
+
+    def stock_lines(self, stock, asset_filter, previous_stock=None, max_items=2):
+        """Linhas de saldo (limitadas a max_items, como nos cards originais)"""
+        if not stock:
+            return [("• Saldo: 0", 'item', "#666666")]
+
+        lines = []
+        for asset, quantity in list(stock.items())[:max_items]:
+            if not self.matches(asset_filter, asset):
+                continue
+            if previous_stock is None:
+                lines.append((f"• {asset}: {quantity:,}".replace(",", "."), 'item', "#000000"))
+                continue
+
+            previous_qty = previous_stock.get(asset, 0)
+            if quantity > previous_qty:
+                lines.append((f"• {asset}: {quantity:,} 📈".replace(",", "."), 'item_bold', "#28a745"))
+            elif quantity < previous_qty:
+                lines.append((f"• {asset}: {quantity:,} 📉".replace(",", "."), 'item_bold', "#dc3545"))
+            else:
+                lines.append((f"• {asset}: {quantity:,}".replace(",", "."), 'item', "#000000"))
+
+        if len(stock) > max_items:
+            lines.append((f"... e mais {len(stock) - max_items} itens", 'note', "#666666"))
+        return lines
+
+    def movement_lines(self, day_index, asset_filter, max_movements=3):
+        assets = self.evolution.assets
+        start, end = self.group_offsets[day_index], self.group_offsets[day_index + 1]
+        groups = [(assets[asset], int(total), bool(inbound))
+                  for asset, total, inbound in zip(self.group_asset[start:end], self.group_total[start:end],
+                                                   self.group_inbound[start:end])
+                  if self.matches(asset_filter, assets[asset])]
+
+        lines = [("🔄 Movimentos:", 'heading', "#856404")]
+        for rti, total, inbound in groups[:max_movements]:
+            if inbound:
+                lines.append((f"📥 +{total:,} {rti}".replace(",", "."), 'item_bold', "#28a745"))
+            else:
+                lines.append((f"📤 -{total:,} {rti}".replace(",", "."), 'item_bold', "#dc3545"))
+
+        if len(groups) > max_movements:
+            lines.append((f"... e mais {len(groups) - max_movements} ativos", 'note', "#666666"))
+        return lines
+
+    def day_card_spec(self, day_index, asset_filter):
+        """Card de um dia: saldo inicial, movimentos agrupados por ativo e saldo final"""
+        # Saldo anterior: inventário (lojas) ou vazio (CDs) no primeiro dia
+        if day_index == 0:
+            previous_stock = self.initial_inventory
+        else:
+            previous_stock = self.evolution.stock(day_index - 1)
+
+        sections = [("#e3f2fd", [("📊 Saldo Inicial:", 'heading', "#1565c0")] +
+                     self.stock_lines(previous_stock, asset_filter))]
+
+        if self.group_offsets[day_index + 1] > self.group_offsets[day_index]:
+            sections.append(("#fff3cd", self.movement_lines(day_index, asset_filter)))
+        else:
+            sections.append(("#f8f9fa", [("💤 Sem movimentos", 'note', "#6c757d")]))
+
+        final_stock = self.evolution.stock(day_index)
+        sections.append(("#d1ecf1", [("📊 Saldo Final:", 'heading', "#0c5460")] +
+                         self.stock_lines(final_stock, asset_filter, previous_stock or {})))
+
+        return {'kind': 'day', 'header': [(self.titles[day_index], 'title', "#000000")], 'sections': sections}
+
+class DayRangeModel:
+    """Cards diários de um intervalo de dias (detalhamento de uma semana ou mês)"""
+
+    def __init__(self, days, start, end):
+        self.days = days
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def card_spec(self, index, asset_filter="Todos"):
+        return self.days.day_card_spec(self.start + index, asset_filter)
+
+class FlowPeriodModel:
+    """Cards por semana ou mês: saldo de abertura, movimentos líquidos por tipo e saldo de fechamento
+
+    Os dias são agrupados no período uma vez e os movimentos pré-agregados por (período, ativo, tipo),
+    então montar um card só soma as poucas linhas do período que passam no filtro.
+    """
+
+    def __init__(self, days, period):
+        self.days = days
+        self.period = period
+        evolution = days.evolution
+
+        dates = pd.to_datetime(pd.Series(evolution.dates), format='%Y-%m-%d')
+        if period == 'semana':
+            starts = dates - pd.to_timedelta(dates.dt.weekday, unit='D')  # Semana começa na segunda
+        else:
+            starts = dates.dt.to_period('M').dt.start_time
+        self.period_starts, day_period = np.unique(starts.to_numpy('datetime64[D]'), return_inverse=True)
+        self.day_offsets = np.searchsorted(day_period, np.arange(len(self.period_starts) + 1))
+
+        # **OTIMIZAÇÃO: Pré-agregação (período, ativo, tipo) -> variação líquida e quantidade de movimentos**
+        mov_days = np.repeat(np.arange(len(evolution)), np.diff(evolution.day_offsets))
+        asset_count = max(len(evolution.assets), 1)
+        type_count = max(len(evolution.movement_types), 1)
+        keys = (day_period[mov_days].astype(np.int64) * asset_count + evolution.mov_asset) * type_count \
+            + evolution.mov_type
+        unique_keys, groups = np.unique(keys, return_inverse=True)
+        self.net = np.bincount(groups, weights=evolution.mov_qty.astype(np.int64) * evolution.mov_sign,
+                               minlength=len(unique_keys)).astype(np.int64)
+        self.count = np.bincount(groups, minlength=len(unique_keys))
+        self.row_type = unique_keys % type_count
+        self.row_asset = (unique_keys // type_count) % asset_count
+        self.row_offsets = np.searchsorted(unique_keys // (type_count * asset_count),
+                                           np.arange(len(self.period_starts) + 1))
+
+    def __len__(self):
+        return len(self.period_starts)
+
+    def day_range(self, index):
+        """Intervalo de dias [início, fim) do período, para o detalhamento"""
+        return int(self.day_offsets[index]), int(self.day_offsets[index + 1])
+
+    def title(self, index):
+        start = pd.Timestamp(self.period_starts[index])
+        if self.period == 'semana':
+            end = start + pd.Timedelta(days=6)
+            return f"🗓️ Semana {start.strftime('%d/%m')} a {end.strftime('%d/%m/%Y')}"
+        return f"🗓️ {MONTH_NAMES[start.month - 1]}/{start.year}"
+
+    def type_lines(self, index, asset_filter):
+        """Movimentos líquidos por tipo no período (efeito no saldo do local)"""
+        assets = self.days.evolution.assets
+        movement_types = self.days.evolution.movement_types
+        totals = {}
+        for row in range(self.row_offsets[index], self.row_offsets[index + 1]):
+            if not self.days.matches(asset_filter, assets[self.row_asset[row]]):
+                continue
+            kind = movement_types[self.row_type[row]] or 'Sem tipo'
+            net, count = totals.get(kind, (0, 0))
+            totals[kind] = (net + int(self.net[row]), count + int(self.count[row]))
+
+        lines = []
+        for kind, (net, count) in totals.items():
+            text = f"• {kind}: {net:+,} ({count} mov.)".replace(",", ".")
+            if net > 0:
+                lines.append((text, 'item_bold', "#28a745"))
+            elif net < 0:
+                lines.append((text, 'item_bold', "#dc3545"))
+            else:
+                lines.append((text, 'item', "#6c757d"))
+        return lines
+
+    def card_spec(self, index, asset_filter="Todos"):
+        evolution = self.days.evolution
+        start, end = self.day_range(index)
+        opening = evolution.stock(start - 1)
+        closing = evolution.stock(end - 1)
+
+        sections = [("#e3f2fd", [("📊 Saldo de Abertura:", 'heading', "#1565c0")] +
+                     self.days.stock_lines(opening, asset_filter, max_items=4))]
+
+        type_lines = self.type_lines(index, asset_filter)
+        if type_lines:
+            sections.append(("#fff3cd", [("🔄 Movimentos líquidos:", 'heading', "#856404")] + type_lines))
+        else:
+            sections.append(("#f8f9fa", [("💤 Sem movimentos", 'note', "#6c757d")]))
+
+        sections.append(("#d1ecf1", [("📊 Saldo de Fechamento:", 'heading', "#0c5460")] +
+                         self.days.stock_lines(closing, asset_filter, opening, max_items=4)))
+        sections.append((None, [("🔍 Duplo clique para ver os dias", 'note', "#666666")]))
+
+        day_count = end - start
+        return {
+            'kind': 'period',
+            'header': [(self.title(index), 'title', "#000000"),
+                       (f"{day_count} dia{'s' if day_count != 1 else ''} com movimento", 'subtitle', "#666666")],
+            'sections': sections,
+        }
+
+class FlowTimelineView(QAbstractScrollArea):
+    """Linha do tempo horizontal de cards pintados sob demanda
+
+    Não cria widgets por card: só os cards que cruzam a área visível são montados (e guardados
+    num cache LRU por filtro) e pintados a partir do modelo (dias, períodos ou intervalo de dias).
+    """
+
+    cardActivated = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.fonts = build_fonts()
+        self.model = None
+        self.card_count = 0
+        self.asset_filter = "Todos"
+        self.cards = OrderedDict()
+        self.content_height = CARD_STYLES['day']['min_height']
+        self.placeholder = ""
+
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.horizontalScrollBar().setSingleStep(CARD_PITCH // 4)
+        self.verticalScrollBar().setSingleStep(20)
+
+    def set_model(self, model):
+        self.model = model
+        self.card_count = len(model)
+        self.placeholder = ""
+        self.invalidate()
+
+    def set_placeholder(self, text):
+        """Mensagem exibida quando não há cards"""
+        self.model = None
+        self.card_count = 0
+        self.placeholder = text
+        self.invalidate()
+
+    def set_filter(self, asset_filter):
+        """Troca o filtro de ativo: nenhum card é recriado fora da área visível"""
+        if asset_filter == self.asset_filter:
+            return
+        self.asset_filter = asset_filter
+        self.viewport().update()
+
+    def invalidate(self):
+        """Descarta os layouts montados e repinta (só os visíveis serão refeitos)"""
+        self.cards.clear()
+        self.content_height = CARD_STYLES['day']['min_height']
+        self.update_scrollbars()
+        self.viewport().update()
+
+    def card(self, index):
+        key = (self.asset_filter, index)
+        card = self.cards.get(key)
+        if card is None:
+            card = TimelineCard(self.model.card_spec(index, self.asset_filter), self.fonts)
+            self.cards[key] = card
+            if len(self.cards) > MAX_CACHED_CARDS:
+                self.cards.popitem(last=False)
+        else:
+            self.cards.move_to_end(key)
+        return card
+
+    def visible_range(self):
+        """Índices (primeiro, último) dos cards que cruzam a área visível"""
+        if not self.card_count:
+            return 0, -1
+        left = self.horizontalScrollBar().value() - MARGIN
+        right = left + self.viewport().width()
+        first = max(0, left // CARD_PITCH)
+        last = min(self.card_count - 1, right // CARD_PITCH)
+        return first, last
+
+    def card_at(self, pos):
+        """Índice do card sob a posição do viewport (-1 fora dos cards)"""
+        x = pos.x() + self.horizontalScrollBar().value() - MARGIN
+        y = pos.y() + self.verticalScrollBar().value() - MARGIN
+        index = x // CARD_PITCH
+        if x < 0 or index >= self.card_count or x % CARD_PITCH > CARD_WIDTH:
+            return -1
+        card = self.cards.get((self.asset_filter, index))
+        if y < 0 or (card is not None and y > card.height):
+            return -1
+        return index
+
+    def mouseDoubleClickEvent(self, event):
+        index = self.card_at(event.pos())
+        if index >= 0:
+            self.cardActivated.emit(index)
+        else:
+            super().mouseDoubleClickEvent(event)
+
+    def content_width(self):
+        if not self.card_count:
+            return 0
+        return 2 * MARGIN + self.card_count * CARD_PITCH - SPACING - ARROW_WIDTH - SPACING
+
+    def update_scrollbars(self):
+        viewport = self.viewport().size()
+        horizontal = self.horizontalScrollBar()
+        horizontal.setPageStep(viewport.width())
+        horizontal.setRange(0, max(0, self.content_width() - viewport.width()))
+
+        vertical = self.verticalScrollBar()
+        vertical.setPageStep(viewport.height())
+        vertical.setRange(0, max(0, self.content_height + 2 * MARGIN - viewport.height()) if self.card_count else 0)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def wheelEvent(self, event):
+        """Roda do mouse percorre a linha do tempo na horizontal (Shift: vertical)"""
+        delta = event.angleDelta()
+        step = delta.y() or delta.x()
+        if event.modifiers() & Qt.ShiftModifier:
+            bar = self.verticalScrollBar()
+        else:
+            bar = self.horizontalScrollBar()
+        bar.setValue(bar.value() - step)
+        event.accept()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        if not self.card_count:
+            self.paint_placeholder(painter)
+            return
+
+        offset_x = self.horizontalScrollBar().value()
+        offset_y = self.verticalScrollBar().value()
+        first, last = self.visible_range()
+
+        tallest = self.content_height
+        for index in range(first, last + 1):
+            card = self.card(index)
+            tallest = max(tallest, card.height)
+            x = MARGIN + index * CARD_PITCH - offset_x
+            card.paint(painter, x, MARGIN - offset_y)
+            if index < self.card_count - 1:
+                self.paint_arrow(painter, x + CARD_WIDTH + SPACING, MARGIN - offset_y + self.content_height // 2)
+        painter.end()
+
+        # Altura da área cresce conforme cards mais altos aparecem
+        if tallest != self.content_height:
+            self.content_height = tallest
+            self.update_scrollbars()
+            self.viewport().update()
+
+    def paint_arrow(self, painter, x, y):
+        """Seta entre os cards"""
+        painter.setPen(QPen(QColor("#007bff"), 3))
+        start_x = x + 5
+        end_x = x + 45
+        painter.drawLine(start_x, y, end_x - 12, y)
+        painter.drawLine(end_x - 12, y, end_x - 20, y - 8)
+        painter.drawLine(end_x - 12, y, end_x - 20, y + 8)
+
+    def paint_placeholder(self, painter):
+        if not self.placeholder:
+            return
+        rect = QRectF(self.viewport().rect()).adjusted(20, 20, -20, -20)
+        painter.setPen(QPen(QColor("#dee2e6"), 2, Qt.DashLine))
+        painter.setBrush(QColor("#f8f9fa"))
+        painter.drawRoundedRect(rect, 10, 10)
+
+        font = QFont("Arial")
+        font.setPointSize(14)
+        painter.setFont(font)
+        painter.setPen(QColor("#666"))
+        painter.drawText(rect, Qt.AlignCenter | Qt.TextWordWrap, self.placeholder)
@@ -0,0 +1,196 @@
+# folder_watcher.py - Importação automática de arquivos deixados em uma pasta monitorada
+import os
+import json
+from PyQt5.QtCore import QObject, QThread, QTimer, QFileSystemWatcher, pyqtSignal
+from database import Database
+
+class WatchConfig:
+    """Configuração persistida da pasta monitorada"""
+
+    CONFIG_FILE = "watch_config.json"
+
+    DEFAULT_SETTINGS = {
+        'enabled': False,
+        'folder': '',
+        'settle_ms': 2000  # Espera o arquivo parar de crescer antes de importar
+    }
+
+    @classmethod
+    def load_settings(cls):
+        """Carrega configurações do arquivo"""
+        try:
+            if os.path.exists(cls.CONFIG_FILE):
+                with open(cls.CONFIG_FILE, 'r', encoding='utf-8') as f:
+                    settings = json.load(f)
+
+                for key in cls.DEFAULT_SETTINGS:
+                    if key not in settings:
+                        settings[key] = cls.DEFAULT_SETTINGS[key]
+
+                return settings
+            else:
+                return cls.DEFAULT_SETTINGS.copy()
+
+        except Exception as e:
+            print(f"❌ Erro ao carregar configuração da pasta monitorada: {e}")
+            return cls.DEFAULT_SETTINGS.copy()
+
+    @classmethod
+    def save_settings(cls, settings):
+        """Salva configurações no arquivo"""
+        try:
+            with open(cls.CONFIG_FILE, 'w', encoding='utf-8') as f:
+                json.dump(settings, f, indent=2, ensure_ascii=False)
+            return True
+        except Exception as e:
+            print(f"❌ Erro ao salvar configuração da pasta monitorada: {e}")
+            return False
+
+class FolderImportWorker(QThread):
+    """Importa arquivos da pasta em segundo plano pelo mesmo caminho do upload manual"""
+    file_imported = pyqtSignal(object)  # IngestResult
+    file_failed = pyqtSignal(str, str)
+
+    def __init__(self, db_name, file_paths):
+        super().__init__()
+        self.db_name = db_name
+        self.file_paths = file_paths
+
+    def run(self):
+        # Import local: leitura de arquivos (pandas) só é carregada quando há algo para importar
+        from file_reader import FileReader
+        import ingest
+
+        # **CORREÇÃO: Conexão própria, o cursor da janela principal não é compartilhado entre threads**
+        db = Database(self.db_name)
+        try:
+            for file_path in self.file_paths:
+                try:
+                    content_hash = FileReader.file_hash(file_path)
+                    if db.is_file_imported(content_hash):
+                        print(f"⏭️ Já importado anteriormente: {os.path.basename(file_path)}")
+                        continue
+
+                    result = ingest.import_file(db, file_path)
+                    db.register_imported_file(content_hash, os.path.basename(file_path), result.kind, result.imported)
+                    self.file_imported.emit(result)
+                except Exception as e:
+                    print(f"❌ Falha na importação automática de {file_path}: {e}")
+                    self.file_failed.emit(file_path, str(e))
+        finally:
+            db.close()
+
+class FolderWatcher(QObject):
+    """Monitora uma pasta e importa exportações novas de movimentos/inventário"""
+    file_imported = pyqtSignal(object)
+    file_failed = pyqtSignal(str, str)
+
+    SUPPORTED_EXTENSIONS = ('.csv', '.xlsx')
+
+    def __init__(self, db_name, parent=None):
+        super().__init__(parent)
+        self.db_name = db_name
+        self.folder = None
+        self.worker = None
+
+        self.pending = {}    # Arquivo -> (tamanho, mtime) da última varredura
+        self.processed = {}  # Arquivo -> (tamanho, mtime) já enviado para importação
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.schedule_scan)
+
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.timeout.connect(self.scan)
+
+    def start(self, folder, settle_ms=2000):
+        """Inicia monitoramento (arquivos já presentes também são verificados)"""
+        self.stop()
+
+        if not folder or not os.path.isdir(folder):
+            print(f"⚠️ Pasta monitorada não encontrada: {folder}")
+            return False
+
+        self.folder = folder
+        self.watcher.addPath(folder)
+        self.settle_timer.setInterval(settle_ms)
+        self.schedule_scan()
+
+        print(f"📂 Monitorando pasta: {folder}")
+        return True
+
+    def stop(self):
+        """Para o monitoramento"""
+        directories = self.watcher.directories()
+        if directories:
+            self.watcher.removePaths(directories)
+
+        self.settle_timer.stop()
+        self.folder = None
+        self.pending.clear()
+        self.processed.clear()
+
+    def is_active(self):
+        return self.folder is not None
+
+    def schedule_scan(self, *args):
+        """Agrupa várias notificações seguidas em uma única varredura"""
+        self.settle_timer.start()
+
+    def scan(self):
+        """Envia para importação os arquivos com tamanho estável desde a última varredura"""
+        if not self.folder:
+            return
+
+        if self.worker and self.worker.isRunning():
+            self.settle_timer.start()
+            return
+
+        try:
+            names = sorted(os.listdir(self.folder))
+        except OSError as e:
+            print(f"❌ Erro ao ler pasta monitorada: {e}")
+            return
+
+        current = {}
+        ready = []
+        still_writing = False
+
+        for name in names:
+            # Ignora arquivos temporários do Excel (~$) e ocultos
+            if name.startswith(('~$', '.')) or not name.lower().endswith(self.SUPPORTED_EXTENSIONS):
+                continue
+
+            file_path = os.path.join(self.folder, name)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+
+            signature = (stat.st_size, stat.st_mtime)
+            current[file_path] = signature
+
+            if self.processed.get(file_path) == signature:
+                continue
+
+            if self.pending.get(file_path) == signature:
+                ready.append(file_path)
+            else:
+                still_writing = True
+
+        self.pending = current
+
+        if still_writing:
+            self.settle_timer.start()
+
+        if ready:
+            for file_path in ready:
+                self.processed[file_path] = current[file_path]
+            self.start_worker(ready)
+
+    def start_worker(self, file_paths):
+        print(f"📥 Importação automática: {len(file_paths)} arquivo(s)")
+        self.worker = FolderImportWorker(self.db_name, file_paths)
+        self.worker.file_imported.connect(self.file_imported)
+        self.worker.file_failed.connect(self.file_failed)
+        self.worker.start()
@@ -0,0 +1,239 @@
+# history_table.py - Histórico de movimentos lido do SQLite sob demanda (ordenação e filtros no banco)
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QCheckBox, QDateEdit, QComboBox, QLineEdit, QPushButton
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QDate, QTimer, pyqtSignal
+
+HISTORY_HEADERS = ['📅 Data', '🔄 Movimento', '📦 Ativo (RTI)', '📤 Origem', '📥 Destino', '🔢 Quantidade']
+
+MOVEMENT_ICONS = {
+    'Remessa': '📤',
+    'Regresso': '📥',
+    'Entrega': '🚚',
+    'Devolução de Entrega': '↩️',
+    'Transferencia': '🔄',
+    'Retorno': '🔙'
+}
+
+PAGE_SIZE = 200         # Linhas lidas do banco por vez (uma página cobre várias telas da tabela)
+MAX_CACHED_PAGES = 20   # Páginas mantidas em memória (as menos usadas recentemente saem primeiro)
+
+def format_history_row(row):
+    """Textos exibidos de uma linha (data, tipo, rti, origem, destino, quantidade)"""
+    values = []
+    for i, item in enumerate(row):
+        if i == 0 and item:  # Data
+            try:
+                values.append(datetime.strptime(str(item), '%Y-%m-%d').strftime('%d/%m/%Y'))
+            except ValueError:
+                values.append(str(item))
+        elif i == 1 and item:  # Tipo de movimento
+            values.append(f"{MOVEMENT_ICONS.get(item, '📋')} {item}")
+        else:
+            values.append(str(item) if item is not None else "")
+    return values
+
+class MovementHistoryModel(QAbstractTableModel):
+    """Histórico de um local: ids filtrados e ordenados pelo SQLite, linhas lidas só quando exibidas
+
+    A consulta de ids (WHERE + ORDER BY) define o número de linhas e a ordem; as linhas em si são
+    buscadas por página (PAGE_SIZE) quando a tabela pede uma célula ainda não carregada.
+    """
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.location_name = None
+        self.filters = {}
+        self.sort_column = 0
+        self.descending = True
+
+        self.ids = array('q')
+        self.pages = OrderedDict()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HISTORY_HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HISTORY_HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return self.row_values(index.row())[index.column()]
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Clique no cabeçalho: refaz a consulta de ids com ORDER BY na coluna"""
+        self.sort_column = column
+        self.descending = order == Qt.DescendingOrder
+        self.reload()
+
+    def set_location(self, location_name, filters=None):
+        """Troca o local exibido (None limpa a tabela)"""
+        self.location_name = location_name
+        if filters is not None:
+            self.filters = dict(filters)
+        self.reload()
+
+    def set_filters(self, filters):
+        self.filters = dict(filters)
+        self.reload()
+
+    def reload(self):
+        """Recarrega os ids do local (após trocar local, filtros, ordem ou importar dados novos)"""
+        self.beginResetModel()
+        self.pages.clear()
+        if self.location_name:
+            self.ids = self.db.get_history_ids(self.location_name, self.filters,
+                                               self.db.HISTORY_COLUMNS[self.sort_column], self.descending)
+        else:
+            self.ids = array('q')
+        self.endResetModel()
+
+    def row_values(self, row):
+        page_index = row // PAGE_SIZE
+        page = self.pages.get(page_index)
+        if page is None:
+            page = self.load_page(page_index)
+        else:
+            self.pages.move_to_end(page_index)
+        return page[row - page_index * PAGE_SIZE]
+
+    def load_page(self, page_index):
+        start = page_index * PAGE_SIZE
+        page_ids = self.ids[start:start + PAGE_SIZE]
+        rows = self.db.get_movements_by_ids(page_ids)
+
+        # Movimento removido depois da consulta de ids (ex.: limpeza do banco) vira linha vazia
+        empty = ("",) * len(HISTORY_HEADERS)
+        page = [format_history_row(rows[movement_id]) if movement_id in rows else empty
+                for movement_id in page_ids]
+
+        self.pages[page_index] = page
+        if len(self.pages) > MAX_CACHED_PAGES:
+            self.pages.popitem(last=False)
+        return page
+
+    def all_rows(self):
+        """Todas as linhas com os filtros e a ordem atuais (exportação), lidas por página sem usar o cache"""
+        rows = []
+        for start in range(0, len(self.ids), PAGE_SIZE):
+            page_ids = self.ids[start:start + PAGE_SIZE]
+            page_rows = self.db.get_movements_by_ids(page_ids)
+            rows.extend(format_history_row(page_rows[movement_id])
+                        for movement_id in page_ids if movement_id in page_rows)
+        return rows
+
+class HistoryFilterBar(QWidget):
+    """Barra de filtros do histórico (período, tipo, ativo e contraparte), aplicados como WHERE no SQLite"""
+    filtersChanged = pyqtSignal(dict)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.period_check = QCheckBox("📅 Período:")
+        self.period_check.toggled.connect(self.on_period_toggled)
+        layout.addWidget(self.period_check)
+
+        self.date_from = QDateEdit()
+        self.date_to = QDateEdit()
+        for date_edit in (self.date_from, self.date_to):
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat("dd/MM/yyyy")
+            date_edit.setEnabled(False)
+            date_edit.dateChanged.connect(self.emit_filters)
+        layout.addWidget(self.date_from)
+        layout.addWidget(self.date_to)
+
+        self.type_combo = QComboBox()
+        self.type_combo.addItem("🔄 Todos os tipos", None)
+        self.type_combo.currentIndexChanged.connect(self.emit_filters)
+        layout.addWidget(self.type_combo, 1)
+
+        self.asset_combo = QComboBox()
+        self.asset_combo.addItem("📦 Todos os ativos", None)
+        self.asset_combo.currentIndexChanged.connect(self.emit_filters)
+        layout.addWidget(self.asset_combo, 1)
+
+        self.counterpart_edit = QLineEdit()
+        self.counterpart_edit.setPlaceholderText("🔍 Contraparte (origem/destino)...")
+        self.counterpart_edit.setClearButtonEnabled(True)
+        layout.addWidget(self.counterpart_edit, 2)
+
+        # **OTIMIZAÇÃO: Digitação agrupada, a consulta roda quando o usuário para de digitar**
+        self.text_timer = QTimer(self)
+        self.text_timer.setSingleShot(True)
+        self.text_timer.setInterval(300)
+        self.text_timer.timeout.connect(self.emit_filters)
+        self.counterpart_edit.textChanged.connect(lambda: self.text_timer.start())
+
+        self.clear_button = QPushButton("✖ Limpar")
+        self.clear_button.setProperty("variant", "secondary")
+        self.clear_button.clicked.connect(self.clear_filters)
+        layout.addWidget(self.clear_button)
+
+    def filters(self):
+        """Filtros atuais no formato de Database.get_history_ids"""
+        filters = {
+            'tipo': self.type_combo.currentData(),
+            'ativo': self.asset_combo.currentData(),
+            'contraparte': self.counterpart_edit.text().strip()
+        }
+        if self.period_check.isChecked():
+            filters['data_inicio'] = self.date_from.date().toString("yyyy-MM-dd")
+            filters['data_fim'] = self.date_to.date().toString("yyyy-MM-dd")
+        return filters
+
+    def set_options(self, options, keep_filters=False):
+        """Opções do local selecionado (Database.get_history_options)
+
+        keep_filters=False (outro local): limpa os filtros anteriores. keep_filters=True (mesmo
+        local, dados novos): mantém o que o usuário escolheu e só acrescenta tipos/ativos novos.
+        """
+        self.blockSignals(True)
+
+        for combo, values in ((self.type_combo, options['tipos']), (self.asset_combo, options['ativos'])):
+            selected = combo.currentData() if keep_filters else None
+            while combo.count() > 1:
+                combo.removeItem(1)
+            for value in values:
+                combo.addItem(value, value)
+            combo.setCurrentIndex(max(combo.findData(selected), 0) if selected else 0)
+
+        if not keep_filters:
+            first_day, last_day = options['periodo']
+            today = QDate.currentDate()
+            self.date_from.setDate(QDate.fromString(first_day, "yyyy-MM-dd") if first_day else today)
+            self.date_to.setDate(QDate.fromString(last_day, "yyyy-MM-dd") if last_day else today)
+
+            self.counterpart_edit.clear()
+            self.period_check.setChecked(False)
+            self.text_timer.stop()
+        self.blockSignals(False)
+
+    def clear_filters(self):
+        self.blockSignals(True)
+        self.type_combo.setCurrentIndex(0)
+        self.asset_combo.setCurrentIndex(0)
+        self.counterpart_edit.clear()
+        self.period_check.setChecked(False)
+        self.text_timer.stop()
+        self.blockSignals(False)
+        self.emit_filters()
+
+    def on_period_toggled(self, checked):
+        self.date_from.setEnabled(checked)
+        self.date_to.setEnabled(checked)
+        self.emit_filters()
+
+    def emit_filters(self):
+        self.text_timer.stop()
+        self.filtersChanged.emit(self.filters())
@@ -0,0 +1,120 @@
+# import_dialog.py - Interface Qt para a importação unificada (ingest.py)
+import os
+from PyQt5.QtWidgets import QFileDialog, QMessageBox, QProgressDialog
+from PyQt5.QtCore import QThread, pyqtSignal, Qt
+import ingest
+from database import Database
+
+FILE_FILTER = "Arquivos de Dados (*.csv *.xlsx)"
+
+def select_and_import(parent, db, kind):
+    """Seleciona um arquivo, importa pelo ingest e mostra o resultado"""
+    title = "Selecionar Arquivo de Inventário" if kind == 'inventario' else "Selecionar Arquivo de Movimentos"
+    file_path, _ = QFileDialog.getOpenFileName(parent, title, "", FILE_FILTER)
+
+    if not file_path:
+        return False
+
+    try:
+        result = ingest.import_file(db, file_path, kind)
+    except Exception as e:
+        QMessageBox.critical(parent, "Erro no Upload", f"Falha ao processar arquivo:\n{e}")
+        return False
+
+    show_import_result(parent, result)
+    return result.imported > 0
+
+class BatchImportWorker(QThread):
+    """Importa vários arquivos em segundo plano (parsing em processos paralelos)"""
+    progress = pyqtSignal(int, int, str)
+    finished_import = pyqtSignal(object)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, db_name, file_paths):
+        super().__init__()
+        self.db_name = db_name
+        self.file_paths = file_paths
+
+    def run(self):
+        # **CORREÇÃO: Conexão própria, o cursor da janela principal não é compartilhado entre threads**
+        db = Database(self.db_name)
+        try:
+            batch = ingest.import_files(db, self.file_paths, progress_callback=self.report_progress)
+            self.finished_import.emit(batch)
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+        finally:
+            db.close()
+
+    def report_progress(self, done, total, file_path):
+        self.progress.emit(done, total, os.path.basename(file_path))
+
+def select_and_import_batch(parent, db, on_finished=None):
+    """Seleciona vários arquivos de movimentos e importa em lote sem travar a interface"""
+    file_paths, _ = QFileDialog.getOpenFileNames(parent, "Selecionar Arquivos de Movimentos", "", FILE_FILTER)
+
+    if not file_paths:
+        return None
+
+    file_paths = sorted(file_paths)  # Ordem de gravação determinística (exportações diárias por nome)
+
+    progress_dialog = QProgressDialog("Lendo arquivos...", None, 0, len(file_paths), parent)
+    progress_dialog.setWindowTitle("Importação em Lote")
+    progress_dialog.setWindowModality(Qt.WindowModal)
+    progress_dialog.setMinimumDuration(0)
+    progress_dialog.setValue(0)
+
+    worker = BatchImportWorker(db.db_name, file_paths)
+
+    def on_progress(done, total, file_name):
+        progress_dialog.setValue(done)
+        progress_dialog.setLabelText(f"Lido {done}/{total}: {file_name}\nGravando ao final do lote...")
+
+    def on_batch_finished(batch):
+        progress_dialog.close()
+        show_import_result(parent, batch)
+        if on_finished and batch.imported > 0:
+            on_finished()
+
+    def on_error(error):
+        progress_dialog.close()
+        QMessageBox.critical(parent, "Erro no Upload", f"Falha na importação em lote:\n{error}")
+
+    worker.progress.connect(on_progress)
+    worker.finished_import.connect(on_batch_finished)
+    worker.error_occurred.connect(on_error)
+    worker.start()
+
+    parent._batch_import_worker = worker  # Mantém referência enquanto a thread executa
+    return worker
+
+def show_import_result(parent, result):
+    """Mostra resumo da importação e oferece o relatório de rejeições"""
+    message = f"Processo concluído!\n\n{result.summary()}"
+
+    if not result.has_rejections:
+        QMessageBox.information(parent, "Sucesso", message)
+        return
+
+    msg_box = QMessageBox(parent)
+    msg_box.setIcon(QMessageBox.Warning)
+    msg_box.setWindowTitle("Importação com Rejeições")
+    msg_box.setText(message)
+    save_button = msg_box.addButton("💾 Salvar Relatório de Rejeições", QMessageBox.AcceptRole)
+    msg_box.addButton("❌ Fechar", QMessageBox.RejectRole)
+    msg_box.exec_()
+
+    if msg_box.clickedButton() == save_button:
+        save_rejection_report(parent, result)
+
+def save_rejection_report(parent, result):
+    """Salva o relatório de linhas rejeitadas em CSV"""
+    default_name = os.path.splitext(os.path.basename(result.file_path))[0] + "_rejeicoes.csv"
+    file_path, _ = QFileDialog.getSaveFileName(parent, "Salvar Relatório de Rejeições", default_name, "CSV (*.csv)")
+
+    if file_path:
+        try:
+            ingest.write_rejection_report(result, file_path)
+            QMessageBox.information(parent, "Sucesso", f"Relatório de rejeições salvo em:\n{file_path}")
+        except Exception as e:
+            QMessageBox.critical(parent, "Erro", f"Erro ao salvar relatório:\n{e}")
@@ -0,0 +1,426 @@
+# ingest.py - Importação unificada de movimentos e inventário (sem dependência de Qt)
+import os
+import sys
+import time
+import pandas as pd
+from file_reader import FileReader
+
+VALID_ASSETS = ['HB618', 'HB623']  # Padrão sem banco; com banco vale o catálogo de ativos
+LOCATION_PREFIXES = ('LOJA ', 'CD ')
+
+# Lado do movimento que altera o saldo (mesmas regras de Database._apply_movements)
+CREDIT_TYPES = ('Regresso', 'Entrega', 'Transferencia')                   # Destino recebe (entre CDs)
+DEBIT_TYPES = ('Remessa', 'Retorno', 'Transferencia', 'Devolução de Entrega')  # Origem perde (entre CDs)
+
+# **ESQUEMAS DECLARATIVOS: colunas de destino -> nomes aceitos no arquivo**
+SCHEMAS = {
+    'movimentos': {
+        'descricao': 'Movimentos',
+        'colunas': {
+            'guia': ['Guia'],
+            'transacao': ['Transação', 'Transacao'],
+            'local_origem': ['LOCAL Origem', 'Origem'],
+            'local_destino': ['LOCAL Destino', 'Destino'],
+            'tipo_movimento': ['Tipo Movimento'],
+            'rti': ['RTI', 'Ativo'],
+            'nota_fiscal': ['Nota Fiscal'],
+            'quantidade': ['Quant.', 'Quantidade', 'Qtd', 'Qtde'],
+            'data_movimento': ['Data', 'Data Movimento'],
+        },
+        'obrigatorias': ['data_movimento', 'quantidade', 'rti', 'tipo_movimento'],  # Tipo define o lado do saldo
+        'coluna_ativo': 'rti',
+        'coluna_quantidade': 'quantidade',
+        'coluna_data': 'data_movimento',
+        'colunas_local': ['local_origem', 'local_destino'],
+        'prefixos_local': LOCATION_PREFIXES,
+        'coluna_tipo': 'tipo_movimento',
+    },
+    'inventario': {
+        'descricao': 'Inventário Inicial',
+        'colunas': {
+            'loja_nome': ['loja_nome', 'loja', 'nome_loja', 'local'],
+            'ativo': ['ativo', 'rti', 'produto'],
+            'quantidade': ['quantidade', 'qtd', 'qtde', 'estoque'],
+        },
+        'obrigatorias': ['loja_nome', 'ativo', 'quantidade'],
+        'coluna_ativo': 'ativo',
+        'coluna_quantidade': 'quantidade',
+        'coluna_data': None,
+        'colunas_local': ['loja_nome'],
+        'prefixos_local': None,  # Inventário usa nomes simples (ex: CABO FRIO)
+        'coluna_tipo': None,     # Sem tipo: o local da linha é sempre o dono do saldo
+    },
+}
+
+def normalize_asset_series(series):
+    """Normaliza nomes de ativos de uma coluna inteira (HB 618 -> HB618)"""
+    return series.astype(str).str.strip().str.upper().str.replace(' ', '', regex=False)
+
+def booked_location_sides(df, schema, locations):
+    """Linhas em que cada coluna de local tem o saldo alterado pelo movimento
+
+    Só esse lado precisa ser um local conhecido; a contraparte pode ser vazia ou de outro
+    padrão (ex.: Entrega sem origem, fornecedores), como no cálculo de estoque.
+    """
+    type_col = schema['coluna_tipo']
+    if type_col is None:
+        return {col: pd.Series(True, index=df.index) for col in locations}
+
+    tipos = df[type_col]  # Coluna obrigatória (normalize_columns já rejeitou o arquivo sem ela)
+    empty = pd.Series('', index=df.index)
+    origem = locations.get('local_origem', empty)
+    destino = locations.get('local_destino', empty)
+    origem_loja = origem.str.upper().str.match(r'LOJA(\s|$)')
+    destino_loja = destino.str.upper().str.match(r'LOJA(\s|$)')
+    between_cds = ~origem_loja & ~destino_loja
+
+    sides = {
+        'local_origem': (between_cds & tipos.isin(DEBIT_TYPES)) | (origem_loja & (tipos == 'Regresso')),
+        'local_destino': (between_cds & tipos.isin(CREDIT_TYPES)) | (destino_loja & (tipos == 'Remessa')),
+    }
+    return {col: mask for col, mask in sides.items() if col in locations}
+
+def _column_key(name):
+    return str(name).strip().lower()
+
+class IngestResult:
+    """Resultado da leitura/validação de um arquivo"""
+
+    def __init__(self, kind, file_path, valid, rejected, total_rows, elapsed=0.0):
+        self.kind = kind
+        self.file_path = file_path
+        self.valid = valid
+        self.rejected = rejected
+        self.total_rows = total_rows
+        self.elapsed = elapsed
+        self.imported = 0
+
+    @property
+    def has_rejections(self):
+        return not self.rejected.empty
+
+    def touched_locations(self):
+        """Locais afetados pelas linhas válidas (usado na atualização incremental)"""
+        locations = set()
+        for col in SCHEMAS[self.kind]['colunas_local']:
+            if col in self.valid.columns:
+                locations.update(self.valid[col].dropna().unique())
+        return locations
+
+    def touched_dates(self):
+        """Datas afetadas pelas linhas válidas"""
+        date_col = SCHEMAS[self.kind]['coluna_data']
+        if not date_col or date_col not in self.valid.columns:
+            return set()
+        return set(self.valid[date_col].dropna().unique())
+
+    def summary(self):
+        """Resumo textual do processamento"""
+        descricao = SCHEMAS[self.kind]['descricao']
+        message = f"📄 {os.path.basename(self.file_path)} ({descricao})\n"
+        message += f"📊 Linhas lidas: {self.total_rows}\n"
+        message += f"✅ Linhas válidas: {len(self.valid)}\n"
+        message += f"❌ Linhas rejeitadas: {len(self.rejected)}\n"
+
+        if self.has_rejections:
+            message += "\nPrincipais motivos:\n"
+            for motivo, count in self.rejected['motivo'].value_counts().head(5).items():
+                message += f"• {motivo}: {count}\n"
+
+        return message
+
+def detect_kind(df):
+    """Detecta se o arquivo é de movimentos ou inventário pelas colunas"""
+    columns = {_column_key(col) for col in df.columns}
+
+    scores = {}
+    for kind, schema in SCHEMAS.items():
+        aliases = {_column_key(alias)
+                   for target, names in schema['colunas'].items()
+                   for alias in [target] + names}
+        scores[kind] = len(columns & aliases)
+
+    if scores['movimentos'] == scores['inventario'] == 0:
+        raise ValueError(f"Não foi possível identificar o tipo do arquivo. Colunas: {list(df.columns)}")
+
+    return 'movimentos' if scores['movimentos'] >= scores['inventario'] else 'inventario'
+
+def normalize_columns(df, kind):
+    """Renomeia colunas do arquivo para os nomes do esquema"""
+    schema = SCHEMAS[kind]
+
+    alias_map = {}
+    for target, names in schema['colunas'].items():
+        for alias in [target] + names:
+            alias_map[_column_key(alias)] = target
+
+    renamed = {}
+    for col in df.columns:
+        target = alias_map.get(_column_key(col))
+        if target and target not in renamed.values():
+            renamed[col] = target
+
+    df = df.rename(columns=renamed)
+
+    missing_columns = [col for col in schema['obrigatorias'] if col not in df.columns]
+    if missing_columns:
+        raise ValueError(
+            f"Colunas faltando: {missing_columns}\n"
+            f"Colunas disponíveis: {list(df.columns)}"
+        )
+
+    return df[[col for col in schema['colunas'] if col in df.columns]]
+
+def validate(df, kind, valid_assets=None, dayfirst=True):
+    """Valida colunas inteiras de uma vez e separa linhas válidas e rejeitadas"""
+    schema = SCHEMAS[kind]
+    valid_assets = valid_assets or VALID_ASSETS
+
+    df = df.copy()
+    df.insert(0, 'linha', df.index)  # Linha no arquivo original (índice do FileReader, 1 = cabeçalho)
+
+    motivos = pd.Series('', index=df.index)
+
+    def reject(mask, motivo):
+        nonlocal motivos
+        mask = mask.fillna(True)
+        motivos = motivos.where(~mask, motivos + '; ' + motivo)
+
+    # Ativos desconhecidos
+    asset_col = schema['coluna_ativo']
+    df[asset_col] = normalize_asset_series(df[asset_col].fillna(''))
+    reject(~df[asset_col].isin(valid_assets), "Ativo desconhecido")
+
+    # Quantidades não numéricas, negativas ou fracionárias (seriam truncadas na gravação)
+    qty_col = schema['coluna_quantidade']
+    quantities = pd.to_numeric(df[qty_col], errors='coerce')
+    reject(quantities.isna(), "Quantidade inválida")
+    reject(quantities < 0, "Quantidade negativa")
+    reject(quantities.notna() & (quantities % 1 != 0), "Quantidade não inteira")
+    df[qty_col] = quantities
+
+    # Datas que não puderam ser interpretadas
+    date_col = schema['coluna_data']
+    if date_col:
+        dates = pd.to_datetime(df[date_col], dayfirst=dayfirst, errors='coerce')
+        reject(dates.isna(), "Data inválida")
+        df[date_col] = dates.dt.date
+
+    # **CORREÇÃO: Locais vazios ou fora do padrão (LOJA ... / CD ...) só são rejeitados no lado
+    # que o tipo de movimento altera; a contraparte é aceita como o cálculo de estoque aceita**
+    locations = {col: df[col].fillna('').astype(str).str.strip()
+                 for col in schema['colunas_local'] if col in df.columns}
+    for loc_col, booked in booked_location_sides(df, schema, locations).items():
+        unknown = locations[loc_col] == ''
+        if schema['prefixos_local']:
+            unknown |= ~locations[loc_col].str.upper().str.startswith(schema['prefixos_local'])
+        reject(booked & unknown, f"Local desconhecido ({loc_col})")
+    for loc_col, values in locations.items():
+        df[loc_col] = values.where(values != '', None)
+
+    motivos = motivos.str.lstrip('; ')
+    rejected_mask = motivos != ''
+
+    rejected = df[rejected_mask].copy()
+    rejected['motivo'] = motivos[rejected_mask]
+
+    valid = df[~rejected_mask].drop(columns=['linha'])
+    valid[qty_col] = valid[qty_col].astype(int)
+
+    return valid, rejected
+
+def load_file(file_path, kind=None, valid_assets=None):
+    """Lê, normaliza e valida um arquivo sem gravar nada no banco"""
+    start = time.perf_counter()
+
+    df = FileReader.read(file_path)
+    kind = kind or detect_kind(df)
+    dayfirst = df.attrs.get('dayfirst', True)
+
+    df = normalize_columns(df, kind)
+    valid, rejected = validate(df, kind, valid_assets=valid_assets, dayfirst=dayfirst)
+
+    return IngestResult(kind, file_path, valid, rejected, len(df), time.perf_counter() - start)
+
+def import_file(db, file_path, kind=None):
+    """Valida o arquivo e grava as linhas válidas no banco"""
+    result = load_file(file_path, kind, valid_assets=db.get_asset_codes())
+
+    if result.valid.empty:
+        raise ValueError(f"Nenhuma linha válida encontrada.\n\n{result.summary()}")
+
+    if result.kind == 'movimentos':
+        db.insert_data(result.valid)
+        result.imported = len(result.valid)
+    else:
+        successful_inserts, failed_inserts = db.insert_inventory_data(result.valid)
+        result.imported = successful_inserts
+
+    print(f"✅ Importação concluída em {result.elapsed:.2f}s de leitura/validação")
+    return result
+
+class BatchResult:
+    """Resultado da importação de vários arquivos em lote"""
+
+    def __init__(self, results, errors, elapsed=0.0):
+        self.results = results  # IngestResult por arquivo, na ordem recebida
+        self.errors = errors    # Lista de (arquivo, mensagem)
+        self.elapsed = elapsed
+        self.file_path = "lote_importacao"
+        self.duplicates_removed = 0
+        self.imported = 0
+
+        rejected_frames = []
+        for result in results:
+            if result.has_rejections:
+                frame = result.rejected.copy()
+                frame.insert(0, 'arquivo', os.path.basename(result.file_path))
+                rejected_frames.append(frame)
+        self.rejected = pd.concat(rejected_frames, ignore_index=True) if rejected_frames else pd.DataFrame()
+
+    @property
+    def has_rejections(self):
+        return not self.rejected.empty
+
+    def summary(self):
+        """Resumo textual da importação em lote"""
+        message = f"📁 Arquivos processados: {len(self.results)}\n"
+        message += f"❌ Arquivos com erro: {len(self.errors)}\n"
+        message += f"📊 Linhas lidas: {sum(r.total_rows for r in self.results)}\n"
+        message += f"🔁 Duplicadas entre arquivos (removidas): {self.duplicates_removed}\n"
+        message += f"❌ Linhas rejeitadas: {len(self.rejected)}\n"
+        message += f"✅ Linhas importadas: {self.imported}\n"
+        message += f"⏱️ Tempo total: {self.elapsed:.1f}s\n"
+
+        for file_path, error in self.errors[:5]:
+            message += f"\n• {os.path.basename(file_path)}: {error}"
+
+        return message
+
+def _load_file_worker(file_path, kind, valid_assets=None):
+    """Executado em processo separado: retorna (resultado, erro)"""
+    try:
+        return load_file(file_path, kind, valid_assets), None
+    except Exception as e:
+        return None, str(e)
+
+def load_files_parallel(file_paths, kind=None, max_workers=None, progress_callback=None, valid_assets=None):
+    """Lê e valida vários arquivos em processos paralelos (parsing do pandas é CPU-bound)"""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    file_paths = list(file_paths)
+    outcomes = [None] * len(file_paths)
+    max_workers = max_workers or min(len(file_paths), os.cpu_count() or 1)
+
+    if max_workers <= 1:
+        for i, path in enumerate(file_paths):
+            outcomes[i] = _load_file_worker(path, kind, valid_assets)
+            if progress_callback:
+                progress_callback(i + 1, len(file_paths), path)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(_load_file_worker, path, kind, valid_assets): i
+                       for i, path in enumerate(file_paths)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                try:
+                    outcomes[i] = future.result()
+                except Exception as e:  # Processo de trabalho encerrado inesperadamente
+                    outcomes[i] = (None, str(e))
+                if progress_callback:
+                    progress_callback(done, len(file_paths), file_paths[i])
+
+    results = []
+    errors = []
+    for path, (result, error) in zip(file_paths, outcomes):
+        if error:
+            errors.append((path, error))
+        else:
+            results.append(result)
+
+    return results, errors
+
+def drop_cross_file_duplicates(frames):
+    """Concatena na ordem e remove linhas que já apareceram em um arquivo anterior"""
+    combined = pd.concat(
+        [frame.assign(_arquivo=i) for i, frame in enumerate(frames)],
+        ignore_index=True
+    )
+    key_columns = [col for col in SCHEMAS['movimentos']['colunas'] if col in combined.columns]
+
+    # Duplicatas dentro do mesmo arquivo são mantidas; só o primeiro arquivo de cada chave é importado
+    first_file = combined.groupby(key_columns, dropna=False, sort=False)['_arquivo'].transform('min')
+    deduplicated = combined[combined['_arquivo'] == first_file].drop(columns=['_arquivo'])
+
+    return deduplicated, len(combined) - len(deduplicated)
+
+def import_files(db, file_paths, max_workers=None, progress_callback=None):
+    """Importa vários arquivos de movimentos: parsing paralelo e um único gravador em ordem"""
+    start = time.perf_counter()
+    results, errors = load_files_parallel(file_paths, 'movimentos', max_workers, progress_callback,
+                                          valid_assets=db.get_asset_codes())
+
+    batch = BatchResult(results, errors)
+
+    frames = [result.valid for result in results if not result.valid.empty]
+    if frames:
+        movements, batch.duplicates_removed = drop_cross_file_duplicates(frames)
+        if not movements.empty:
+            db.insert_data(movements)  # Uma única transação para todo o lote
+            batch.imported = len(movements)
+
+    batch.elapsed = time.perf_counter() - start
+    print(f"✅ Lote importado: {batch.imported} linhas de {len(results)} arquivos em {batch.elapsed:.2f}s")
+    return batch
+
+def write_rejection_report(result, file_path):
+    """Salva relatório das linhas rejeitadas (CSV no padrão das exportações)"""
+    leading = [col for col in ('arquivo', 'linha', 'motivo') if col in result.rejected.columns]
+    columns = leading + [col for col in result.rejected.columns if col not in leading]
+    result.rejected[columns].to_csv(file_path, index=False, sep=';', encoding='utf-8-sig')
+    return file_path
+
+if __name__ == '__main__':
+    # Uso headless: python ingest.py arquivo.xlsx [movimentos|inventario] [--gravar estoque.db]
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Valida (e opcionalmente importa) arquivos de movimentos/inventário")
+    parser.add_argument('arquivos', nargs='+')
+    parser.add_argument('--tipo', choices=list(SCHEMAS), default=None)
+    parser.add_argument('--gravar', metavar='BANCO', help="Grava as linhas válidas no banco informado")
+    parser.add_argument('--relatorio', metavar='PASTA', help="Salva relatórios de rejeição nesta pasta")
+    parser.add_argument('--lote', action='store_true', help="Importa todos os movimentos em lote (processos paralelos)")
+    parser.add_argument('--processos', type=int, default=None, help="Número de processos no modo lote")
+    args = parser.parse_args()
+
+    if args.lote:
+        from database import Database
+        db = Database(args.gravar or ':memory:')
+        batch = import_files(db, args.arquivos, max_workers=args.processos)
+        print(batch.summary())
+        db.close()
+        sys.exit(1 if batch.errors else 0)
+
+    db = None
+    if args.gravar:
+        from database import Database
+        db = Database(args.gravar)
+
+    exit_code = 0
+    for path in args.arquivos:
+        try:
+            result = import_file(db, path, args.tipo) if db else load_file(path, args.tipo)
+            print(result.summary())
+            print(f"⏱️ {result.elapsed:.3f}s")
+
+            if args.relatorio and result.has_rejections:
+                os.makedirs(args.relatorio, exist_ok=True)
+                report_name = os.path.splitext(os.path.basename(path))[0] + "_rejeicoes.csv"
+                print(f"💾 Relatório: {write_rejection_report(result, os.path.join(args.relatorio, report_name))}")
+        except Exception as e:
+            print(f"❌ {path}: {e}")
+            exit_code = 1
+
+    if db:
+        db.close()
+    sys.exit(exit_code)
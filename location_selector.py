@@ -0,0 +1,126 @@
+# location_selector.py - Combo de locais com busca incremental (código, nome simples ou nome completo)
+import unicodedata
+from PyQt5.QtWidgets import QComboBox, QCompleter
+from PyQt5.QtGui import QStandardItemModel, QStandardItem
+from PyQt5.QtCore import Qt, QModelIndex, QSortFilterProxyModel, QEvent, QTimer
+from database import classify_location
+
+LOCATION_ROLE = Qt.UserRole      # Nome real do local (sem emoji)
+SEARCH_ROLE = Qt.UserRole + 1    # Chave de busca pré-calculada
+
+PLACEHOLDER_TEXT = "🔍 Selecione um local..."
+
+def fold_text(text):
+    """Minúsculas e sem acentos (São Paulo -> sao paulo), usado na chave e no texto digitado"""
+    normalized = unicodedata.normalize('NFKD', str(text).lower())
+    return ''.join(char for char in normalized if not unicodedata.combining(char))
+
+def location_search_key(location_name):
+    """Código da loja, nome simples e nome completo numa única chave de busca"""
+    info = classify_location(location_name)
+    return fold_text(" | ".join([info['codigo_loja'] or '', info['nome_simples'] or '', location_name]))
+
+class LocationCombo(QComboBox):
+    """Combo de CDs e lojas com busca incremental
+
+    Os itens ficam num QStandardItemModel recriado só quando o conjunto de locais muda. Ao digitar,
+    um proxy filtra pela chave de busca de cada item (calculada uma vez na criação) e o QCompleter
+    mostra os locais encontrados; o local escolhido vem dos dados do item, não do texto digitado.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setEditable(True)
+        self.setInsertPolicy(QComboBox.NoInsert)
+        self.setMaxVisibleItems(20)
+        self.lineEdit().setPlaceholderText("🔍 Digite o código ou o nome do local...")
+
+        self.locations_model = QStandardItemModel(self)
+        self.setModel(self.locations_model)
+        self.rows = {}              # Nome do local -> linha no modelo
+        self.location_set = None    # (CDs, lojas) usados na última montagem
+
+        self.search_model = QSortFilterProxyModel(self)
+        self.search_model.setSourceModel(self.locations_model)
+        self.search_model.setFilterRole(SEARCH_ROLE)
+
+        # **OTIMIZAÇÃO: O proxy já filtra; o completer só exibe o resultado (sem filtrar de novo por prefixo)**
+        self.search_completer = QCompleter(self.search_model, self)
+        self.search_completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.search_completer.activated[QModelIndex].connect(self.on_search_activated)
+        self.setCompleter(self.search_completer)
+
+        self.lineEdit().textEdited.connect(self.on_text_edited)
+        self.lineEdit().editingFinished.connect(self.restore_current_text)
+        self.lineEdit().installEventFilter(self)
+        self.currentIndexChanged.connect(self.restore_current_text)
+
+    def set_locations(self, cds, lojas):
+        """Recria os itens se o conjunto de locais mudou (True quando recriou), mantendo a seleção"""
+        location_set = (tuple(sorted(cds)), tuple(sorted(lojas)))
+        if location_set == self.location_set:
+            return False
+
+        selected = self.selected_location()
+        self.blockSignals(True)
+        self.locations_model.clear()
+
+        items = [QStandardItem(PLACEHOLDER_TEXT)]
+        for icon, names in (("🏢", location_set[0]), ("🏪", location_set[1])):
+            for name in names:
+                item = QStandardItem(f"{icon} {name}")
+                item.setData(name, LOCATION_ROLE)
+                item.setData(location_search_key(name), SEARCH_ROLE)
+                items.append(item)
+        # Uma única inserção no modelo (addItem um a um notificava a view a cada local)
+        self.locations_model.invisibleRootItem().appendRows(items)
+
+        # Separador visual entre CDs e lojas
+        self.insertSeparator(1 + len(location_set[0]))
+
+        self.rows = {self.locations_model.item(row).data(LOCATION_ROLE): row
+                     for row in range(1, self.locations_model.rowCount())}
+        self.rows.pop(None, None)
+        self.location_set = location_set
+
+        # Restaura seleção
+        self.setCurrentIndex(self.rows.get(selected, 0))
+        self.restore_current_text()
+        self.blockSignals(False)
+        return True
+
+    def selected_location(self):
+        """Nome real do local selecionado (None se nenhum)"""
+        return self.currentData(LOCATION_ROLE)
+
+    def select_location(self, location_name):
+        row = self.rows.get(location_name)
+        if row is not None:
+            self.setCurrentIndex(row)
+        return row is not None
+
+    def on_text_edited(self, text):
+        self.search_model.setFilterFixedString(fold_text(text.strip()))
+
+    def on_search_activated(self, index):
+        # Índice do popup -> proxy da busca -> linha do combo
+        search_index = self.search_completer.completionModel().mapToSource(index)
+        row = self.search_model.mapToSource(search_index).row()
+        if row > 0:
+            self.setCurrentIndex(row)
+        self.restore_current_text()
+
+    def restore_current_text(self):
+        """Texto digitado sem escolher um local volta a mostrar o local selecionado
+
+        Sem local selecionado o campo fica vazio (aparece o texto de ajuda e a busca começa do zero).
+        """
+        current_text = self.itemText(self.currentIndex()) if self.selected_location() else ""
+        if self.lineEdit().text() != current_text:
+            self.lineEdit().setText(current_text)
+
+    def eventFilter(self, watched, event):
+        # Ao entrar no campo o texto fica selecionado: digitar já substitui o local exibido
+        if watched is self.lineEdit() and event.type() == QEvent.FocusIn:
+            QTimer.singleShot(0, self.lineEdit().selectAll)
+        return super().eventFilter(watched, event)
@@ -1,7 +1,9 @@
 # main.py - VERSÃO CORRIGIDA COM HIGH DPI SUPPORT
+from startup_profiler import StartupProfiler
+StartupProfiler.start()  # Antes dos demais imports: mede o custo de cada um
+
 import sys
 import os
-import pandas as pd
 
 # **CORREÇÃO CRÍTICA: Configura DPI ANTES de importar PyQt5**
 os.environ["QT_AUTO_SCREEN_SCALE_FACTOR"] = "1"
@@ -11,17 +13,20 @@ os.environ["QT_SCALE_FACTOR"] = "1.0"
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QGridLayout, QLabel, QAction, QFileDialog, 
                              QMessageBox, QGroupBox, QComboBox, QTableView, QHeaderView, QPushButton, QHBoxLayout, 
                              QTabWidget, QFrame, QSplitter, QTextEdit,QDialog,QScrollArea)
-from PyQt5.QtGui import QFont, QStandardItemModel, QStandardItem, QIcon
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont, QIcon
+from PyQt5.QtCore import Qt, QTimer
 from database import Database
-from settings_dialog import SettingsDialog
-from flow_dialog import FlowVisualDialog
-from flow_dialog import FlowDialog
+from folder_watcher import FolderWatcher, WatchConfig
 import datetime
-from version import Version
-from update_dialog import UpdateDialog
-from tools_dialog import ToolsDialog
 from screen_utils import ScreenManager, ResponsiveDialog
+from appearance_manager import AppearanceManager
+from dashboard_snapshot import DashboardSnapshot, DashboardRefreshWorker
+from history_table import MovementHistoryModel, HistoryFilterBar, HISTORY_HEADERS
+from location_selector import LocationCombo
+
+# **OTIMIZAÇÃO: pandas, diálogos, importação e atualizador são importados no primeiro uso**
+# (pandas/numpy e requests respondiam pela maior parte do tempo de abertura)
+StartupProfiler.mark("Imports do main")
 
 class MainWindow(QMainWindow, ResponsiveDialog):
     def __init__(self):
@@ -47,27 +52,41 @@ class MainWindow(QMainWindow, ResponsiveDialog):
         base_font.setPointSize(font_size)
         self.setFont(base_font)
         
-        self.cd_map = {
-            'CD RJ': 'CD HORTIFRUTI - Rio de Janeiro (RJ)',
-            'CD SP': 'CD HORTIFRUTI - São Paulo (SP)',
-            'CD ES': 'CD HORTIFRUTI - Viana (ES)'
-        }
-        self.asset_types = ['HB 618', 'HB 623']
+        self.stock_layout_key = None  # Ativos/CDs/regiões usados para montar as abas de estoque
+        self.stock_tab_assets = {}    # Nome da aba -> código do ativo (None = total)
+        self.known_locations = set()
+        self.snapshot_worker = None
+        self.data_generation = 0  # Incrementado a cada atualização com dados do banco
+
+        # Estilos nomeados (e aparência salva) registrados uma vez na stylesheet da aplicação
+        AppearanceManager.apply_saved_settings(self)
 
         self.init_ui()
         self.create_menu()
-        self.update_all_views()
+
+        # **OTIMIZAÇÃO: Abre com o último snapshot do painel e confere os dados em segundo plano**
+        snapshot = DashboardSnapshot.load(self.db.db_name)
+        if snapshot:
+            self.render_snapshot(snapshot, stale=True)
+            self.start_snapshot_refresh(snapshot['versao_dados'])
+        else:
+            self.update_all_views()
+
+        # Importação automática da pasta monitorada (opcional)
+        self.folder_watcher = FolderWatcher(self.db.db_name, self)
+        self.folder_watcher.file_imported.connect(self.on_watched_file_imported)
+        self.folder_watcher.file_failed.connect(self.on_watched_file_failed)
+        self.configure_folder_watcher(WatchConfig.load_settings())
 
     def show_visual_flow_dialog(self):
         """Mostra o diálogo de fluxo visual melhorado - VERSÃO RESPONSIVA"""
-        location_text = self.location_combo.currentText()
-        if location_text and "Selecione" not in location_text:
-            location_name = location_text.replace("🏢 ", "").replace("🏪 ", "")
+        location_name = self.location_combo.selected_location()
+        if location_name:
             
             # Para CDs, usa FlowVisualDialog que tem botão de análise completa
             from flow_dialog import FlowVisualDialog, CDFlowAnalysisDialog
             
-            if not location_name.startswith('LOJA'):  # É um CD
+            if self.db.get_location_kind(location_name) != 'loja':  # É um CD
                 # Pergunta se quer fluxo visual ou análise completa
                 from PyQt5.QtWidgets import QMessageBox
                 
@@ -111,6 +130,10 @@ class MainWindow(QMainWindow, ResponsiveDialog):
         upload_action.triggered.connect(self.handle_upload)
         file_menu.addAction(upload_action)
         
+        batch_upload_action = QAction("📥 Upload em Lote de Movimentos (vários arquivos)", self)
+        batch_upload_action.triggered.connect(self.handle_batch_upload)
+        file_menu.addAction(batch_upload_action)
+        
         upload_inventory_action = QAction("📦 Upload de Inventário Inicial", self)
         upload_inventory_action.triggered.connect(self.quick_upload_inventory)
         file_menu.addAction(upload_inventory_action)
@@ -155,91 +178,46 @@ class MainWindow(QMainWindow, ResponsiveDialog):
 
     def open_tools_dialog(self):
         """Abre o novo diálogo de ferramentas"""
+        from tools_dialog import ToolsDialog
         dialog = ToolsDialog(self.db, self)
         dialog.database_cleared.connect(self.update_all_views)
         dialog.appearance_changed.connect(self.apply_appearance_settings)
+        dialog.watch_config_changed.connect(self.configure_folder_watcher)
         dialog.exec_()
 
     def apply_appearance_settings(self, settings):
         """Aplica configurações de aparência em tempo real"""
-        try:
-            # Aplica fonte global
-            font = QFont(settings['font_family'], settings['font_size'])
-            self.setFont(font)
-            QApplication.instance().setFont(font)
-            
-            # Aplica cores (stylesheet global)
-            if settings['theme'] == 'Escuro':
-                dark_style = f"""
-                QMainWindow {{
-                    background-color: #2b2b2b;
-                    color: #ffffff;
-                }}
-                QTabWidget::pane {{
-                    border: 1px solid {settings['primary_color']};
-                    background-color: #404040;
-                }}
-                QTabBar::tab {{
-                    background: #505050;
-                    color: #ffffff;
-                    padding: 10px 20px;
-                }}
-                QTabBar::tab:selected {{
-                    background: {settings['primary_color']};
-                }}
-                QGroupBox {{
-                    color: #ffffff;
-                    border: 2px solid {settings['primary_color']};
-                }}
-                QLabel {{
-                    color: #ffffff;
-                }}
-                """
-                self.setStyleSheet(dark_style)
-            else:
-                # Tema claro
-                light_style = f"""
-                QMainWindow {{
-                    background-color: {settings['background_color']};
-                    color: {settings['text_color']};
-                }}
-                QTabWidget::pane {{
-                    border: 1px solid #c0c0c0;
-                }}
-                QTabBar::tab {{
-                    background: #f0f0f0;
-                    padding: 10px 20px;
-                }}
-                QTabBar::tab:selected {{
-                    background: {settings['primary_color']};
-                    color: white;
-                }}
-                """
-                self.setStyleSheet(light_style)
-            
-            # Força atualização da interface
-            self.update()
-            self.repaint()
-            
+        # Fonte e tema ficam na stylesheet da aplicação (com os estilos nomeados das telas)
+        self.setFont(QFont(settings['font_family'], settings['font_size']))
+        if AppearanceManager.apply_to_application(settings, self):
             print(f"✅ Configurações aplicadas: Fonte {settings['font_family']} {settings['font_size']}pt, Tema {settings['theme']}")
-            
-        except Exception as e:
-            print(f"❌ Erro ao aplicar configurações: {e}")
 
     def open_tools_dialog(self):
         """Abre o novo diálogo de ferramentas"""
+        from tools_dialog import ToolsDialog
         dialog = ToolsDialog(self.db, self)
         dialog.database_cleared.connect(self.update_all_views)
         dialog.appearance_changed.connect(self.apply_appearance_settings)
+        dialog.watch_config_changed.connect(self.configure_folder_watcher)
         dialog.exec_()
 
+    def start_auto_update_check(self):
+        """Verificação automática de atualizações (atualizador carregado só depois da primeira pintura)"""
+        try:
+            from update_dialog import UpdateDialog
+            self.update_dialog = UpdateDialog(self, auto_check=True)
+        except Exception as e:
+            print(f"⚠️ Não foi possível verificar atualizações: {e}")
+
     def check_updates_manual(self):
         """Abre diálogo de atualizações manualmente"""
+        from update_dialog import UpdateDialog
         dialog = UpdateDialog(self, auto_check=False)
         dialog.exec_()
 
     def show_about(self):
         """Mostra informações sobre a aplicação"""
+        from version import Version
         app_info = Version.get_app_info()
         
         about_text = f"""
@@ -259,6 +237,11 @@ class MainWindow(QMainWindow, ResponsiveDialog):
         
         <hr>
         
+        <h3>⏱️ Desempenho da Inicialização</h3>
+        {StartupProfiler.report_html()}
+        
+        <hr>
+        
         <h3>⚡ Funcionalidades Principais</h3>
         <ul>
             <li>📦 <b>Inventário Inicial:</b> Carregamento de estoque base para lojas</li>
@@ -404,8 +387,8 @@ class MainWindow(QMainWindow, ResponsiveDialog):
         
         # Status do inventário
         self.inventory_status = QLabel("📦 Inventário: Não carregado")
-        self.inventory_status.setFont(status_font)
-        self.inventory_status.setStyleSheet("color: #dc3545; font-weight: bold;")
+        self.inventory_status.setFont(QFont("Arial", 11, QFont.Bold))
+        self.inventory_status.setProperty("tone", "danger")
         status_layout.addWidget(self.inventory_status)
         
         status_layout.addStretch()
@@ -467,12 +450,8 @@ class MainWindow(QMainWindow, ResponsiveDialog):
             }
         """)
         
+        # Abas são criadas em build_stock_tabs (dependem dos CDs/regiões do banco)
         self.stock_widgets = {}
-        
-        # Cria abas
-        self.create_stock_tab("📊 Total")
-        for asset in self.asset_types:
-            self.create_stock_tab(f"📦 {asset}")
 
         layout.addWidget(self.tabs)
 
@@ -507,7 +486,7 @@ class MainWindow(QMainWindow, ResponsiveDialog):
         local_label.setFont(QFont("Arial", 11))  # **CORREÇÃO: Fonte maior**
         filter_action_layout.addWidget(local_label, 1)
         
-        self.location_combo = QComboBox()
+        self.location_combo = LocationCombo()  # **NOVO: Busca por código, nome simples ou nome completo**
         self.location_combo.setFont(QFont("Arial", 11))  # **CORREÇÃO: Fonte maior**
         self.location_combo.setStyleSheet("QComboBox { padding: 8px; }")  # **CORREÇÃO: Padding maior**
         self.location_combo.currentIndexChanged.connect(self.update_location_details)
@@ -518,24 +497,30 @@ class MainWindow(QMainWindow, ResponsiveDialog):
         
         self.view_flow_button = QPushButton("📊 Fluxo Clássico")
         self.view_flow_button.setFont(button_font)
-        self.view_flow_button.setStyleSheet("QPushButton { background-color: #28a745; color: white; padding: 8px 15px; }")
+        self.view_flow_button.setProperty("variant", "success")
         self.view_flow_button.clicked.connect(self.show_flow_dialog)
         filter_action_layout.addWidget(self.view_flow_button, 2)
         
         self.view_visual_flow_button = QPushButton("🎯 Fluxo Visual")
         self.view_visual_flow_button.setFont(button_font)
-        self.view_visual_flow_button.setStyleSheet("QPushButton { background-color: #007bff; color: white; padding: 8px 15px; }")
+        self.view_visual_flow_button.setProperty("variant", "primary")
         self.view_visual_flow_button.clicked.connect(self.show_visual_flow_dialog)
         filter_action_layout.addWidget(self.view_visual_flow_button, 2)
         
         self.export_button = QPushButton("💾 Exportar")
         self.export_button.setFont(button_font)
-        self.export_button.setStyleSheet("QPushButton { background-color: #6c757d; color: white; padding: 8px 15px; }")
+        self.export_button.setProperty("variant", "secondary")
         self.export_button.clicked.connect(self.export_history)
         filter_action_layout.addWidget(self.export_button, 2)
         
         details_layout.addLayout(filter_action_layout)
         
+        # **NOVO: Filtros do histórico (período, tipo, ativo, contraparte) aplicados direto no SQLite**
+        self.history_filter_bar = HistoryFilterBar()
+        self.history_filter_bar.setFont(QFont("Arial", 10))
+        self.history_filter_bar.filtersChanged.connect(self.history_model_filters_changed)
+        details_layout.addWidget(self.history_filter_bar)
+        
         # **CORREÇÃO: Tabela melhorada com fonte maior**
         self.history_table = QTableView()
         self.history_table.setFont(QFont("Arial", 10))  # **CORREÇÃO: Fonte maior**
@@ -557,13 +542,54 @@ class MainWindow(QMainWindow, ResponsiveDialog):
             }
         """)
         
-        self.history_model = QStandardItemModel()
+        # **OTIMIZAÇÃO: Modelo lê do SQLite só as linhas visíveis; ordenar/filtrar vira ORDER BY/WHERE**
+        self.history_model = MovementHistoryModel(self.db, self)
         self.history_table.setModel(self.history_model)
         
+        # **CORREÇÃO: Configura colunas com tamanhos adequados**
+        header = self.history_table.horizontalHeader()
+        header.setFont(QFont("Arial", 10, QFont.Bold))  # **CORREÇÃO: Fonte maior no header**
+        header.setResizeContentsPrecision(0)  # Ajuste ao conteúdo olha só as linhas visíveis (não lê o histórico todo)
+        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)  # Data
+        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)  # Movimento
+        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)  # RTI
+        header.setSectionResizeMode(3, QHeaderView.Stretch)           # Origem
+        header.setSectionResizeMode(4, QHeaderView.Stretch)           # Destino
+        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)  # Quantidade
+        header.setSortIndicator(0, Qt.DescendingOrder)  # Mais recentes primeiro, como antes
+        self.history_table.setSortingEnabled(True)
+        
         details_layout.addWidget(self.history_table)
         layout.addWidget(details_group)
 
-    def create_stock_tab(self, asset_name):
+    def build_stock_tabs(self, overview, assets):
+        """Recria as abas de estoque conforme os ativos, CDs e regiões existentes no banco"""
+        current_index = self.tabs.currentIndex()
+        
+        while self.tabs.count():
+            page = self.tabs.widget(0)
+            self.tabs.removeTab(0)
+            page.deleteLater()
+        
+        self.stock_widgets = {}
+        self.stock_tab_assets = {"📊 Total": None}
+        
+        self.create_stock_tab("📊 Total", overview)
+        for asset in assets:
+            tab_name = f"📦 {asset['nome']}"
+            self.stock_tab_assets[tab_name] = asset['codigo']
+            self.create_stock_tab(tab_name, overview)
+        
+        if 0 <= current_index < self.tabs.count():
+            self.tabs.setCurrentIndex(current_index)
+        
+        self.stock_layout_key = self.get_stock_layout_key(overview, assets)
+
+    @staticmethod
+    def get_stock_layout_key(overview, assets):
+        return (tuple(asset['codigo'] for asset in assets), tuple(overview['cds']), tuple(overview['regioes']))
+
+    def create_stock_tab(self, asset_name, overview):
         """Cria aba de estoque com layout melhorado"""
         tab_widget = QWidget()
         layout = QGridLayout(tab_widget)
@@ -576,53 +602,43 @@ class MainWindow(QMainWindow, ResponsiveDialog):
         for i, header in enumerate(headers):
             header_label = QLabel(f"<b>{header}</b>")
             header_label.setFont(QFont("Arial", 12, QFont.Bold))  # **CORREÇÃO: Fonte maior**
-            header_label.setStyleSheet("""
-                QLabel {
-                    background-color: #f8f9fa;
-                    border: 1px solid #dee2e6;
-                    padding: 12px;
-                    font-size: 12px;
-                }
-            """)
+            header_label.setProperty("stockCell", "header")
             layout.addWidget(header_label, 0, i)
         
         # **CORREÇÃO: Linhas de CDs com fonte maior**
         content_font = QFont("Arial", 11)
         
+        # Uma linha por CD cadastrado e uma por região (total das lojas da região)
+        rows = [(('cd', cd_name), f"🏢 {cd_name}") for cd_name in overview['cds']]
+        rows += [(('regiao', regiao), f"🏪 Lojas {regiao}" if regiao != 'N/D' else "🏪 Lojas sem região")
+                 for regiao in overview['regioes']]
+        
         row = 1
-        for cd_key, cd_name in self.cd_map.items():
-            # Nome do CD
-            cd_label = QLabel(cd_name)
-            cd_label.setFont(content_font)
-            cd_label.setStyleSheet("padding: 12px; border-bottom: 1px solid #eee;")
-            layout.addWidget(cd_label, row, 0)
+        for key, title in rows:
+            name_label = QLabel(title)
+            name_label.setFont(content_font)
+            name_label.setProperty("stockCell", "row")
+            layout.addWidget(name_label, row, 0)
             
             # Estoque
             stock_label = QLabel("0")
             stock_label.setFont(QFont("Arial", 11, QFont.Bold))
-            stock_label.setStyleSheet("padding: 12px; border-bottom: 1px solid #eee;")
-            widgets[cd_key] = stock_label
+            stock_label.setProperty("stockCell", "row")
             layout.addWidget(stock_label, row, 1)
             
             # Status
             status_label = QLabel("🟢 OK")
             status_label.setFont(content_font)
-            status_label.setStyleSheet("padding: 12px; border-bottom: 1px solid #eee;")
-            widgets[f"{cd_key}_status"] = status_label
+            status_label.setProperty("stockCell", "row")
+            status_label.setProperty("tone", "success")
             layout.addWidget(status_label, row, 2)
             
+            widgets[key] = (stock_label, status_label)
             row += 1
             
         # **CORREÇÃO: Linha de total das lojas com destaque e fonte maior**
         total_frame = QFrame()
-        total_frame.setStyleSheet("""
-            QFrame {
-                background-color: #e8f4fd;
-                border: 2px solid #007bff;
-                border-radius: 5px;
-                margin: 8px;
-            }
-        """)
+        total_frame.setObjectName("stockTotalFrame")
         total_layout = QGridLayout(total_frame)
         
         total_title = QLabel("<b>🏪 TOTAL ESTOQUE LOJAS</b>")
@@ -631,16 +647,17 @@ class MainWindow(QMainWindow, ResponsiveDialog):
         
         total_stock_label = QLabel("0")
         total_stock_label.setFont(QFont("Arial", 14, QFont.Bold))  # **CORREÇÃO: Fonte maior**
-        total_stock_label.setStyleSheet("color: #007bff;")
-        widgets['total_lojas'] = total_stock_label
+        total_stock_label.setProperty("tone", "primary")
         total_layout.addWidget(total_stock_label, 0, 1)
         
         total_status_label = QLabel("📊 Calculado")
         total_status_label.setFont(QFont("Arial", 11))
-        widgets['total_lojas_status'] = total_status_label
         total_layout.addWidget(total_status_label, 0, 2)
         
+        widgets['total_lojas'] = (total_stock_label, total_status_label)
+        
         layout.addWidget(total_frame, row, 0, 1, 3)
+        layout.setRowStretch(row + 1, 1)
         
         self.tabs.addTab(tab_widget, asset_name)
         self.stock_widgets[asset_name] = widgets
@@ -648,60 +665,13 @@ class MainWindow(QMainWindow, ResponsiveDialog):
     # Resto dos métodos permanecem iguais, apenas com fontes corrigidas onde necessário...
     def update_all_views(self):
         """Atualização melhorada com feedback visual"""
+        self.data_generation += 1
         try:
             # Atualiza status
             self.update_status_info()
             
-            # Calcula estoques (agora com inventário)
-            stock_data = self.db.calculate_stock_by_asset_with_inventory()
-            
-            # Atualiza abas
-            for asset_tab_name, widgets in self.stock_widgets.items():
-                total_lojas_asset = 0
-                
-                # Atualiza CDs
-                for cd_key, cd_full_name in self.cd_map.items():
-                    cd_stock = 0
-                    if "Total" in asset_tab_name:
-                        cd_stock = sum(stock_data.get(cd_full_name, {}).values())
-                    else:
-                        asset_clean = asset_tab_name.replace("📦 ", "")
-                        cd_stock = stock_data.get(cd_full_name, {}).get(asset_clean, 0)
-                    
-                    widgets[cd_key].setText(f"{cd_stock:,}".replace(",", "."))
-                    
-                    # Atualiza status do CD
-                    if cd_stock < 0:
-                        widgets[f"{cd_key}_status"].setText("🔴 Negativo")
-                        widgets[f"{cd_key}_status"].setStyleSheet("color: #dc3545;")
-                    elif cd_stock == 0:
-                        widgets[f"{cd_key}_status"].setText("🟡 Zero")
-                        widgets[f"{cd_key}_status"].setStyleSheet("color: #ffc107;")
-                    else:
-                        widgets[f"{cd_key}_status"].setText("🟢 OK")
-                        widgets[f"{cd_key}_status"].setStyleSheet("color: #28a745;")
-                
-                # Calcula total das lojas
-                for location, assets in stock_data.items():
-                    if location.startswith("LOJA"):
-                        if "Total" in asset_tab_name:
-                            total_lojas_asset += sum(assets.values())
-                        else:
-                            asset_clean = asset_tab_name.replace("📦 ", "")
-                            total_lojas_asset += assets.get(asset_clean, 0)
-               
-                widgets['total_lojas'].setText(f"{total_lojas_asset:,}".replace(",", "."))
-                
-                # Atualiza status do total de lojas
-                if total_lojas_asset < 0:
-                    widgets['total_lojas_status'].setText("🔴 Estoque Negativo")
-                    widgets['total_lojas_status'].setStyleSheet("color: #dc3545;")
-                elif total_lojas_asset == 0:
-                    widgets['total_lojas_status'].setText("🟡 Sem Estoque")
-                    widgets['total_lojas_status'].setStyleSheet("color: #ffc107;")
-                else:
-                    widgets['total_lojas_status'].setText("🟢 Estoque Positivo")
-                    widgets['total_lojas_status'].setStyleSheet("color: #28a745;")
+            # Saldos já consolidados no banco (mantidos a cada importação)
+            self.refresh_stock_widgets()
 
             # Atualiza combo de locais
             self.update_locations_combo()
@@ -710,151 +680,203 @@ class MainWindow(QMainWindow, ResponsiveDialog):
             self.update_location_details()
             
             # Atualiza timestamp
-            from datetime import datetime
-            self.last_update.setText(f"🕐 Última atualização: {datetime.now().strftime('%H:%M:%S')}")
+            self.update_timestamp()
             
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao atualizar visualizações:\n{e}")
 
-    def update_status_info(self):
+    def update_timestamp(self):
+        from datetime import datetime
+        self.last_update.setText(f"🕐 Última atualização: {datetime.now().strftime('%H:%M:%S')}")
+        AppearanceManager.set_style_property(self.last_update, "tone", None)
+
+    def render_snapshot(self, snapshot, stale=False):
+        """Preenche o painel com um snapshot salvo (sem consultar o banco)"""
+        self.update_status_info(snapshot['contagens'])
+        self.refresh_stock_widgets(snapshot['overview'], snapshot['ativos'])
+        self.update_locations_combo(snapshot['locais'])
+        self.update_location_details()
+        
+        if stale:
+            from datetime import datetime
+            generated_at = datetime.fromisoformat(snapshot['gerado_em'])
+            self.last_update.setText(f"🕐 Dados de {generated_at.strftime('%d/%m %H:%M')} (verificando...)")
+            AppearanceManager.set_style_property(self.last_update, "tone", "muted")
+        else:
+            self.update_timestamp()
+
+    def start_snapshot_refresh(self, known_version):
+        """Confere em segundo plano se o snapshot exibido ainda corresponde aos dados do banco"""
+        worker = DashboardRefreshWorker(self.db.db_name, known_version)
+        generation = self.data_generation
+        worker.refreshed.connect(lambda snapshot: self.on_snapshot_refreshed(snapshot, generation))
+        worker.failed.connect(lambda error: self.on_snapshot_refreshed(None, generation))
+        self.snapshot_worker = worker
+        worker.start()
+
+    def on_snapshot_refreshed(self, snapshot, generation):
+        """Resultado da conferência: snapshot novo, ou None quando o exibido continua válido"""
+        # Uma atualização com dados do banco (importação, botão atualizar) já substituiu o snapshot
+        if generation != self.data_generation:
+            return
+        
+        if snapshot is None:
+            self.update_timestamp()
+            return
+        
+        self.render_snapshot(snapshot)
+        self.statusBar().showMessage("🔄 Painel atualizado: havia dados novos desde a última abertura", 10000)
+
+    def refresh_stock_widgets(self, overview=None, assets=None):
+        """Atualiza as abas de estoque a partir dos agregados pré-calculados"""
+        if overview is None:
+            overview = self.db.get_stock_overview()
+        if assets is None:
+            assets = self.db.get_assets()
+        
+        # Ativo, CD ou região nova: recria as abas
+        if self.get_stock_layout_key(overview, assets) != self.stock_layout_key:
+            self.build_stock_tabs(overview, assets)
+        
+        for asset_tab_name, widgets in self.stock_widgets.items():
+            asset_code = self.stock_tab_assets[asset_tab_name]
+            
+            def stock_for(balances):
+                return sum(balances.values()) if asset_code is None else balances.get(asset_code, 0)
+            
+            for cd_name, balances in overview['cds'].items():
+                self.set_stock_row(widgets[('cd', cd_name)], stock_for(balances), ("🔴 Negativo", "🟡 Zero", "🟢 OK"))
+            
+            for regiao, balances in overview['regioes'].items():
+                self.set_stock_row(widgets[('regiao', regiao)], stock_for(balances), ("🔴 Negativo", "🟡 Zero", "🟢 OK"))
+            
+            self.set_stock_row(widgets['total_lojas'], stock_for(overview['total_lojas']),
+                               ("🔴 Estoque Negativo", "🟡 Sem Estoque", "🟢 Estoque Positivo"))
+
+    def set_stock_row(self, row_widgets, stock, status_texts):
+        """Atualiza valor e status (negativo/zero/positivo) de uma linha de estoque"""
+        stock_label, status_label = row_widgets
+        stock_label.setText(f"{stock:,}".replace(",", "."))
+        
+        # **OTIMIZAÇÃO: Só troca a propriedade "tone" (re-polish apenas quando o status muda)**
+        negative_text, zero_text, ok_text = status_texts
+        if stock < 0:
+            status_label.setText(negative_text)
+            AppearanceManager.set_style_property(status_label, "tone", "danger")
+        elif stock == 0:
+            status_label.setText(zero_text)
+            AppearanceManager.set_style_property(status_label, "tone", "warning")
+        else:
+            status_label.setText(ok_text)
+            AppearanceManager.set_style_property(status_label, "tone", "success")
+
+    def apply_incremental_import(self, result):
+        """Atualiza apenas o que os movimentos importados afetam (sem recalcular tudo)"""
+        if result.kind != 'movimentos':
+            self.update_all_views()
+            return
+
+        self.data_generation += 1
+        try:
+            touched_locations = result.touched_locations()
+
+            # Saldos e agregados já foram atualizados na importação
+            self.refresh_stock_widgets()
+            self.update_status_info()
+
+            # Combo só é recriado quando surgem locais novos
+            if touched_locations - self.known_locations:
+                self.update_locations_combo()
+
+            # Histórico só é recarregado se o local selecionado foi afetado
+            if self.location_combo.selected_location() in touched_locations:
+                self.update_location_details()
+
+            self.update_timestamp()
+        except Exception as e:
+            print(f"⚠️ Atualização incremental falhou, recalculando tudo: {e}")
+            self.update_all_views()
+
+    def configure_folder_watcher(self, settings):
+        """Liga/desliga a importação automática da pasta monitorada"""
+        if settings.get('enabled') and settings.get('folder'):
+            self.folder_watcher.start(settings['folder'], settings.get('settle_ms', 2000))
+        else:
+            self.folder_watcher.stop()
+
+    def on_watched_file_imported(self, result):
+        """Arquivo da pasta monitorada importado em segundo plano"""
+        file_name = os.path.basename(result.file_path)
+        dates = sorted(result.touched_dates())
+        period = f" | {dates[0].strftime('%d/%m/%Y')} a {dates[-1].strftime('%d/%m/%Y')}" if dates else ""
+
+        self.apply_incremental_import(result)
+        self.statusBar().showMessage(
+            f"📂 Importado automaticamente: {file_name} ({result.imported} linhas{period})", 15000
+        )
+
+    def on_watched_file_failed(self, file_path, error):
+        first_line = error.splitlines()[0] if error else ""
+        self.statusBar().showMessage(f"❌ Falha ao importar {os.path.basename(file_path)}: {first_line}", 15000)
+
+    def update_status_info(self, counts=None):
         """Atualiza informações de status do sistema"""
-        # Verifica se existe inventário
-        inventory_check = self.db._execute_query("SELECT COUNT(*) as count FROM inventario_inicial")
-        has_inventory = inventory_check[0]['count'] > 0 if inventory_check else False
+        if counts is None:
+            counts = self.db.get_status_counts()
         
-        if has_inventory:
+        # Verifica se existe inventário
+        if counts['inventario'] > 0:
             self.inventory_status.setText("📦 Inventário: ✅ Carregado")
-            self.inventory_status.setStyleSheet("color: #28a745; font-weight: bold;")
+            AppearanceManager.set_style_property(self.inventory_status, "tone", "success")
         else:
             self.inventory_status.setText("📦 Inventário: ❌ Não carregado")
-            self.inventory_status.setStyleSheet("color: #dc3545; font-weight: bold;")
+            AppearanceManager.set_style_property(self.inventory_status, "tone", "danger")
         
         # Conta registros de movimentos
-        movements_check = self.db._execute_query("SELECT COUNT(*) as count FROM movimentos")
-        movements_count = movements_check[0]['count'] if movements_check else 0
-        self.records_count.setText(f"📊 Registros: {movements_count:,}".replace(",", "."))
+        self.records_count.setText(f"📊 Registros: {counts['movimentos']:,}".replace(",", "."))
 
-    def update_locations_combo(self):
+    def update_locations_combo(self, locations=None):
         """Atualiza combo de locais"""
-        self.location_combo.blockSignals(True)
-        current_selection = self.location_combo.currentText()
-        self.location_combo.clear()
-        
-        self.location_combo.addItem("🔍 Selecione um local...")
-        
-        # Adiciona CDs
-        cds = sorted(self.db.get_all_locations('cd'))
-        if cds:
-            for cd in cds:
-                self.location_combo.addItem(f"🏢 {cd}")
-        
-        # Adiciona separador visual
-        self.location_combo.insertSeparator(self.location_combo.count())
-        
-        # Adiciona lojas
-        lojas = sorted(self.db.get_all_locations('loja'))
-        if lojas:
-            for loja in lojas:
-                self.location_combo.addItem(f"🏪 {loja}")
-        
-        # Restaura seleção
-        for i in range(self.location_combo.count()):
-            if current_selection in self.location_combo.itemText(i):
-                self.location_combo.setCurrentIndex(i)
-                break
-        
-        self.location_combo.blockSignals(False)
+        if locations is None:
+            locations = {'cd': self.db.get_all_locations('cd'), 'loja': self.db.get_all_locations('loja')}
+        
+        # **OTIMIZAÇÃO: Combo com busca só é recriado quando o conjunto de locais muda**
+        self.location_combo.set_locations(locations['cd'], locations['loja'])
+        self.known_locations = set(locations['cd']) | set(locations['loja'])
 
     def update_location_details(self):
         """Atualiza detalhes do local selecionado"""
-        self.history_model.clear()
-        self.history_model.setHorizontalHeaderLabels([
-            '📅 Data', '🔄 Movimento', '📦 Ativo (RTI)', 
-            '📤 Origem', '📥 Destino', '🔢 Quantidade'
-        ])
-        
-        location_text = self.location_combo.currentText()
-        if not location_text or "Selecione" in location_text:
+        location_name = self.location_combo.selected_location()
+        if not location_name:
             self.view_flow_button.setEnabled(False)
             self.view_visual_flow_button.setEnabled(False)
             self.export_button.setEnabled(False)
+            self.history_model.set_location(None)
             return
-
-        # Extrai nome real do local (remove emoji e prefixo)
-        location_name = location_text.replace("🏢 ", "").replace("🏪 ", "")
         
         self.view_flow_button.setEnabled(True)
         self.view_visual_flow_button.setEnabled(True)  # **CORREÇÃO: Sempre habilitado**
         self.export_button.setEnabled(True)
         
-        # Busca histórico
-        history = self.db.get_location_history(location_name)
-        
-        for row_data in history:
-            items = []
-            for i, item in enumerate(row_data):
-                if i == 0 and item:  # Data
-                    try:
-                        from datetime import datetime
-                        date_obj = datetime.strptime(str(item), '%Y-%m-%d')
-                        formatted_date = date_obj.strftime('%d/%m/%Y')
-                        items.append(QStandardItem(formatted_date))
-                    except:
-                        items.append(QStandardItem(str(item) if item else ""))
-                elif i == 1 and item:  # Tipo de movimento
-                    movement_icons = {
-                        'Remessa': '📤',
-                        'Regresso': '📥', 
-                        'Entrega': '🚚',
-                        'Devolução de Entrega': '↩️',
-                        'Transferencia': '🔄',
-                        'Retorno': '🔙'
-                    }
-                    icon = movement_icons.get(item, '📋')
-                    items.append(QStandardItem(f"{icon} {item}"))
-                else:
-                    items.append(QStandardItem(str(item) if item is not None else ""))
-            
-            self.history_model.appendRow(items)
+        # Opções dos filtros vêm do histórico do local e são recarregadas a cada atualização
+        # (importações trazem tipos/ativos novos); só a troca de local limpa os filtros anteriores
+        same_location = location_name == self.history_model.location_name
+        self.history_filter_bar.set_options(self.db.get_history_options(location_name), keep_filters=same_location)
         
-        # **CORREÇÃO: Configura colunas com tamanhos adequados**
-        header = self.history_table.horizontalHeader()
-        header.setFont(QFont("Arial", 10, QFont.Bold))  # **CORREÇÃO: Fonte maior no header**
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)  # Data
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)  # Movimento
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)  # RTI
-        header.setSectionResizeMode(3, QHeaderView.Stretch)           # Origem
-        header.setSectionResizeMode(4, QHeaderView.Stretch)           # Destino
-        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)  # Quantidade
+        # Busca histórico (só os ids; as linhas são lidas conforme a tabela rola)
+        self.history_model.set_location(location_name, self.history_filter_bar.filters())
+
+    def history_model_filters_changed(self, filters):
+        """Reaplica os filtros da barra ao histórico exibido"""
+        if self.history_model.location_name:
+            self.history_model.set_filters(filters)
 
     # Resto dos métodos permanecem iguais...
     def quick_upload_inventory(self):
         """Upload rápido de inventário pelo menu"""
-        file_path, _ = QFileDialog.getOpenFileName(
-            self, "Selecionar Arquivo de Inventário", "", 
-            "Arquivos de Dados (*.csv *.xlsx)"
-        )
-        
-        if file_path:
-            settings_dialog = SettingsDialog(self.db, self)
-            try:
-                # Simula upload usando o método da settings dialog
-                df = pd.read_csv(file_path, sep=';') if file_path.endswith('.csv') else pd.read_excel(file_path)
-                
-                # Validações
-                required_columns = ['loja_nome', 'ativo', 'quantidade']
-                if not all(col in df.columns for col in required_columns):
-                    raise ValueError(f"O arquivo deve conter as colunas: {', '.join(required_columns)}")
-                
-                self.db.insert_inventory_data(df)
-                QMessageBox.information(
-                    self, "Sucesso", 
-                    f"Inventário inicial carregado!\n{len(df)} registros processados."
-                )
-                self.update_all_views()
-                
-            except Exception as e:
-                QMessageBox.critical(self, "Erro", f"Erro no upload:\n{e}")
+        from import_dialog import select_and_import
+        if select_and_import(self, self.db, 'inventario'):
+            self.update_all_views()
 
     def handle_upload(self):
         """Upload de movimentos com verificação de inventário"""
@@ -874,32 +896,21 @@ class MainWindow(QMainWindow, ResponsiveDialog):
             if reply == QMessageBox.No:
                 return
         
-        file_path, _ = QFileDialog.getOpenFileName(
-            self, "Selecionar Arquivo de Movimentos", "", 
-            "Arquivos de Dados (*.csv *.xlsx)"
-        )
-        
-        if file_path:
-            try:
-                df = pd.read_csv(file_path, sep=';') if file_path.endswith('.csv') else pd.read_excel(file_path)
-                
-                if 'Data' not in df.columns or 'Quant.' not in df.columns or 'RTI' not in df.columns:
-                    raise ValueError("O arquivo deve conter as colunas 'Data', 'Quant.' e 'RTI'.")
-                
-                self.db.insert_data(df)
-                QMessageBox.information(self, "Sucesso", f"{len(df)} registros de movimento importados.")
-                self.update_all_views()
-                
-            except Exception as e:
-                QMessageBox.critical(self, "Erro no Upload", f"Falha ao processar arquivo:\n{e}")
+        from import_dialog import select_and_import
+        if select_and_import(self, self.db, 'movimentos'):
+            self.update_all_views()
+
+    def handle_batch_upload(self):
+        """Upload de vários arquivos de movimentos com leitura em paralelo"""
+        from import_dialog import select_and_import_batch
+        select_and_import_batch(self, self.db, on_finished=self.update_all_views)
 
     def show_flow_dialog(self):
         """Mostra diálogo de fluxo clássico"""
-        location_text = self.location_combo.currentText()
-        if location_text and "Selecione" not in location_text:
-            location_name = location_text.replace("🏢 ", "").replace("🏪 ", "")
-            flow_data = self.db.get_location_history(location_name)  # **CORREÇÃO: Usa histórico em vez de flow_data**
-            dialog = FlowDialog(location_name, flow_data, self)
+        location_name = self.location_combo.selected_location()
+        if location_name:
+            from flow_dialog import FlowDialog
+            dialog = FlowDialog(location_name, self.db, self)
             dialog.exec_()
 
     def export_complete_report(self):
@@ -912,9 +923,13 @@ class MainWindow(QMainWindow, ResponsiveDialog):
             )
             
             if file_path:
+                import pandas as pd
+                import stock_engine
+                
                 with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
                     # Estoque atual
-                    stock_data = self.db.calculate_stock_by_asset_with_inventory()
+                    stock_data = self.db.get_balances()
+                    location_kinds = self.db.get_location_kinds()
                     stock_list = []
                     for location, assets in stock_data.items():
                         for asset, qty in assets.items():
@@ -922,13 +937,18 @@ class MainWindow(QMainWindow, ResponsiveDialog):
                                 'Local': location,
                                 'Ativo': asset,
                                 'Quantidade': qty,
-                                'Tipo': 'CD' if 'CD' in location else 'Loja'
+                                'Tipo': 'CD' if location_kinds.get(location) == 'cd' else 'Loja'
                             })
                     
                     if stock_list:
                         stock_df = pd.DataFrame(stock_list)
                         stock_df.to_excel(writer, sheet_name='Estoque Atual', index=False)
                     
+                    # Saldo diário de todas as lojas (uma passada vetorizada, sem cálculo por loja)
+                    daily_balances = stock_engine.compute_daily_balances(self.db)
+                    if len(daily_balances.locations) and len(daily_balances.days):
+                        daily_balances.to_wide_frame().reset_index().to_excel(writer, sheet_name='Saldo Diario Lojas', index=False)
+                    
                     # Movimentos
                     movements_query = """
                     SELECT data_movimento, tipo_movimento, local_origem, local_destino, 
@@ -957,12 +977,10 @@ class MainWindow(QMainWindow, ResponsiveDialog):
 
     def export_history(self):
         """Exporta histórico do local selecionado"""
-        location_text = self.location_combo.currentText()
-        if not location_text or self.history_model.rowCount() == 0:
+        location_name = self.location_combo.selected_location()
+        if not location_name or self.history_model.rowCount() == 0:
             QMessageBox.warning(self, "Aviso", "Não há dados para exportar.")
             return
-
-        location_name = location_text.replace("🏢 ", "").replace("🏪 ", "")
         
         file_path, _ = QFileDialog.getSaveFileName(
             self, "Salvar Histórico", 
@@ -972,16 +990,11 @@ class MainWindow(QMainWindow, ResponsiveDialog):
         
         if file_path:
             try:
-                data = []
-                headers = [self.history_model.horizontalHeaderItem(i).text() 
-                            for i in range(self.history_model.columnCount())]
-                
-                for row in range(self.history_model.rowCount()):
-                    row_data = [self.history_model.item(row, col).text() 
-                                for col in range(self.history_model.columnCount())]
-                    data.append(row_data)
+                # Exporta o histórico inteiro com os filtros e a ordem da tabela (não só as linhas já exibidas)
+                data = self.history_model.all_rows()
                 
-                df = pd.DataFrame(data, columns=headers)
+                import pandas as pd
+                df = pd.DataFrame(data, columns=HISTORY_HEADERS)
                 df.to_csv(file_path, index=False, sep=';', encoding='utf-8-sig')
                 QMessageBox.information(self, "Sucesso", f"Histórico exportado para:\n{file_path}")
                 
@@ -1002,18 +1015,34 @@ class MainWindow(QMainWindow, ResponsiveDialog):
         )
         
         if reply == QMessageBox.Yes:
+            self.folder_watcher.stop()
+            if self.folder_watcher.worker:
+                self.folder_watcher.worker.wait()
+            if self.snapshot_worker:
+                self.snapshot_worker.wait()
+            
+            # Próxima abertura mostra o painel imediatamente a partir deste estado
+            try:
+                DashboardSnapshot.save(DashboardSnapshot.build(self.db))
+            except Exception as e:
+                print(f"⚠️ Snapshot do painel não foi salvo: {e}")
             self.db.close()
             event.accept()
         else:
             event.ignore()
 
 if __name__ == '__main__':
+    # **CORREÇÃO: Necessário para o pool de processos da importação em lote no executável**
+    import multiprocessing
+    multiprocessing.freeze_support()
+    
     # **CORREÇÃO CRÍTICA: Configura DPI ANTES de criar QApplication**
     os.environ["QT_AUTO_SCREEN_SCALE_FACTOR"] = "1"
     os.environ["QT_ENABLE_HIGHDPI_SCALING"] = "1"
     os.environ["QT_SCALE_FACTOR"] = "1.0"
     
     app = QApplication(sys.argv)
+    StartupProfiler.mark("QApplication criada")
     
     # **CORREÇÃO: Ativa High DPI scaling**
     app.setAttribute(Qt.AA_EnableHighDpiScaling, True)
@@ -1033,12 +1062,24 @@ if __name__ == '__main__':
     app.setStyle('Fusion')
     
     window = MainWindow()
-    window.show()
+    StartupProfiler.mark("Janela principal montada")
+    
+    if '--startup-check' in sys.argv:
+        # Mede a abertura até a primeira pintura; código de saída 1 se passar da meta
+        def finish_startup_check():
+            print("\n".join(StartupProfiler.report_lines()))
+            if window.snapshot_worker:
+                window.snapshot_worker.wait()
+            app.exit(0 if StartupProfiler.within_budget() else 1)
+        
+        StartupProfiler.watch_first_paint(window, lambda: QTimer.singleShot(0, finish_startup_check))
+    else:
+        # **NOVO: Verificação automática de atualizações na inicialização (após a primeira pintura)**
+        StartupProfiler.watch_first_paint(window, lambda: QTimer.singleShot(0, window.start_auto_update_check))
     
-    # **NOVO: Verificação automática de atualizações na inicialização**
-    try:
-        update_dialog = UpdateDialog(window, auto_check=True)
-    except Exception as e:
-        print(f"⚠️ Não foi possível verificar atualizações: {e}")
+    if '--trace-imports' in sys.argv:
+        # Sessão de uso real: módulos carregados alimentam a análise de exclusões do build.py --fast
+        app.aboutToQuit.connect(StartupProfiler.save_import_trace)
     
+    window.show()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,148 @@
+# startup_profiler.py - Tempo de importação por módulo e tempo até a primeira pintura da janela
+import os
+import sys
+import json
+import time
+import builtins
+
+class StartupProfiler:
+    """Mede a inicialização: tempo de cada import (inclusivo) e marcos até a primeira pintura
+
+    Importado antes de qualquer outro módulo em main.py; o relógio começa nesse momento
+    (a extração do executável e a partida do interpretador ficam de fora).
+    """
+
+    BUDGET_MS = 1500  # Meta de inicialização a frio até a primeira pintura (--startup-check)
+    TRACE_FILE = "import_trace.json"  # Módulos usados em sessões reais (--trace-imports), lido pelo build.py --fast
+
+    started_at = time.perf_counter()
+    first_paint_ms = None
+
+    _imports = []   # (módulo, ms, profundidade) na ordem em que terminaram
+    _marks = []     # (marco, ms desde o início)
+    _depth = 0
+    _original_import = None
+    _paint_filter = None
+
+    @classmethod
+    def start(cls):
+        """Passa a cronometrar os imports (até a primeira pintura)"""
+        if cls._original_import is not None:
+            return
+
+        cls._original_import = builtins.__import__
+        original_import = cls._original_import
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            # Só o primeiro carregamento custa; imports de módulos já carregados não são medidos
+            if level or name in sys.modules:
+                return original_import(name, globals, locals, fromlist, level)
+
+            cls._depth += 1
+            start = time.perf_counter()
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                cls._depth -= 1
+                cls._imports.append((name, (time.perf_counter() - start) * 1000, cls._depth))
+
+        builtins.__import__ = timed_import
+
+    @classmethod
+    def stop(cls):
+        """Restaura o import original (imports tardios não entram no relatório)"""
+        if cls._original_import is not None:
+            builtins.__import__ = cls._original_import
+            cls._original_import = None
+
+    @classmethod
+    def elapsed_ms(cls):
+        return (time.perf_counter() - cls.started_at) * 1000
+
+    @classmethod
+    def mark(cls, label):
+        """Registra um marco da inicialização (ms desde o início de main.py)"""
+        cls._marks.append((label, cls.elapsed_ms()))
+
+    @classmethod
+    def watch_first_paint(cls, widget, callback=None):
+        """Registra a primeira pintura do widget e encerra a medição dos imports"""
+        from PyQt5.QtCore import QObject, QEvent
+
+        class FirstPaintFilter(QObject):
+            def eventFilter(self, watched, event):
+                if event.type() == QEvent.Paint and cls.first_paint_ms is None:
+                    cls.first_paint_ms = cls.elapsed_ms()
+                    cls.mark("Primeira pintura")
+                    cls.stop()
+                    watched.removeEventFilter(self)
+                    if callback:
+                        callback()
+                return False
+
+        cls._paint_filter = FirstPaintFilter(widget)
+        widget.installEventFilter(cls._paint_filter)
+
+    @classmethod
+    def top_imports(cls, limit=12):
+        """Imports mais caros feitos diretamente pelos módulos do programa (ms, inclusivo)"""
+        direct = [(name, ms) for name, ms, depth in cls._imports if depth == 0]
+        return sorted(direct, key=lambda item: item[1], reverse=True)[:limit]
+
+    @classmethod
+    def within_budget(cls, budget_ms=None):
+        budget_ms = cls.BUDGET_MS if budget_ms is None else budget_ms
+        return cls.first_paint_ms is not None and cls.first_paint_ms <= budget_ms
+
+    @classmethod
+    def report_lines(cls):
+        """Relatório em texto (console e --startup-check)"""
+        lines = ["⏱️ Perfil de inicialização"]
+        for label, ms in cls._marks:
+            lines.append(f"   {label:<28} {ms:>8.0f} ms")
+        lines.append("   Imports mais lentos:")
+        for name, ms in cls.top_imports():
+            lines.append(f"      {name:<25} {ms:>8.1f} ms")
+        if cls.first_paint_ms is not None:
+            status = "✅ dentro da meta" if cls.within_budget() else "❌ acima da meta"
+            lines.append(f"   Primeira pintura: {cls.first_paint_ms:.0f} ms (meta {cls.BUDGET_MS} ms) {status}")
+        return lines
+
+    @classmethod
+    def report_html(cls):
+        """Trecho HTML para o diálogo Sobre"""
+        if cls.first_paint_ms is None:
+            return "<p>Perfil de inicialização indisponível.</p>"
+
+        color = "#28a745" if cls.within_budget() else "#dc3545"
+        rows = "".join(f"<tr><td>{label}</td><td align='right'>{ms:.0f} ms</td></tr>" for label, ms in cls._marks)
+        imports = "".join(f"<tr><td>{name}</td><td align='right'>{ms:.1f} ms</td></tr>"
+                          for name, ms in cls.top_imports(8))
+        return f"""
+        <p><b>🖼️ Primeira pintura:</b> <span style="color: {color};">{cls.first_paint_ms:.0f} ms</span>
+        (meta: {cls.BUDGET_MS} ms)</p>
+        <table border="0" cellpadding="3">{rows}</table>
+        <p><b>📦 Imports mais lentos:</b></p>
+        <table border="0" cellpadding="3">{imports}</table>
+        """
+
+    @classmethod
+    def save_import_trace(cls, trace_file=None):
+        """Acumula no arquivo de rastreio os módulos carregados nesta sessão (união com as anteriores)"""
+        trace_file = trace_file or cls.TRACE_FILE
+        try:
+            trace = {'sessoes': 0, 'modulos': []}
+            if os.path.exists(trace_file):
+                with open(trace_file, 'r', encoding='utf-8') as f:
+                    trace = json.load(f)
+
+            modules = set(trace['modulos']) | {name for name, module in list(sys.modules.items()) if module is not None}
+            trace = {'sessoes': trace['sessoes'] + 1, 'modulos': sorted(modules)}
+
+            with open(trace_file, 'w', encoding='utf-8') as f:
+                json.dump(trace, f, indent=1, ensure_ascii=False)
+            print(f"📝 Rastreio de imports salvo: {trace_file} ({len(modules)} módulos, {trace['sessoes']} sessões)")
+            return True
+        except Exception as e:
+            print(f"❌ Erro ao salvar rastreio de imports: {e}")
+            return False
@@ -0,0 +1,276 @@
+# stock_engine.py - Saldos diários e evolução de estoque por local (NumPy, sem dependência de Qt)
+import numpy as np
+import pandas as pd
+from database import INVENTORY_DATE, normalize_asset_name
+
+# Regras de loja (mesmas da evolução diária): Remessa entra no destino, Regresso sai da origem
+STORE_MOVEMENTS = {
+    'Remessa': ('destino', 1),
+    'Regresso': ('origem', -1),
+}
+
+MOVEMENT_COLUMNS = ['dia', 'tipo', 'origem', 'destino', 'ativo', 'quantidade']
+
+class DailyBalances:
+    """Saldos diários densos: matriz (local x ativo x dia) com saldo ao final de cada dia"""
+
+    def __init__(self, locations, assets, days, opening, balances):
+        self.locations = locations  # Nomes (índice 0 da matriz)
+        self.assets = assets        # Códigos de ativo (índice 1)
+        self.days = days            # datetime64[D] contínuo (índice 2)
+        self.opening = opening      # Saldo antes do primeiro dia (local x ativo)
+        self.balances = balances
+        self._location_index = {name: i for i, name in enumerate(locations)}
+
+    @property
+    def nbytes(self):
+        return self.balances.nbytes + self.opening.nbytes
+
+    def location(self, location_name):
+        """Saldos diários de um local (DataFrame dia x ativo)"""
+        index = self._location_index[location_name]
+        return pd.DataFrame(self.balances[index].T, index=pd.DatetimeIndex(self.days, name='dia'),
+                            columns=self.assets)
+
+    def on_day(self, day):
+        """Saldos de todos os locais ao final do dia informado (DataFrame local x ativo)"""
+        position = np.searchsorted(self.days, np.datetime64(day, 'D'), side='right') - 1
+        values = self.opening if position < 0 else self.balances[:, :, position]
+        return pd.DataFrame(values, index=self.locations, columns=self.assets)
+
+    def to_wide_frame(self):
+        """Tabela (local, ativo) x dia para exportação"""
+        rows = pd.MultiIndex.from_product([self.locations, self.assets], names=['Local', 'Ativo'])
+        columns = pd.DatetimeIndex(self.days).strftime('%d/%m/%Y')
+        return pd.DataFrame(self.balances.reshape(len(rows), len(self.days)), index=rows, columns=columns)
+
+class StockEvolution:
+    """Evolução diária de um local: saldo de abertura + variações por dia em arrays compactos
+
+    Os saldos de cada dia são reconstruídos sob demanda (cumsum das variações, calculado uma vez);
+    os movimentos ficam como colunas inteiras, sem manter as linhas do banco em memória.
+    """
+
+    def __init__(self, location_name, dates, assets, opening, day_deltas, first_seen,
+                 movement_types, day_offsets, mov_asset, mov_type, mov_qty, mov_flow, mov_sign):
+        self.location_name = location_name
+        self.dates = dates                # Datas (AAAA-MM-DD) com movimento, em ordem
+        self.assets = assets              # Ativos na ordem de aparição (inventário primeiro)
+        self.opening = opening            # Saldo de abertura por ativo
+        self.day_deltas = day_deltas      # Variação líquida (dia x ativo)
+        self.first_seen = first_seen      # Primeiro dia de cada ativo (-1 = inventário)
+        self.movement_types = movement_types
+        self.day_offsets = day_offsets    # Movimentos do dia i: [day_offsets[i], day_offsets[i + 1])
+        self.mov_asset = mov_asset
+        self.mov_type = mov_type
+        self.mov_qty = mov_qty
+        self.mov_flow = mov_flow          # +1 entrada no local, -1 saída, 0 sem participação direta
+        self.mov_sign = mov_sign          # Efeito no saldo pelas regras do local (+1, -1 ou 0)
+        self._balances = None
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def nbytes(self):
+        arrays = (self.opening, self.day_deltas, self.first_seen, self.day_offsets,
+                  self.mov_asset, self.mov_type, self.mov_qty, self.mov_flow, self.mov_sign)
+        return sum(array.nbytes for array in arrays)
+
+    @property
+    def balances(self):
+        """Saldo ao final de cada dia (dia x ativo), montado no primeiro acesso"""
+        if self._balances is None:
+            self._balances = self.opening + np.cumsum(self.day_deltas, axis=0)
+        return self._balances
+
+    def opening_stock(self):
+        return {asset: int(qty) for asset, qty, seen in zip(self.assets, self.opening, self.first_seen)
+                if seen < 0}
+
+    def stock(self, day_index):
+        """Saldo ao final do dia (ativos já vistos até o dia, como no cálculo original)"""
+        if day_index < 0:
+            return self.opening_stock()
+        row = self.balances[day_index]
+        return {asset: int(row[i]) for i, asset in enumerate(self.assets)
+                if self.first_seen[i] <= day_index}
+
+    def movements(self, day_index):
+        """Movimentos do dia como tuplas (ativo, tipo, quantidade, fluxo)"""
+        start, end = self.day_offsets[day_index], self.day_offsets[day_index + 1]
+        return [(self.assets[asset], self.movement_types[kind], int(qty), int(flow))
+                for asset, kind, qty, flow in zip(self.mov_asset[start:end], self.mov_type[start:end],
+                                                  self.mov_qty[start:end], self.mov_flow[start:end])]
+
+def build_evolution(location_name, movements, signs, opening_stock=None):
+    """Monta a evolução a partir de colunas de movimentos ordenadas (dia, ativo, tipo, quantidade)
+
+    signs: efeito de cada movimento no saldo do local (+1, -1 ou 0), já calculado pelas regras do local.
+    """
+    opening_stock = opening_stock or {}
+    days = movements['dia'].to_numpy()
+    date_values, day_codes = np.unique(days, return_inverse=True)
+
+    # Ativos: inventário primeiro, depois na ordem de aparição (mesma ordem dos cards originais)
+    asset_names = list(opening_stock)
+    movement_assets, first_rows = np.unique(movements['ativo'].to_numpy(), return_index=True)
+    for asset in movement_assets[np.argsort(first_rows)]:
+        if asset not in opening_stock:
+            asset_names.append(asset)
+    asset_index = {asset: i for i, asset in enumerate(asset_names)}
+
+    mov_asset = np.array([asset_index[asset] for asset in movements['ativo']], dtype=np.int16)
+    type_codes, movement_types = pd.factorize(movements['tipo'].fillna(''))
+    quantities = movements['quantidade'].to_numpy().astype(np.int32)
+    signs = np.asarray(signs, dtype=np.int8)
+
+    day_deltas = np.zeros((len(date_values), len(asset_names)), dtype=np.int32)
+    np.add.at(day_deltas, (day_codes, mov_asset), quantities * signs)
+
+    first_seen = np.full(len(asset_names), -1, dtype=np.int32)
+    for asset, row in zip(movement_assets, first_rows):
+        if asset not in opening_stock:
+            first_seen[asset_index[asset]] = day_codes[row]
+
+    opening = np.array([opening_stock.get(asset, 0) for asset in asset_names], dtype=np.int64)
+
+    destino = (movements['destino'] == location_name).to_numpy()
+    origem = (movements['origem'] == location_name).to_numpy()
+    mov_flow = np.where(destino, 1, np.where(origem, -1, 0)).astype(np.int8)
+
+    day_offsets = np.searchsorted(day_codes, np.arange(len(date_values) + 1)).astype(np.int32)
+
+    return StockEvolution(location_name, [str(date) for date in date_values], asset_names, opening,
+                          day_deltas, first_seen, list(movement_types), day_offsets,
+                          mov_asset, type_codes.astype(np.int8), quantities, mov_flow, signs)
+
+def _location_movements(db, location_name, start_date=None):
+    """Movimentos do local em colunas (ativo já normalizado), ordenados como no banco"""
+    query = """
+    SELECT data_movimento AS dia, tipo_movimento AS tipo, local_origem AS origem, local_destino AS destino,
+           CASE WHEN rti IS NULL OR TRIM(rti) = '' THEN 'N/A' ELSE UPPER(REPLACE(TRIM(rti), ' ', '')) END AS ativo,
+           quantidade
+    FROM movimentos
+    WHERE (local_origem = ? OR local_destino = ?) AND data_movimento IS NOT NULL AND data_movimento >= ?
+    ORDER BY data_movimento ASC, id ASC
+    """
+    return pd.read_sql_query(query, db.conn, params=(location_name, location_name, start_date or ''))
+
+def store_evolution(db, location_name):
+    """Evolução diária de uma loja a partir do inventário inicial (Remessa entra, Regresso sai)"""
+    inventory_match = db.get_inventory_match(location_name)
+    if not inventory_match:
+        print(f"Nenhum inventário encontrado para {location_name}")
+        return build_evolution(location_name, pd.DataFrame(columns=MOVEMENT_COLUMNS), [])
+
+    opening_stock = {}
+    for row in db._execute_query("SELECT ativo, quantidade FROM inventario_inicial WHERE loja_nome_simples = ?",
+                                 (inventory_match,)):
+        opening_stock[normalize_asset_name(row['ativo'])] = row['quantidade']
+
+    movements = _location_movements(db, location_name, INVENTORY_DATE)
+    signs = np.select(
+        [((movements['destino'] == location_name) & (movements['tipo'] == 'Remessa')).to_numpy(),
+         ((movements['origem'] == location_name) & (movements['tipo'] == 'Regresso')).to_numpy()],
+        [1, -1], default=0)
+
+    return build_evolution(location_name, movements, signs, opening_stock)
+
+def cd_evolution(db, cd_name):
+    """Evolução diária de um CD a partir de saldo zero"""
+    movements = _location_movements(db, cd_name)
+    destino = (movements['destino'] == cd_name).to_numpy()
+    origem = (movements['origem'] == cd_name).to_numpy()
+    signs = np.where(
+        destino,
+        movements['tipo'].isin(('Regresso', 'Entrega', 'Transferencia', 'Retorno')).to_numpy().astype(int),
+        np.where(origem & movements['tipo'].isin(('Remessa', 'Transferencia', 'Devolução de Entrega')).to_numpy(),
+                 -1, 0))
+
+    return build_evolution(cd_name, movements, signs)
+
+def load_store_movements(db, start_date=INVENTORY_DATE):
+    """Movimentos de loja do cubo agregado como colunas: local, ativo, dia e quantidade com sinal"""
+    cube = pd.read_sql_query("""
+        SELECT c.dia, c.origem, c.destino, c.ativo, c.tipo, c.quantidade
+        FROM movimentos_cubo c
+        WHERE c.dia >= ? AND c.tipo IN ('Remessa', 'Regresso')
+    """, db.conn, params=(start_date,))
+
+    frames = []
+    for movement_type, (side, sign) in STORE_MOVEMENTS.items():
+        selected = cube[cube['tipo'] == movement_type]
+        frames.append(pd.DataFrame({
+            'local': selected[side].to_numpy(),
+            'ativo': selected['ativo'].to_numpy(),
+            'dia': selected['dia'].to_numpy(),
+            'quantidade': selected['quantidade'].to_numpy() * sign,
+        }))
+
+    return pd.concat(frames, ignore_index=True)
+
+def load_opening_balances(db):
+    """Inventário inicial por loja completa (mapeamento inventario_match do catálogo)"""
+    return pd.read_sql_query("""
+        SELECT l.nome AS local, i.ativo, i.quantidade
+        FROM locais l
+        JOIN inventario_inicial i ON i.loja_nome_simples = l.inventario_match
+        WHERE l.tipo = 'loja'
+    """, db.conn)
+
+def compute_daily_balances(db, start_date=INVENTORY_DATE, end_date=None, dtype=np.int32):
+    """Saldos diários de todas as lojas: codificação inteira + np.add.at + cumsum no eixo dos dias"""
+    locations = np.array(sorted(db.get_all_locations('loja')), dtype=object)
+    movements = load_store_movements(db, start_date)
+    opening_rows = load_opening_balances(db)
+
+    # Só lojas do catálogo (contraparte CD em Remessa/Regresso não entra)
+    movements = movements[movements['local'].isin(locations)]
+    opening_rows = opening_rows[opening_rows['local'].isin(locations)]
+
+    assets = np.array(sorted(set(db.get_asset_codes()) | set(movements['ativo']) | set(opening_rows['ativo'])),
+                      dtype=object)
+
+    first_day = np.datetime64(start_date, 'D')
+    movement_days = pd.to_datetime(movements['dia'], format='%Y-%m-%d', errors='coerce')
+    valid = movement_days.notna().to_numpy()
+    movements = movements[valid]
+    day_values = movement_days[valid].to_numpy().astype('datetime64[D]')
+
+    if end_date is not None:
+        last_day = np.datetime64(end_date, 'D')
+    elif len(day_values):
+        last_day = day_values.max()
+    else:
+        last_day = first_day
+    days = np.arange(first_day, last_day + 1, dtype='datetime64[D]')
+
+    # Códigos inteiros (posições nos eixos da matriz)
+    location_codes = pd.Index(locations).get_indexer(movements['local'])
+    asset_codes = pd.Index(assets).get_indexer(movements['ativo'])
+    day_codes = (day_values - first_day).astype(np.int64)
+    quantities = movements['quantidade'].to_numpy()
+
+    in_range = day_codes < len(days)
+    location_codes, asset_codes, day_codes, quantities = (
+        location_codes[in_range], asset_codes[in_range], day_codes[in_range], quantities[in_range])
+
+    opening = np.zeros((len(locations), len(assets)), dtype=dtype)
+    np.add.at(opening,
+              (pd.Index(locations).get_indexer(opening_rows['local']),
+               pd.Index(assets).get_indexer(opening_rows['ativo'])),
+              opening_rows['quantidade'].to_numpy().astype(dtype))
+
+    # Índice linear ordenado: np.add.at percorre a matriz de forma sequencial
+    flat_index = (location_codes * len(assets) + asset_codes) * len(days) + day_codes
+    order = np.argsort(flat_index, kind='stable')
+
+    daily_delta = np.zeros(len(locations) * len(assets) * len(days), dtype=dtype)
+    np.add.at(daily_delta, flat_index[order], quantities[order].astype(dtype))
+
+    balances = daily_delta.reshape(len(locations), len(assets), len(days))
+    np.cumsum(balances, axis=2, out=balances)
+    balances += opening[:, :, np.newaxis]
+
+    return DailyBalances(locations, assets, days, opening, balances)
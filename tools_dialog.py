@@ -3,11 +3,15 @@ import pandas as pd
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QGroupBox, 
                             QFileDialog, QMessageBox, QTabWidget, QSpinBox, QComboBox,
                             QColorDialog, QCheckBox, QSlider, QWidget, QFormLayout,
-                            QLineEdit, QTextEdit, QScrollArea)
+                            QLineEdit, QTextEdit, QScrollArea, QTableWidget, QTableWidgetItem,
+                            QHeaderView)
 from PyQt5.QtCore import pyqtSignal, Qt
 from PyQt5.QtGui import QFont, QColor, QPalette
 from version import Version
 from appearance_manager import AppearanceManager
+from file_reader import FileReader
+from import_dialog import select_and_import, select_and_import_batch
+from folder_watcher import WatchConfig
 
 class ToolsDialog(QDialog):
     """Diálogo de ferramentas com abas organizadas"""
@@ -15,6 +19,7 @@ class ToolsDialog(QDialog):
     # Sinais para comunicação com a janela principal
     database_cleared = pyqtSignal()
     appearance_changed = pyqtSignal(dict)  # Emite mudanças de aparência
+    watch_config_changed = pyqtSignal(dict)  # Emite nova configuração da pasta monitorada
     
     def __init__(self, db_instance, parent=None):
         super().__init__(parent)
@@ -61,6 +66,7 @@ class ToolsDialog(QDialog):
         
         # Criar abas
         self.create_data_management_tab()
+        self.create_assets_tab()
         self.create_appearance_tab()
         self.create_maintenance_tab()
         self.create_about_tab()
@@ -110,7 +116,7 @@ class ToolsDialog(QDialog):
         inventory_info = QLabel(
             "Upload do inventário inicial das lojas (Data: 08/06/2025)\n"
             "Formato: loja_nome, ativo, quantidade\n"
-            "Ativos aceitos: HB623, HB618\n"
+            f"Ativos aceitos: {', '.join(self.db.get_asset_codes())}\n"
             "Exemplo: CABO FRIO, HB623, 100"
         )
         inventory_info.setWordWrap(True)
@@ -153,10 +159,53 @@ class ToolsDialog(QDialog):
         self.upload_movements_button.clicked.connect(self.upload_movements)
         movements_buttons.addWidget(self.upload_movements_button)
         
+        self.batch_upload_movements_button = QPushButton("📥 Upload em Lote (vários arquivos)")
+        self.batch_upload_movements_button.setStyleSheet("background-color: #17a2b8; color: white; padding: 8px 16px;")
+        self.batch_upload_movements_button.clicked.connect(self.batch_upload_movements)
+        movements_buttons.addWidget(self.batch_upload_movements_button)
+        
         movements_layout.addLayout(movements_buttons)
         movements_group.setLayout(movements_layout)
         layout.addWidget(movements_group)
         
+        # Grupo da Pasta Monitorada
+        watch_group = QGroupBox("📂 Pasta Monitorada")
+        watch_layout = QVBoxLayout()
+        
+        watch_info = QLabel(
+            "Arquivos .csv/.xlsx salvos nesta pasta são importados automaticamente.\n"
+            "Arquivos já importados (mesmo conteúdo) são ignorados."
+        )
+        watch_info.setWordWrap(True)
+        watch_info.setStyleSheet("background-color: #e2f0d9; padding: 10px; border-radius: 4px;")
+        watch_layout.addWidget(watch_info)
+        
+        self.watch_settings = WatchConfig.load_settings()
+        
+        self.watch_enabled_checkbox = QCheckBox("Importar automaticamente arquivos novos")
+        self.watch_enabled_checkbox.setChecked(self.watch_settings['enabled'])
+        watch_layout.addWidget(self.watch_enabled_checkbox)
+        
+        watch_buttons = QHBoxLayout()
+        
+        self.watch_folder_edit = QLineEdit(self.watch_settings['folder'])
+        self.watch_folder_edit.setReadOnly(True)
+        self.watch_folder_edit.setPlaceholderText("Nenhuma pasta selecionada")
+        watch_buttons.addWidget(self.watch_folder_edit)
+        
+        self.watch_folder_button = QPushButton("📁 Escolher Pasta")
+        self.watch_folder_button.clicked.connect(self.select_watch_folder)
+        watch_buttons.addWidget(self.watch_folder_button)
+        
+        self.save_watch_button = QPushButton("💾 Salvar")
+        self.save_watch_button.setStyleSheet("background-color: #28a745; color: white; padding: 8px 16px;")
+        self.save_watch_button.clicked.connect(self.save_watch_settings)
+        watch_buttons.addWidget(self.save_watch_button)
+        
+        watch_layout.addLayout(watch_buttons)
+        watch_group.setLayout(watch_layout)
+        layout.addWidget(watch_group)
+        
         # Grupo de Exportação
         export_group = QGroupBox("💾 Exportação")
         export_layout = QVBoxLayout()
@@ -181,6 +230,89 @@ class ToolsDialog(QDialog):
         
         self.tabs.addTab(tab, "📁 Dados")
 
+    def create_assets_tab(self):
+        """Aba do catálogo de ativos retornáveis"""
+        tab = QWidget()
+        layout = QVBoxLayout(tab)
+        
+        assets_info = QLabel(
+            "Ativos cadastrados definem as abas de estoque, a validação das importações\n"
+            "e as colunas das análises. Linhas com ativos não cadastrados são rejeitadas."
+        )
+        assets_info.setWordWrap(True)
+        assets_info.setStyleSheet("background-color: #e8f4fd; padding: 10px; border-radius: 4px;")
+        layout.addWidget(assets_info)
+        
+        # Lista de ativos com saldo total na rede
+        assets_group = QGroupBox("📦 Ativos Retornáveis")
+        assets_layout = QVBoxLayout()
+        
+        self.assets_table = QTableWidget()
+        self.assets_table.setColumnCount(4)
+        self.assets_table.setHorizontalHeaderLabels(['Código', 'Nome', 'Descrição', 'Saldo na Rede'])
+        self.assets_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.assets_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        assets_layout.addWidget(self.assets_table)
+        
+        assets_group.setLayout(assets_layout)
+        layout.addWidget(assets_group)
+        
+        # Cadastro de novo ativo
+        new_asset_group = QGroupBox("➕ Novo Ativo")
+        new_asset_layout = QFormLayout()
+        
+        self.new_asset_name_edit = QLineEdit()
+        self.new_asset_name_edit.setPlaceholderText("Ex: HB 630")
+        new_asset_layout.addRow("Nome:", self.new_asset_name_edit)
+        
+        self.new_asset_description_edit = QLineEdit()
+        self.new_asset_description_edit.setPlaceholderText("Ex: Caixa plástica HB 630")
+        new_asset_layout.addRow("Descrição:", self.new_asset_description_edit)
+        
+        self.add_asset_button = QPushButton("➕ Adicionar Ativo")
+        self.add_asset_button.setStyleSheet("background-color: #28a745; color: white; padding: 8px 16px;")
+        self.add_asset_button.clicked.connect(self.add_asset)
+        new_asset_layout.addRow(self.add_asset_button)
+        
+        new_asset_group.setLayout(new_asset_layout)
+        layout.addWidget(new_asset_group)
+        
+        self.load_assets_table()
+        
+        self.tabs.addTab(tab, "📦 Ativos")
+
+    def load_assets_table(self):
+        """Preenche a tabela de ativos com o total de cada um na rede"""
+        assets = self.db.get_assets()
+        totals = self.db.get_asset_totals()
+        
+        self.assets_table.setRowCount(len(assets))
+        for i, asset in enumerate(assets):
+            self.assets_table.setItem(i, 0, QTableWidgetItem(asset['codigo']))
+            self.assets_table.setItem(i, 1, QTableWidgetItem(asset['nome']))
+            self.assets_table.setItem(i, 2, QTableWidgetItem(asset['descricao'] or ""))
+            total = totals.get(asset['codigo'], 0)
+            self.assets_table.setItem(i, 3, QTableWidgetItem(f"{total:,}".replace(",", ".")))
+
+    def add_asset(self):
+        """Cadastra novo ativo retornável"""
+        name = self.new_asset_name_edit.text().strip()
+        if not name:
+            QMessageBox.warning(self, "Aviso", "Informe o nome do ativo.")
+            return
+        
+        try:
+            codigo = self.db.add_asset(name, self.new_asset_description_edit.text().strip())
+        except ValueError as e:
+            QMessageBox.warning(self, "Aviso", str(e))
+            return
+        
+        self.new_asset_name_edit.clear()
+        self.new_asset_description_edit.clear()
+        self.load_assets_table()
+        self.database_cleared.emit()  # Janela principal recria as abas de estoque
+        QMessageBox.information(self, "Sucesso", f"✅ Ativo {codigo} cadastrado.")
+
     def create_appearance_tab(self):
         """Aba de Configurações de Aparência"""
         tab = QWidget()
@@ -263,6 +395,7 @@ class ToolsDialog(QDialog):
         
         self.preview_label = QLabel("Este é um exemplo de como o texto aparecerá\ncom as configurações selecionadas.")
         self.preview_label.setWordWrap(True)
+        self.preview_label.setAutoFillBackground(True)  # Fundo/texto da preview vêm da paleta
         self.preview_label.setStyleSheet("padding: 20px; border: 1px solid #ccc; border-radius: 4px;")
         preview_layout.addWidget(self.preview_label)
         
@@ -319,6 +452,11 @@ class ToolsDialog(QDialog):
         self.clear_inventory_only_button.clicked.connect(self.clear_inventory)
         cleanup_buttons.addWidget(self.clear_inventory_only_button)
         
+        self.clear_import_cache_button = QPushButton("🧹 Limpar Cache de Importação")
+        self.clear_import_cache_button.setStyleSheet("background-color: #6c757d; color: white; padding: 8px 16px;")
+        self.clear_import_cache_button.clicked.connect(self.clear_import_cache)
+        cleanup_buttons.addWidget(self.clear_import_cache_button)
+        
         cleanup_layout.addLayout(cleanup_buttons)
         cleanup_group.setLayout(cleanup_layout)
         layout.addWidget(cleanup_group)
@@ -515,10 +653,10 @@ class ToolsDialog(QDialog):
         self.appearance_settings['theme'] = self.theme_combo.currentText()
         self.appearance_settings['high_contrast'] = self.high_contrast_checkbox.isChecked()
         
-        # Aplica na preview
-        font = QFont(self.appearance_settings['font_family'], self.appearance_settings['font_size'])
-        self.preview_label.setFont(font)
-        self.preview_button.setFont(font)
+        # Aplica na preview (fonte do tema compilado e em cache)
+        theme = AppearanceManager.compile_theme(self.appearance_settings)
+        self.preview_label.setFont(theme.font)
+        self.preview_button.setFont(theme.font)
         
         # Aplica cores
         primary_color = self.appearance_settings['primary_color']
@@ -529,21 +667,21 @@ class ToolsDialog(QDialog):
             text_color = '#000000' if self.appearance_settings['theme'] == 'Claro' else '#ffffff'
             background_color = '#ffffff' if self.appearance_settings['theme'] == 'Claro' else '#000000'
         
-        self.preview_label.setStyleSheet(f"""
-            padding: 20px; 
-            border: 1px solid #ccc; 
-            border-radius: 4px;
-            background-color: {background_color};
-            color: {text_color};
-        """)
+        # **OTIMIZAÇÃO: Cores pela paleta; stylesheet do botão só é trocada quando a cor primária muda**
+        palette = QPalette(self.preview_label.palette())
+        palette.setColor(QPalette.Window, QColor(background_color))
+        palette.setColor(QPalette.WindowText, QColor(text_color))
+        self.preview_label.setPalette(palette)
         
-        self.preview_button.setStyleSheet(f"""
+        button_style = f"""
             background-color: {primary_color};
             color: white;
             padding: 8px 16px;
             border: none;
             border-radius: 4px;
-        """)
+        """
+        if self.preview_button.styleSheet() != button_style:
+            self.preview_button.setStyleSheet(button_style)
 
     def choose_color(self, color_type):
         """Abre diálogo de seleção de cor"""
@@ -596,97 +734,45 @@ class ToolsDialog(QDialog):
         self.appearance_changed.emit(self.appearance_settings.copy())
         QMessageBox.information(self, "✅ Sucesso", "Configurações aplicadas com sucesso!")
 
-    # Métodos de upload e limpeza (reutilizados do settings_dialog.py original)
+    # Métodos de upload (ingest.py) e limpeza
     def upload_inventory(self):
         """Upload de inventário"""
-        file_path, _ = QFileDialog.getOpenFileName(
-            self, "Selecionar Arquivo de Inventário", "", 
-            "Arquivos de Dados (*.csv *.xlsx)"
-        )
-        
-        if file_path:
-            try:
-                # Lógica de upload (copiada do settings_dialog.py original)
-                if file_path.endswith('.csv'):
-                    try:
-                        df = pd.read_csv(file_path, sep=';')
-                    except:
-                        try:
-                            df = pd.read_csv(file_path, sep=',')
-                        except:
-                            df = pd.read_csv(file_path, sep='\t')
-                else:
-                    df = pd.read_excel(file_path)
-                
-                # Validação e inserção (código do settings_dialog.py)
-                df.columns = [col.strip().lower() for col in df.columns]
-                required_columns = ['loja_nome', 'ativo', 'quantidade']
-                
-                column_mapping = {
-                    'loja': 'loja_nome', 'loja_nome': 'loja_nome', 'nome_loja': 'loja_nome', 'local': 'loja_nome',
-                    'ativo': 'ativo', 'rti': 'ativo', 'produto': 'ativo',
-                    'quantidade': 'quantidade', 'qtd': 'quantidade', 'qtde': 'quantidade', 'estoque': 'quantidade'
-                }
-                
-                for old_name, new_name in column_mapping.items():
-                    if old_name in df.columns:
-                        df.rename(columns={old_name: new_name}, inplace=True)
-                
-                missing_columns = [col for col in required_columns if col not in df.columns]
-                if missing_columns:
-                    raise ValueError(f"Colunas faltando: {missing_columns}")
-                missing_columns = [col for col in required_columns if col not in df.columns]
-                if missing_columns:
-                    raise ValueError(f"Colunas faltando: {missing_columns}")
-                
-                df = df.dropna(subset=required_columns)
-                
-                # Validação dos ativos
-                valid_assets = ['HB623', 'HB618']
-                df['ativo'] = df['ativo'].astype(str).str.upper().str.strip()
-                
-                invalid_assets = df[~df['ativo'].isin(valid_assets)]
-                if not invalid_assets.empty:
-                    invalid_list = invalid_assets['ativo'].unique()
-                    raise ValueError(f"Ativos inválidos: {invalid_list}. Use apenas: {valid_assets}")
-                
-                df['quantidade'] = pd.to_numeric(df['quantidade'], errors='coerce')
-                df = df.dropna(subset=['quantidade'])
-                df['quantidade'] = df['quantidade'].astype(int)
-                
-                successful_inserts, failed_inserts = self.db.insert_inventory_data(df)
-                
-                message = f"✅ Upload concluído!\n\nInserções bem-sucedidas: {successful_inserts}\nFalhas: {len(failed_inserts)}"
-                
-                if successful_inserts > 0:
-                    QMessageBox.information(self, "Sucesso", message)
-                    self.database_cleared.emit()
-                else:
-                    QMessageBox.warning(self, "Atenção", message)
-                    
-            except Exception as e:
-                QMessageBox.critical(self, "Erro no Upload", f"Falha ao processar arquivo:\n{e}")
+        if select_and_import(self, self.db, 'inventario'):
+            self.database_cleared.emit()
 
     def upload_movements(self):
         """Upload de movimentos"""
-        file_path, _ = QFileDialog.getOpenFileName(
-            self, "Selecionar Arquivo de Movimentos", "", 
-            "Arquivos de Dados (*.csv *.xlsx)"
-        )
-        
-        if file_path:
-            try:
-                df = pd.read_csv(file_path, sep=';') if file_path.endswith('.csv') else pd.read_excel(file_path)
-                
-                if 'Data' not in df.columns or 'Quant.' not in df.columns or 'RTI' not in df.columns:
-                    raise ValueError("O arquivo deve conter as colunas 'Data', 'Quant.' e 'RTI'.")
-                
-                self.db.insert_data(df)
-                QMessageBox.information(self, "Sucesso", f"✅ {len(df)} registros de movimento importados.")
-                self.database_cleared.emit()
-                
-            except Exception as e:
-                QMessageBox.critical(self, "Erro no Upload", f"Falha ao processar arquivo:\n{e}")
+        if select_and_import(self, self.db, 'movimentos'):
+            self.database_cleared.emit()
+
+    def batch_upload_movements(self):
+        """Upload de vários arquivos de movimentos em lote"""
+        select_and_import_batch(self, self.db, on_finished=self.database_cleared.emit)
+
+    def select_watch_folder(self):
+        """Escolhe a pasta monitorada"""
+        folder = QFileDialog.getExistingDirectory(self, "Selecionar Pasta Monitorada", self.watch_folder_edit.text())
+        if folder:
+            self.watch_folder_edit.setText(folder)
+
+    def save_watch_settings(self):
+        """Salva e aplica a configuração da pasta monitorada"""
+        enabled = self.watch_enabled_checkbox.isChecked()
+        folder = self.watch_folder_edit.text()
+        
+        if enabled and not folder:
+            QMessageBox.warning(self, "Aviso", "Selecione uma pasta para ativar a importação automática.")
+            return
+        
+        self.watch_settings['enabled'] = enabled
+        self.watch_settings['folder'] = folder
+        
+        if WatchConfig.save_settings(self.watch_settings):
+            self.watch_config_changed.emit(self.watch_settings.copy())
+            status = "ativada" if enabled else "desativada"
+            QMessageBox.information(self, "Sucesso", f"✅ Importação automática {status}.")
+        else:
+            QMessageBox.critical(self, "Erro", "Não foi possível salvar a configuração.")
 
     def clear_inventory(self):
         """Limpa apenas inventário"""
@@ -710,11 +796,18 @@ class ToolsDialog(QDialog):
         )
         
         if reply == QMessageBox.Yes:
-            self.db.cursor.execute("DELETE FROM movimentos")
-            self.db.conn.commit()
+            self.db.clear_movements_data()
             QMessageBox.information(self, "Sucesso", "✅ Dados de movimentos removidos.")
             self.database_cleared.emit()
 
+    def clear_import_cache(self):
+        """Remove planilhas já processadas do cache de importação"""
+        try:
+            removed = FileReader.clear_cache()
+            QMessageBox.information(self, "Sucesso", f"✅ {removed} arquivo(s) removido(s) do cache de importação.")
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao limpar cache:\n{e}")
+
     def clear_database(self):
         """Limpa toda a base de dados"""
         if self.db.clear_all_data():
@@ -733,7 +826,8 @@ class ToolsDialog(QDialog):
             if file_path:
                 with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
                     # Estoque atual
-                    stock_data = self.db.calculate_stock_by_asset_with_inventory()
+                    stock_data = self.db.get_balances()
+                    location_kinds = self.db.get_location_kinds()
                     stock_list = []
                     for location, assets in stock_data.items():
                         for asset, qty in assets.items():
@@ -741,7 +835,7 @@ class ToolsDialog(QDialog):
                                 'Local': location,
                                 'Ativo': asset,
                                 'Quantidade': qty,
-                                'Tipo': 'CD' if 'CD' in location else 'Loja'
+                                'Tipo': 'CD' if location_kinds.get(location) == 'cd' else 'Loja'
                             })
                     
                     if stock_list:
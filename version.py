@@ -1,7 +1,6 @@
 # version.py - VERSÃO CORRIGIDA PARA SISTEMA DE ATUALIZAÇÕES
 import os
 import json
-import requests
 import subprocess
 import sys
 from datetime import datetime
@@ -52,6 +51,8 @@ class UpdateChecker(QThread):
         
     def run(self):
         """Verifica se há atualizações disponíveis - VERSÃO CORRIGIDA"""
+        import requests  # Import local: só carregado quando o atualizador é usado
+        
         try:
             print(f"🔍 Verificando atualizações no GitHub...")
             print(f"🔗 URL: {Version.VERSION_CHECK_URL}")
@@ -228,6 +229,8 @@ class UpdateDownloader(QThread):
         
     def run(self):
         """Baixa e instala a atualização - VERSÃO CORRIGIDA"""
+        import requests
+        
         try:
             self.installation_progress.emit("🔄 Iniciando download...")
             